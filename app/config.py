@@ -31,6 +31,7 @@ class AppConfig:
     # 기본값: text-embedding-3-small
     AOAI_API_VERSION  = os.getenv("AOAI_API_VERSION", "2024-12-01-preview")  
     # 기본값 최신 Preview 버전
+    AOAI_EMBED_DIMENSIONS  = int(os.getenv("AOAI_EMBED_DIMENSIONS", "0"))  # 임베딩 차원 수 (0: 모델 기본값)
 
     # ===== Azure AI Search =====
     AIS_ENDPOINT  = os.getenv("AIS_ENDPOINT", "")  # Search 엔드포인트
@@ -38,6 +39,54 @@ class AppConfig:
     AIS_INDEX  = os.getenv("AIS_INDEX", "entraid-app-guide-index")  # 기본 인덱스명
     AIS_INDEXER_NAME  = os.getenv("AIS_INDEXER_NAME", "entraid-app-guide-indexer")  
     # 인덱서 이름 (추가됨)
+    AIS_LOCATION_FIELDS  = os.getenv("AIS_LOCATION_FIELDS", "false").lower() == "true"
+    # 인덱스에 page_no/char_start/char_end 필드가 있으면 청크 위치 정보도 업로드
+
+    # ===== Embedding 배치 =====
+    EMBED_MAX_BATCH_TOKENS  = int(os.getenv("EMBED_MAX_BATCH_TOKENS", "100000"))  # 요청당 최대 토큰 수
+    EMBED_MAX_BATCH_INPUTS  = int(os.getenv("EMBED_MAX_BATCH_INPUTS", "256"))  # 요청당 최대 입력 수
+    EMBED_CONCURRENCY  = int(os.getenv("EMBED_CONCURRENCY", "4"))  # 동시 요청 배치 수
+    EMBED_MAX_RETRIES  = int(os.getenv("EMBED_MAX_RETRIES", "6"))  # 429/5xx 재시도 횟수
+    EMBED_TPM_LIMIT  = int(os.getenv("EMBED_TPM_LIMIT", "0"))  # 배포 TPM 한도 (0: 제한 없음)
+
+    # ===== Embedding 캐시 =====
+    EMBED_CACHE_ENABLED  = os.getenv("EMBED_CACHE_ENABLED", "true").lower() == "true"  # 영구 임베딩 캐시 사용 여부
+    EMBED_CACHE_MAX_MB  = int(os.getenv("EMBED_CACHE_MAX_MB", "512"))  # 캐시 최대 크기(MB), 넘으면 LRU 삭제
+    QUERY_EMBED_CACHE_SIZE  = int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024"))  # 질의 임베딩 메모리 캐시 항목 수 (0: 사용 안 함)
+    QUERY_EMBED_CACHE_TTL  = float(os.getenv("QUERY_EMBED_CACHE_TTL", "3600"))  # 질의 임베딩 메모리 캐시 유효 시간(초)
+
+    # ===== 검색 백엔드 / 캐시 =====
+    RETRIEVER_BACKEND  = os.getenv("RETRIEVER_BACKEND", "azure")  # 검색 백엔드 (azure | local: 프로세스 내 벡터 검색)
+    LOCAL_INDEX_ENABLED  = os.getenv("LOCAL_INDEX_ENABLED", "true").lower() == "true"  # 인덱싱 시 로컬 벡터 인덱스 샤드도 기록
+    CHUNK_STORE_ENABLED  = os.getenv("CHUNK_STORE_ENABLED", "true").lower() == "true"  # 인덱싱 시 청크 본문을 로컬 청크 저장소(memory-map)에도 기록
+    LOCAL_VECTOR_DTYPE  = os.getenv("LOCAL_VECTOR_DTYPE", "float32")  # 로컬 벡터 행렬 자료형 (float32: 빠름 | float16: 메모리 절반, 변환 비용으로 느림)
+    LOCAL_HYBRID_SEARCH  = os.getenv("LOCAL_HYBRID_SEARCH", "true").lower() == "true"  # 로컬 검색에서 BM25 키워드 순위를 RRF로 결합
+    # RRF 결합 전 키워드(및 로컬 벡터) 후보 수 (이전 이름 LOCAL_FUSION_CANDIDATES도 계속 읽음)
+    FUSION_CANDIDATES  = int(os.getenv("FUSION_CANDIDATES", os.getenv("LOCAL_FUSION_CANDIDATES", "50")))
+    RRF_K  = int(os.getenv("RRF_K", "60"))  # RRF 상수 k (클수록 하위 순위 영향이 커짐)
+    # Azure 검색은 chunk_id/점수만 받고 본문은 로컬 청크 저장소에서 채움 (저장소가 비어 있으면 전체 필드 조회)
+    # 저장소는 이 프로세스가 인덱싱한 내용만 알므로, 다른 곳에서 재인덱싱하면 오래된 본문을 돌려줄 수 있음 → 인덱서와 앱이 CACHE_DIR을 공유할 때만 켤 것
+    SEARCH_HYDRATE_LOCAL  = os.getenv("SEARCH_HYDRATE_LOCAL", "false").lower() == "true"
+    MMR_ENABLED  = os.getenv("MMR_ENABLED", "true").lower() == "true"  # 후보를 더 가져와 MMR로 중복 청크를 줄여 top_k 선택
+    MMR_FETCH_K  = int(os.getenv("MMR_FETCH_K", "20"))  # MMR 재정렬 후보 수 (후보 벡터는 로컬 벡터 인덱스에서 읽고, 없는 청크만 Azure에서 조회)
+    MMR_LAMBDA  = float(os.getenv("MMR_LAMBDA", "0.7"))  # MMR 관련도 가중치 (1: 관련도만, 0: 다양성만)
+    QUERY_REWRITE_DICTS  = os.getenv("QUERY_REWRITE_DICTS", "")  # 질의 재작성 사전 JSON 경로 (쉼표 구분, 비우면 app/rag/dictionaries/query_rewrite.json)
+    QUERY_REWRITE_RELOAD_SEC  = float(os.getenv("QUERY_REWRITE_RELOAD_SEC", "5"))  # 사전 파일 변경 확인 주기(초), 음수면 다시 읽지 않음
+    SEARCH_CACHE_SIZE  = int(os.getenv("SEARCH_CACHE_SIZE", "512"))  # 검색 결과 메모리 캐시 항목 수 (0: 사용 안 함)
+    SEARCH_CACHE_TTL  = float(os.getenv("SEARCH_CACHE_TTL", "900"))  # 검색 결과 캐시 유효 시간(초), 인덱스 버전이 바뀌면 즉시 무효 (인덱서와 CACHE_DIR을 공유할 때만)
+    SEARCH_MANY_CONCURRENCY  = int(os.getenv("SEARCH_MANY_CONCURRENCY", "8"))  # search_many 동시 검색 수
+    CONTEXT_TOKEN_BUDGET  = int(os.getenv("CONTEXT_TOKEN_BUDGET", "1500"))  # LLM 컨텍스트 최대 토큰 수 (0: 제한 없이 overlap 제거만)
+    CONTEXT_OVERLAP_MIN_CHARS  = int(os.getenv("CONTEXT_OVERLAP_MIN_CHARS", "20"))  # 같은 문서 청크 간 중복으로 볼 최소 겹침 길이(자), 0이면 제거 안 함
+    ANSWER_CACHE_ENABLED  = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"  # 의미 기반 답변 캐시 사용 여부
+    ANSWER_CACHE_THRESHOLD  = float(os.getenv("ANSWER_CACHE_THRESHOLD", "0.92"))  # 캐시 적중 코사인 유사도 임계값
+    ANSWER_CACHE_SIZE  = int(os.getenv("ANSWER_CACHE_SIZE", "1000"))  # 답변 캐시 최대 항목 수
+    ANSWER_CACHE_TTL  = float(os.getenv("ANSWER_CACHE_TTL", "3600"))  # 답변 캐시 유효 시간(초)
+
+    # ===== Search 업로드 =====
+    UPLOAD_BATCH_DOCS  = int(os.getenv("UPLOAD_BATCH_DOCS", "1000"))  # 배치당 최대 문서 수 (서비스 한도 1000)
+    UPLOAD_BATCH_BYTES  = int(os.getenv("UPLOAD_BATCH_BYTES", str(15 * 1024 * 1024)))  # 배치당 최대 페이로드 (서비스 한도 16MB)
+    UPLOAD_CONCURRENCY  = int(os.getenv("UPLOAD_CONCURRENCY", "4"))  # 동시 전송 배치 수
+    UPLOAD_MAX_RETRIES  = int(os.getenv("UPLOAD_MAX_RETRIES", "5"))  # 실패 키 재시도 횟수
 
     # ===== Azure Key Vault (옵션) =====
     KEYVAULT_URL  = os.getenv("KEYVAULT_URL", "")
@@ -48,6 +97,24 @@ class AppConfig:
     # ===== Blob Storage (옵션) =====
     BLOB_CONN_STR  = os.getenv("BLOB_CONN_STR", "")  # Blob 연결 문자열
     BLOB_CONTAINER  = os.getenv("BLOB_CONTAINER", "")  # Blob 컨테이너명
+    BLOB_PREFIX  = os.getenv("BLOB_PREFIX", "")  # 인덱싱할 Blob 이름 접두사 (가상 폴더)
+    BLOB_READ_BLOCK_MB  = int(os.getenv("BLOB_READ_BLOCK_MB", "4"))  # 범위 읽기 한 번의 크기(MB)
+
+    # ===== 로컬 상태/캐시 =====
+    CACHE_DIR  = os.getenv("CACHE_DIR", ".cache")  # 매니페스트, 캐시 등 로컬 상태 저장 경로
+
+    # ===== Ingestion =====
+    INGEST_WORKERS  = int(os.getenv("INGEST_WORKERS", "1"))  # PDF 추출 프로세스 수 (0: CPU 수)
+    INGEST_BATCH_SIZE  = int(os.getenv("INGEST_BATCH_SIZE", "64"))  # 임베딩/업로드 배치 크기(청크 수)
+    INGEST_QUEUE_SIZE  = int(os.getenv("INGEST_QUEUE_SIZE", "4"))  # 파이프라인 스테이지 간 큐 크기
+    INGEST_DELTA  = os.getenv("INGEST_DELTA", "false").lower() == "true"  # 변경된 청크만 재인덱싱
+    PDF_BACKEND  = os.getenv("PDF_BACKEND", "pypdf")  # PDF 텍스트 추출 백엔드 (pypdf | PyPDF2 | pymupdf)
+    PAGE_CACHE_ENABLED  = os.getenv("PAGE_CACHE_ENABLED", "true").lower() == "true"  # PDF 페이지 텍스트 캐시 사용 여부
+    CHUNK_TOKENS  = int(os.getenv("CHUNK_TOKENS", "500"))  # 청크당 최대 토큰 수
+    CHUNK_OVERLAP_TOKENS  = int(os.getenv("CHUNK_OVERLAP_TOKENS", "50"))  # 청크 간 중복 토큰 수
+    INGEST_DEDUP  = os.getenv("INGEST_DEDUP", "true").lower() == "true"  # 중복/유사 중복 청크는 대표 하나만 임베딩
+    DEDUP_MAX_DISTANCE  = int(os.getenv("DEDUP_MAX_DISTANCE", "3"))  # 유사 중복 판정 SimHash 해밍 거리 (0~3)
+    DEDUP_MIN_CHARS  = int(os.getenv("DEDUP_MIN_CHARS", "30"))  # 이보다 짧은 청크는 완전 중복만 판정
 
     @classmethod
     def validate(cls):
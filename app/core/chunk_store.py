@@ -0,0 +1,226 @@
+"""
+chunk_store.py : 로컬 청크 텍스트 저장소 (memory-map)
+- 인덱서가 Azure AI Search에 올리는 청크 본문을 문서(parent_id)별 파일 하나로 함께 기록한다.
+  파일 형식: [8바이트 헤더 길이][JSON 헤더: chunk_id → (시작, 끝) 바이트 위치][UTF-8 본문 blob]
+  헤더와 본문이 한 파일이라 os.replace 한 번으로 원자적으로 교체되고, 읽는 쪽이 짝이 안 맞는 파일을 열 일이 없다.
+- 리트리버는 Azure에서 chunk_id와 점수만 받고, 프롬프트에 들어갈 청크의 본문만 여기서 채운다.
+  본문은 memory-map 위의 memoryview에서 바로 디코딩하므로 중간 bytes 복사가 없다.
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import mmap
+import os
+import re
+import struct
+import threading
+from typing import IO, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from app.config import AppConfig
+from app.core.index_version import get_index_version
+
+logger = logging.getLogger("entraaid_app")
+
+_HEADER = struct.Struct("<Q")
+_SUFFIX = ".chunks"
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def chunk_store_dir(index_name: Optional[str] = None) -> str:
+    return os.path.join(AppConfig.CACHE_DIR, "chunk_store", _safe(index_name or AppConfig.AIS_INDEX))
+
+
+def _open_shard(path: str) -> Tuple[Dict[str, Any], Optional[mmap.mmap], int]:
+    """(헤더, memory-map, 본문 시작 위치) - 읽을 수 없으면 빈 헤더"""
+    try:
+        with open(path, "rb") as f:
+            header_size = _HEADER.unpack(f.read(_HEADER.size))[0]
+            header = json.loads(f.read(header_size).decode("utf-8"))
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except FileNotFoundError:
+        return {}, None, 0
+    except (OSError, ValueError, struct.error) as exc:
+        logger.warning("청크 저장소 파일을 읽을 수 없습니다: %s (%s)", path, exc)
+        return {}, None, 0
+    return header, mapped, _HEADER.size + header_size
+
+
+class ChunkStoreWriter:
+    """
+    문서(parent_id) 하나의 청크 저장소 파일 기록기 (LocalShardWriter와 같은 add/commit 흐름)
+    - parent_id는 인덱서의 문서 id(indexer.document_id, 상대 경로/blob 경로 기준으로 유일)이므로
+      폴더가 다른 같은 이름의 PDF도 서로 다른 파일에 기록된다.
+    - add로 받은 본문은 임시 blob 파일에 바로 기록하고, 메모리에는 chunk_id → (시작, 끝)만 둔다.
+    - incremental=True: 이전 파일에서 keep에 남아 있고 이번에 다시 올리지 않은 청크는 그대로 유지 (delta 인덱싱)
+    """
+
+    def __init__(self, parent_id: str, index_name: Optional[str] = None, incremental: bool = False):
+        self.parent_id = parent_id
+        self.path = os.path.join(chunk_store_dir(index_name), _safe(parent_id) + _SUFFIX)
+        self.incremental = incremental
+        self._spans: Dict[str, Tuple[int, int]] = {}
+        self._spool: Optional[IO[bytes]] = None
+        self._spool_size = 0
+        self._title: Optional[str] = None
+
+    def add(self, docs: Iterable[Dict[str, Any]]) -> None:
+        for doc in docs:
+            if self._spool is None:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._spool = open(f"{self.path}.spool", "wb")
+            data = (doc.get("chunk") or "").encode("utf-8")
+            self._spool.write(data)
+            self._spans[doc["chunk_id"]] = (self._spool_size, self._spool_size + len(data))
+            self._spool_size += len(data)
+            self._title = self._title or doc.get("title")
+
+    def _spooled(self) -> Any:
+        """임시 blob 파일을 닫고 memory-map으로 (기록한 본문이 없으면 빈 bytes)"""
+        if self._spool is None:
+            return b""
+        self._spool.close()
+        if not self._spool_size:
+            return b""
+        with open(f"{self.path}.spool", "rb") as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def commit(self, keep: Set[str]) -> int:
+        """keep(현재 매니페스트의 chunk_id)에 있는 청크만 남겨 파일을 원자적으로 교체하고 청크 수를 반환"""
+        # (원본 버퍼, 시작, 끝) - 본문은 파일에 쓸 때 청크 단위로만 복사
+        parts: List[Tuple[Any, int, int]] = []
+        offsets: Dict[str, Tuple[int, int]] = {}
+        position = 0
+
+        def append(chunk_id: str, source: Any, start: int, end: int) -> None:
+            nonlocal position
+            parts.append((source, start, end))
+            offsets[chunk_id] = (position, position + end - start)
+            position += end - start
+
+        previous: Optional[mmap.mmap] = None
+        if self.incremental:
+            header, previous, base = _open_shard(self.path)
+            if previous is not None:
+                for chunk_id, (start, end) in header.get("offsets", {}).items():
+                    if chunk_id in keep and chunk_id not in self._spans:
+                        append(chunk_id, previous, base + start, base + end)
+        spooled = self._spooled()
+        for chunk_id, (start, end) in self._spans.items():
+            if chunk_id in keep:
+                append(chunk_id, spooled, start, end)
+
+        header_bytes = json.dumps(
+            {"parent_id": self.parent_id, "title": self._title or self.parent_id, "offsets": offsets},
+            ensure_ascii=False,
+        ).encode("utf-8")
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        with open(f"{self.path}.tmp", "wb") as f:
+            f.write(_HEADER.pack(len(header_bytes)))
+            f.write(header_bytes)
+            for source, start, end in parts:
+                f.write(source[start:end])
+        os.replace(f"{self.path}.tmp", self.path)
+        for mapped in (previous, spooled):
+            if isinstance(mapped, mmap.mmap):
+                mapped.close()
+        if self._spool is not None:
+            os.remove(f"{self.path}.spool")
+        return len(offsets)
+
+
+class ChunkStore:
+    """chunk_id → 본문 조회 (인덱스 버전이 바뀌면 바뀐 파일만 다시 엶)"""
+
+    def __init__(self, index_name: Optional[str] = None):
+        self.index_name = index_name
+        self._version: Optional[str] = None
+        # 파일 경로 → ((mtime, 크기), memory-map, 본문 시작 위치, 헤더)
+        self._files: Dict[str, Tuple[Tuple[int, int], mmap.mmap, int, Dict[str, Any]]] = {}
+        # chunk_id → (memory-map, 시작, 끝, parent_id, title)
+        self._entries: Dict[str, Tuple[mmap.mmap, int, int, str, str]] = {}
+        self._lock = threading.Lock()
+
+    def _snapshot(self) -> Dict[str, Tuple[mmap.mmap, int, int, str, str]]:
+        version = get_index_version(self.index_name)
+        if version != self._version:
+            with self._lock:
+                if version != self._version:
+                    self._reload()
+                    self._version = version
+        return self._entries
+
+    def _reload(self) -> None:
+        files: Dict[str, Tuple[Tuple[int, int], mmap.mmap, int, Dict[str, Any]]] = {}
+        entries: Dict[str, Tuple[mmap.mmap, int, int, str, str]] = {}
+        for path in sorted(glob.glob(os.path.join(chunk_store_dir(self.index_name), "*" + _SUFFIX))):
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            signature = (stat.st_mtime_ns, stat.st_size)
+            previous = self._files.get(path)
+            if previous is not None and previous[0] == signature:
+                _, mapped, base, header = previous
+            else:
+                header, opened, base = _open_shard(path)
+                if opened is None:
+                    continue
+                mapped = opened
+            files[path] = (signature, mapped, base, header)
+            parent_id, title = header.get("parent_id", ""), header.get("title", "")
+            for chunk_id, (start, end) in header.get("offsets", {}).items():
+                entries[chunk_id] = (mapped, base + start, base + end, parent_id, title)
+        # 교체된 파일의 memory-map은 닫지 않음 (다른 스레드가 디코딩 중일 수 있음, 참조가 사라지면 해제)
+        self._files = files
+        self._entries = entries
+        logger.info("청크 저장소 열기: 파일 %d개, 청크 %d건", len(files), len(entries))
+
+    def __len__(self) -> int:
+        return len(self._snapshot())
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._snapshot()
+
+    def text(self, chunk_id: str) -> Optional[str]:
+        """청크 본문 (memory-map에서 바로 디코딩, 없으면 None)"""
+        entry = self._snapshot().get(chunk_id)
+        if entry is None:
+            return None
+        mapped, start, end, _, _ = entry
+        return str(memoryview(mapped)[start:end], "utf-8")
+
+    def hydrate(self, docs: List[Dict[str, Any]]) -> List[str]:
+        """
+        검색 결과 문서에 chunk/parent_id/title을 채움 (제자리 수정)
+        :return: 저장소에 없어 채우지 못한 chunk_id 목록
+        """
+        entries = self._snapshot()
+        missing: List[str] = []
+        for doc in docs:
+            entry = entries.get(doc["chunk_id"])
+            if entry is None:
+                missing.append(doc["chunk_id"])
+                continue
+            mapped, start, end, parent_id, title = entry
+            doc["chunk"] = str(memoryview(mapped)[start:end], "utf-8")
+            doc.setdefault("parent_id", parent_id)
+            doc.setdefault("title", title)
+        return missing
+
+
+_default_store: Optional[ChunkStore] = None
+_default_lock = threading.Lock()
+
+
+def get_chunk_store() -> ChunkStore:
+    global _default_store
+    with _default_lock:
+        if _default_store is None:
+            _default_store = ChunkStore()
+    return _default_store
@@ -0,0 +1,167 @@
+"""
+embedding_cache.py : SQLite 기반 영구 임베딩 캐시
+- 키: (임베딩 배포명, 차원 수, 정규화된 텍스트 해시)
+- 값: float32 바이트열 (파이썬 float 리스트 대비 약 1/4 크기)
+- 전체 크기가 한도를 넘으면 가장 오래 사용하지 않은 항목부터 지운다.
+- 인덱서(embed_texts)와 리트리버(_vectorize_query)가 같은 캐시 파일을 공유한다.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from array import array
+from typing import Dict, List, Optional, Sequence
+
+from app.config import AppConfig
+
+logger = logging.getLogger("entraaid_app")
+
+# 한도를 넘었을 때 이 비율까지 줄인다 (매 put마다 지우지 않도록 여유를 둠)
+_EVICT_TARGET_RATIO = 0.9
+
+_default_cache: Optional["EmbeddingCache"] = None
+_default_lock = threading.Lock()
+
+
+def normalize_text(text: str) -> str:
+    """캐시 키용 정규화: NFC + 공백 축약 + 양끝 공백 제거"""
+    return re.sub(r"\s+", " ", unicodedata.normalize("NFC", text or "")).strip()
+
+
+def pack_vector(vector: Sequence[float]) -> bytes:
+    return array("f", vector).tobytes()
+
+
+def unpack_vector(blob: bytes) -> List[float]:
+    values = array("f")
+    values.frombytes(blob)
+    return values.tolist()
+
+
+class EmbeddingCache:
+    """프로세스 간 공유 가능한 SQLite(WAL) 임베딩 캐시"""
+
+    def __init__(
+        self,
+        path: Optional[str] = None,
+        max_bytes: int = AppConfig.EMBED_CACHE_MAX_MB * 1024 * 1024,
+        deployment: str = AppConfig.AOAI_EMBED_DEPLOYMENT,
+        dimensions: int = AppConfig.AOAI_EMBED_DIMENSIONS,
+    ):
+        self.path = path or os.path.join(AppConfig.CACHE_DIR, "embeddings.sqlite")
+        self.max_bytes = max_bytes
+        self.deployment = deployment
+        self.dimensions = dimensions
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS embeddings ("
+            " key BLOB PRIMARY KEY,"
+            " vector BLOB NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " last_access REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_embeddings_access ON embeddings(last_access)")
+        self._conn.commit()
+
+    def key(self, text: str) -> bytes:
+        raw = f"{self.deployment}\x1f{self.dimensions}\x1f{normalize_text(text)}"
+        return hashlib.sha256(raw.encode("utf-8")).digest()
+
+    def get_many(self, texts: Sequence[str]) -> List[Optional[List[float]]]:
+        """입력 순서대로 캐시된 벡터(없으면 None) 반환"""
+        keys = [self.key(text) for text in texts]
+        found: Dict[bytes, bytes] = {}
+        unique = list(dict.fromkeys(keys))
+        with self._lock:
+            # SQLite 변수 개수 제한을 피하기 위해 나눠서 조회
+            for start in range(0, len(unique), 500):
+                part = unique[start : start + 500]
+                marks = ",".join("?" * len(part))
+                rows = self._conn.execute(f"SELECT key, vector FROM embeddings WHERE key IN ({marks})", part)
+                found.update(rows.fetchall())
+                hit_keys = [k for k in part if k in found]
+                if hit_keys:
+                    now = time.time()
+                    self._conn.executemany(
+                        "UPDATE embeddings SET last_access=? WHERE key=?", [(now, k) for k in hit_keys]
+                    )
+            self._conn.commit()
+            results = [unpack_vector(found[k]) if k in found else None for k in keys]
+            hits = sum(1 for r in results if r is not None)
+            self.hits += hits
+            self.misses += len(results) - hits
+        return results
+
+    def get(self, text: str) -> Optional[List[float]]:
+        return self.get_many([text])[0]
+
+    def put_many(self, texts: Sequence[str], vectors: Sequence[Sequence[float]]) -> None:
+        now = time.time()
+        rows = []
+        for text, vector in zip(texts, vectors):
+            blob = pack_vector(vector)
+            rows.append((self.key(text), blob, len(blob), now))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO embeddings(key, vector, size, last_access) VALUES (?, ?, ?, ?)", rows
+            )
+            self._conn.commit()
+            self._evict()
+
+    def put(self, text: str, vector: Sequence[float]) -> None:
+        self.put_many([text], [vector])
+
+    def _evict(self) -> None:
+        if self.max_bytes <= 0:
+            return
+        total = self._conn.execute("SELECT COALESCE(SUM(size), 0) FROM embeddings").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        target = int(self.max_bytes * _EVICT_TARGET_RATIO)
+        removed = 0
+        victims = []
+        for key, size in self._conn.execute("SELECT key, size FROM embeddings ORDER BY last_access"):
+            if total - removed <= target:
+                break
+            victims.append((key,))
+            removed += size
+        self._conn.executemany("DELETE FROM embeddings WHERE key=?", victims)
+        self._conn.commit()
+        logger.info("임베딩 캐시 정리: %d건 삭제 (%.1fMB 확보)", len(victims), removed / 1024 / 1024)
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            entries, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM embeddings").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": entries,
+            "bytes": size,
+        }
+
+
+def get_embedding_cache() -> Optional[EmbeddingCache]:
+    """설정으로 켜져 있으면 공용 캐시, 꺼져 있으면 None"""
+    global _default_cache
+    if not AppConfig.EMBED_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = EmbeddingCache()
+    return _default_cache
@@ -0,0 +1,270 @@
+"""
+embeddings.py : 토큰 기반 Azure OpenAI 임베딩 배처
+- tiktoken으로 입력별 토큰 수를 세어 요청당 토큰/입력 개수 한도에 맞게 배치를 나눈다.
+- 여러 배치를 동시에 요청하고, 429/5xx 응답은 Retry-After 헤더 또는 지터가 섞인 지수 백오프로 재시도한다.
+- 분당 토큰 한도(TPM)를 설정하면 토큰 버킷으로 요청 속도를 맞춘다.
+- 결과 벡터는 항상 입력 순서대로 반환한다.
+- 영구 임베딩 캐시에 있는 입력은 API를 호출하지 않는다.
+"""
+
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, List, Optional, Sequence, cast
+
+import tiktoken
+from openai import APIConnectionError, APIStatusError, APITimeoutError, AzureOpenAI
+
+from app.config import AppConfig
+from app.core.embedding_cache import EmbeddingCache, get_embedding_cache
+
+logger = logging.getLogger("entraaid_app")
+
+# 임베딩 모델의 입력 하나당 최대 토큰 수
+_MAX_INPUT_TOKENS = 8191
+
+# 재시도 대상 HTTP 상태 코드
+_RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+_embedding_client: Optional[AzureOpenAI] = None
+_default_batcher: Optional["EmbeddingBatcher"] = None
+_encoding: Optional[tiktoken.Encoding] = None
+_lock = threading.Lock()
+
+
+def get_embedding_client() -> AzureOpenAI:
+    """재시도를 배처가 직접 처리하도록 SDK 재시도를 끈 클라이언트를 한 번만 생성"""
+    global _embedding_client
+    with _lock:
+        if _embedding_client is None:
+            _embedding_client = AzureOpenAI(
+                api_key=AppConfig.AOAI_API_KEY,
+                api_version=AppConfig.AOAI_API_VERSION,
+                azure_endpoint=cast(str, AppConfig.AOAI_ENDPOINT or "").rstrip("/"),
+                max_retries=0,
+            )
+            logger.info("AzureOpenAI 임베딩 클라이언트 생성 완료")
+    return _embedding_client
+
+
+def get_encoding() -> tiktoken.Encoding:
+    """임베딩 배포 모델에 맞는 tiktoken 인코딩 (알 수 없는 배포명은 cl100k_base)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(AppConfig.AOAI_EMBED_DEPLOYMENT)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+    return _encoding
+
+
+def _retry_after_seconds(exc: Exception) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    headers = response.headers
+    for name, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+class _TokenBucket:
+    """분당 토큰 한도를 지키기 위한 토큰 버킷 (tpm <= 0 이면 제한 없음)"""
+
+    def __init__(self, tpm: int):
+        self.capacity = float(tpm)
+        self.rate = tpm / 60.0
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount: int) -> None:
+        if self.capacity <= 0:
+            return
+        amount = min(float(amount), self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class EmbeddingBatcher:
+    """
+    토큰 수 기준으로 배치를 나누고 동시에 요청하는 임베딩 생성기
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        deployment: str = AppConfig.AOAI_EMBED_DEPLOYMENT,
+        max_batch_tokens: int = AppConfig.EMBED_MAX_BATCH_TOKENS,
+        max_batch_inputs: int = AppConfig.EMBED_MAX_BATCH_INPUTS,
+        concurrency: int = AppConfig.EMBED_CONCURRENCY,
+        max_retries: int = AppConfig.EMBED_MAX_RETRIES,
+        tpm_limit: int = AppConfig.EMBED_TPM_LIMIT,
+        base_backoff: float = 1.0,
+        max_backoff: float = 60.0,
+        dimensions: int = AppConfig.AOAI_EMBED_DIMENSIONS,
+        cache: Optional[EmbeddingCache] = None,
+    ):
+        self.client = client
+        self.deployment = deployment
+        self.dimensions = dimensions
+        self.cache = cache
+        self.max_batch_tokens = max(1, max_batch_tokens)
+        self.max_batch_inputs = max(1, max_batch_inputs)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._bucket = _TokenBucket(tpm_limit)
+        self._stats_lock = threading.Lock()
+        self.requests = 0
+        self.retries = 0
+        self.tokens = 0
+
+    def _prepare(self, texts: Sequence[str]) -> tuple[List[str], List[int]]:
+        """입력별 토큰 수를 세고, 한도를 넘는 입력은 잘라낸다 (빈 입력은 공백 한 칸)"""
+        encoding = get_encoding()
+        prepared: List[str] = []
+        counts: List[int] = []
+        for i, text in enumerate(texts):
+            text = text or " "
+            tokens = encoding.encode(text, disallowed_special=())
+            if len(tokens) > _MAX_INPUT_TOKENS:
+                logger.warning("%d번째 입력이 %d 토큰을 넘어 잘라냅니다 (%d 토큰)", i, _MAX_INPUT_TOKENS, len(tokens))
+                tokens = tokens[:_MAX_INPUT_TOKENS]
+                text = encoding.decode(tokens)
+            prepared.append(text)
+            counts.append(len(tokens))
+        return prepared, counts
+
+    def plan_batches(self, token_counts: Sequence[int]) -> List[List[int]]:
+        """토큰 수/입력 개수 한도 안에서 입력 인덱스를 순서대로 묶는다"""
+        batches: List[List[int]] = []
+        current: List[int] = []
+        current_tokens = 0
+        for i, count in enumerate(token_counts):
+            if current and (
+                current_tokens + count > self.max_batch_tokens or len(current) >= self.max_batch_inputs
+            ):
+                batches.append(current)
+                current, current_tokens = [], 0
+            current.append(i)
+            current_tokens += count
+        if current:
+            batches.append(current)
+        return batches
+
+    def _backoff(self, attempt: int, exc: Exception) -> float:
+        retry_after = _retry_after_seconds(exc)
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_backoff)
+        return min(self.max_backoff, self.base_backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def _request(self, inputs: List[str], tokens: int) -> List[List[float]]:
+        client = self.client or get_embedding_client()
+        attempt = 0
+        while True:
+            self._bucket.acquire(tokens)
+            try:
+                extra = {"dimensions": self.dimensions} if self.dimensions > 0 else {}
+                response = client.embeddings.create(model=self.deployment, input=inputs, **extra)
+                with self._stats_lock:
+                    self.requests += 1
+                    self.tokens += tokens
+                data = sorted(response.data, key=lambda d: d.index)
+                return [d.embedding for d in data]
+            except (APIStatusError, APIConnectionError, APITimeoutError) as exc:
+                status = getattr(exc, "status_code", None)
+                retryable = status is None or status in _RETRYABLE_STATUS
+                if not retryable or attempt >= self.max_retries:
+                    raise
+                delay = self._backoff(attempt, exc)
+                with self._stats_lock:
+                    self.retries += 1
+                logger.warning(
+                    "임베딩 요청 재시도 %d/%d (status=%s), %.1f초 대기",
+                    attempt + 1,
+                    self.max_retries,
+                    status,
+                    delay,
+                )
+                time.sleep(delay)
+                attempt += 1
+
+    def embed(self, texts: Sequence[str]) -> List[List[float]]:
+        """
+        입력 순서대로 임베딩 벡터 리스트를 반환
+        - 캐시가 있으면 캐시에 없는 입력만 API로 요청하고 결과를 캐시에 저장
+        """
+        if not texts:
+            return []
+        cached: List[Optional[List[float]]] = (
+            self.cache.get_many(texts) if self.cache is not None else [None] * len(texts)
+        )
+        missing = [i for i, vector in enumerate(cached) if vector is None]
+        if missing:
+            vectors = self._embed_uncached([texts[i] for i in missing])
+            for i, vector in zip(missing, vectors):
+                cached[i] = vector
+            if self.cache is not None:
+                self.cache.put_many([texts[i] for i in missing], vectors)
+        if self.cache is not None and len(missing) < len(texts):
+            logger.info("임베딩 캐시 적중: %d/%d건", len(texts) - len(missing), len(texts))
+        return cast(List[List[float]], cached)
+
+    def _embed_uncached(self, texts: Sequence[str]) -> List[List[float]]:
+        started = time.perf_counter()
+        prepared, counts = self._prepare(texts)
+        batches = self.plan_batches(counts)
+        results: List[Optional[List[float]]] = [None] * len(prepared)
+
+        def run(batch: List[int]) -> None:
+            vectors = self._request([prepared[i] for i in batch], sum(counts[i] for i in batch))
+            for i, vector in zip(batch, vectors):
+                results[i] = vector
+
+        if len(batches) == 1 or self.concurrency == 1:
+            for batch in batches:
+                run(batch)
+        else:
+            with ThreadPoolExecutor(max_workers=min(self.concurrency, len(batches))) as executor:
+                for future in [executor.submit(run, batch) for batch in batches]:
+                    future.result()
+
+        elapsed = time.perf_counter() - started
+        total_tokens = sum(counts)
+        logger.info(
+            "임베딩 배치 완료: 입력 %d개, 배치 %d개, 토큰 %d (%.0f TPM), %.2f초",
+            len(prepared),
+            len(batches),
+            total_tokens,
+            total_tokens / elapsed * 60 if elapsed else 0.0,
+            elapsed,
+        )
+        return cast(List[List[float]], results)
+
+
+def get_embedding_batcher() -> EmbeddingBatcher:
+    """설정값으로 만든 공용 배처"""
+    global _default_batcher
+    with _lock:
+        if _default_batcher is None:
+            _default_batcher = EmbeddingBatcher(cache=get_embedding_cache())
+    return _default_batcher
@@ -0,0 +1,68 @@
+"""
+index_version.py : 검색 인덱스 버전 토큰
+- 인덱서가 업로드/삭제에 성공할 때마다 토큰을 새로 발급해 로컬 파일(CACHE_DIR/index_versions/<인덱스>.txt)에 기록한다.
+- 리트리버/체인의 캐시는 키에 이 토큰을 포함해, 재인덱싱 후에는 이전 결과를 쓰지 않는다.
+- 파일(inode, mtime)이 바뀌었을 때만 다시 읽으므로 조회 비용은 stat 한 번이다.
+- 토큰은 로컬 파일로만 전달되므로, 인덱서와 앱이 같은 CACHE_DIR(같은 호스트 또는 공유 볼륨)을 볼 때만
+  재인덱싱 시 캐시가 무효화된다. 다른 곳에서 인덱싱하면 결과 캐시는 SEARCH_CACHE_TTL이 지나야 갱신된다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from typing import Dict, Optional, Tuple
+
+from app.config import AppConfig
+
+logger = logging.getLogger("entraaid_app")
+
+# 인덱스별 ((inode, mtime_ns), 토큰) - 교체(os.replace)마다 inode가 바뀌므로 같은 시각에 갱신돼도 구분됨
+_cached: Dict[str, Tuple[Tuple[int, int], str]] = {}
+_lock = threading.Lock()
+
+
+def _version_path(index_name: str) -> str:
+    safe = re.sub(r"[^\w.-]", "_", index_name)
+    return os.path.join(AppConfig.CACHE_DIR, "index_versions", f"{safe}.txt")
+
+
+def get_index_version(index_name: Optional[str] = None) -> str:
+    """현재 인덱스 버전 토큰 (한 번도 발급되지 않았으면 "0")"""
+    index_name = index_name or AppConfig.AIS_INDEX
+    path = _version_path(index_name)
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return "0"
+    with _lock:
+        cached = _cached.get(index_name)
+        signature = (stat.st_ino, stat.st_mtime_ns)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+        try:
+            with open(path, encoding="utf-8") as f:
+                token = f.read().strip() or "0"
+        except OSError as exc:
+            logger.warning("인덱스 버전 파일을 읽을 수 없습니다: %s (%s)", path, exc)
+            return "0"
+        _cached[index_name] = (signature, token)
+        return token
+
+
+def bump_index_version(index_name: Optional[str] = None) -> str:
+    """새 버전 토큰을 발급해 기록하고 반환"""
+    index_name = index_name or AppConfig.AIS_INDEX
+    path = _version_path(index_name)
+    token = f"{time.strftime('%Y%m%d%H%M%S')}-{uuid.uuid4().hex[:8]}"
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        f.write(token)
+    os.replace(tmp_path, path)
+    logger.info("인덱스 버전 갱신: %s → %s", index_name, token)
+    return token
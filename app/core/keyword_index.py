@@ -0,0 +1,192 @@
+"""
+keyword_index.py : 프로세스 내 BM25 키워드 인덱스 + RRF 결합
+- 청크 텍스트를 한국어 친화적으로 토큰화(영숫자/한글 경계 분리 + 한글 글자 bigram)해 역색인을 만든다.
+  조사/어미가 붙은 어절("신청은", "신청서를")도 bigram이 겹쳐 검색된다.
+- 문서 추가/삭제를 즉시 반영하므로 재인덱싱 후 바뀐 청크만 다시 색인하면 된다.
+- 벡터 검색 순위와 키워드 검색 순위는 Reciprocal Rank Fusion으로 합친다. (Azure 하이브리드 검색과 같은 방식)
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+import re
+import threading
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+# 한글 음절 덩어리 / 영숫자 덩어리 - 리트리버의 _insert_space_between_alnum_hangul과 같은 경계에서 나뉨
+_TOKEN_PATTERN = re.compile(r"[가-힣]+|[a-z0-9]+")
+_CAMEL_PATTERN = re.compile(r"([a-z])([A-Z])")
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    BM25용 토큰 목록
+    - camelCase 분리 → 소문자화 → 한글/영숫자 덩어리 분리
+    - 영숫자 덩어리는 그대로, 두 글자 이상 한글 덩어리는 글자 bigram으로 나눔
+    """
+    if not text:
+        return []
+    tokens: List[str] = []
+    for match in _TOKEN_PATTERN.finditer(_CAMEL_PATTERN.sub(r"\1 \2", text).lower()):
+        token = match.group()
+        if "가" <= token[0] <= "힣" and len(token) > 1:
+            tokens.extend(token[i : i + 2] for i in range(len(token) - 1))
+        else:
+            tokens.append(token)
+    return tokens
+
+
+class BM25Index:
+    """
+    스레드 안전한 증분 BM25 역색인
+    - 문서는 문자열 id로 추가/삭제하고, 내부적으로는 재사용되는 정수 슬롯에 저장한다.
+    - 토큰별 (슬롯 배열, BM25 기여도 배열)을 처음 조회할 때 계산해 두고, 문서가 바뀌면 버린다.
+      조회는 토큰마다 NumPy 덧셈 한 번이므로 읽기 위주 부하에서 빠르다.
+    """
+
+    def __init__(self, k1: float = 1.2, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._postings: Dict[str, Dict[int, int]] = {}  # 토큰 → {슬롯: 출현 횟수}
+        self._slots: Dict[str, int] = {}  # 문서 id → 슬롯
+        self._ids: List[Optional[str]] = []
+        self._terms: List[Optional[Dict[str, int]]] = []  # 슬롯별 토큰 빈도 (삭제용)
+        self._lengths: List[int] = []
+        self._fingerprints: Dict[str, str] = {}  # 문서 id → 텍스트 해시 (sync에서 변경 감지)
+        self._free: List[int] = []
+        self._total_length = 0
+        self._term_cache: Dict[str, Tuple[np.ndarray, np.ndarray]] = {}
+        self._length_array: Optional[np.ndarray] = None
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        return len(self._slots)
+
+    def __contains__(self, doc_id: object) -> bool:
+        return doc_id in self._slots
+
+    def add(self, doc_id: str, text: str) -> None:
+        """문서 추가 (이미 있으면 교체)"""
+        terms = Counter(tokenize(text))
+        with self._lock:
+            self.remove(doc_id)
+            slot = self._free.pop() if self._free else len(self._ids)
+            if slot == len(self._ids):
+                self._ids.append(None)
+                self._terms.append(None)
+                self._lengths.append(0)
+            self._ids[slot] = doc_id
+            self._terms[slot] = dict(terms)
+            self._lengths[slot] = sum(terms.values())
+            self._slots[doc_id] = slot
+            self._fingerprints[doc_id] = hashlib.sha1(text.encode("utf-8")).hexdigest()
+            self._invalidate()
+            self._total_length += self._lengths[slot]
+            for term, count in terms.items():
+                self._postings.setdefault(term, {})[slot] = count
+
+    def remove(self, doc_id: str) -> bool:
+        """문서 삭제 (없으면 False)"""
+        with self._lock:
+            slot = self._slots.pop(doc_id, None)
+            if slot is None:
+                return False
+            for term in self._terms[slot] or {}:
+                postings = self._postings[term]
+                del postings[slot]
+                if not postings:
+                    del self._postings[term]
+            self._total_length -= self._lengths[slot]
+            self._ids[slot] = None
+            self._terms[slot] = None
+            self._lengths[slot] = 0
+            self._fingerprints.pop(doc_id, None)
+            self._free.append(slot)
+            self._invalidate()
+            return True
+
+    def _invalidate(self) -> None:
+        # 문서 수/평균 길이가 바뀌면 모든 토큰의 idf와 길이 정규화가 바뀜
+        if self._term_cache:
+            self._term_cache = {}
+        self._length_array = None
+
+    def _term_scores(self, term: str, count: int, avg_length: float) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """토큰 하나의 (슬롯 배열, BM25 기여도 배열) - 락 안에서 호출"""
+        cached = self._term_cache.get(term)
+        if cached is not None:
+            return cached
+        postings = self._postings.get(term)
+        if not postings:
+            return None
+        if self._length_array is None:
+            self._length_array = np.asarray(self._lengths, dtype=np.float32)
+        slots = np.fromiter(postings.keys(), dtype=np.int64, count=len(postings))
+        tf = np.fromiter(postings.values(), dtype=np.float32, count=len(postings))
+        idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+        norm = self.k1 * (1 - self.b + self.b * self._length_array[slots] / avg_length)
+        contribution = (idf * (self.k1 + 1) * tf / (tf + norm)).astype(np.float32)
+        self._term_cache[term] = (slots, contribution)
+        return slots, contribution
+
+    def sync(self, docs: Iterable[Tuple[str, str]]) -> Tuple[int, int]:
+        """
+        (문서 id, 텍스트) 목록과 같아지도록 바뀐 문서만 추가/삭제
+        :return: (추가/교체 수, 삭제 수)
+        """
+        with self._lock:
+            seen = set()
+            added = 0
+            for doc_id, text in docs:
+                seen.add(doc_id)
+                if self._fingerprints.get(doc_id) != hashlib.sha1(text.encode("utf-8")).hexdigest():
+                    self.add(doc_id, text)
+                    added += 1
+            stale = [doc_id for doc_id in self._slots if doc_id not in seen]
+            for doc_id in stale:
+                self.remove(doc_id)
+            return added, len(stale)
+
+    def search(self, query: str, top_k: int) -> List[Tuple[str, float]]:
+        """(문서 id, BM25 점수) 상위 top_k개 (점수 내림차순)"""
+        query_terms = Counter(tokenize(query))
+        if not query_terms or top_k <= 0:
+            return []
+        with self._lock:
+            count = len(self._slots)
+            if not count:
+                return []
+            avg_length = self._total_length / count or 1.0
+            scores = np.zeros(len(self._ids), dtype=np.float32)
+            for term, query_count in query_terms.items():
+                entry = self._term_scores(term, count, avg_length)
+                if entry is not None:
+                    scores[entry[0]] += query_count * entry[1]  # 토큰 안에서 슬롯은 중복되지 않음
+
+            matched = np.flatnonzero(scores)
+            if len(matched) > top_k:
+                matched = matched[np.argpartition(-scores[matched], top_k - 1)[:top_k]]
+            order = matched[np.argsort(-scores[matched], kind="stable")]
+            return [(self._ids[slot], float(scores[slot])) for slot in order]  # type: ignore[misc]
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Sequence[str]],
+    k: int = 60,
+    weights: Optional[Sequence[float]] = None,
+) -> List[Tuple[str, float]]:
+    """
+    여러 순위 목록을 RRF로 합침: score(d) = Σ weight / (k + rank)
+    :param rankings: 순위순 문서 id 목록들
+    :return: (문서 id, RRF 점수) 점수 내림차순, 동점이면 먼저 나온 목록의 순서 유지
+    """
+    scores: Dict[str, float] = {}
+    for i, ranking in enumerate(rankings):
+        weight = weights[i] if weights is not None else 1.0
+        for rank, doc_id in enumerate(ranking, start=1):
+            scores[doc_id] = scores.get(doc_id, 0.0) + weight / (k + rank)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
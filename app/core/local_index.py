@@ -0,0 +1,393 @@
+"""
+local_index.py : 프로세스 내 로컬 벡터 검색 인덱스
+- 인덱서가 Azure AI Search에 올리는 청크(텍스트 + 벡터)를 문서별 샤드(CACHE_DIR/local_index/<인덱스>/shards)로 함께 기록한다.
+- 리트리버는 샤드를 하나의 행렬(float16/float32, 행 단위 정규화)로 합친 뒤 memory-map으로 열어
+  NumPy 내적으로 top-k를 계산한다. (네트워크 왕복 없이 코사인 유사도 검색)
+- 합친 행렬은 인덱스 버전 토큰별 디렉터리에 만든다. 버전이 바뀐 것을 보면 백그라운드 스레드에서 다시 만들어 열고,
+  그동안 검색은 이전 스냅샷으로 응답한다. (재인덱싱 직후 첫 검색이 합치기/BM25 갱신을 기다리지 않음)
+- 로컬 검색 백엔드(RETRIEVER_BACKEND=local)에서는 같은 청크로 BM25 키워드 인덱스도 유지해(바뀐 청크만 갱신)
+  벡터 순위와 RRF로 합친 하이브리드 검색을 제공한다. (Azure 백엔드는 MMR 후보 벡터 조회에만 쓰므로 BM25 없음)
+"""
+
+from __future__ import annotations
+
+import glob
+import json
+import logging
+import os
+import re
+import shutil
+import threading
+import time
+from typing import IO, Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+import numpy as np
+
+from app.config import AppConfig
+from app.core.index_version import get_index_version
+from app.core.keyword_index import BM25Index, reciprocal_rank_fusion
+
+logger = logging.getLogger("entraaid_app")
+
+# 로컬 인덱스에 함께 저장하는 문서 필드 (벡터 제외)
+DOC_FIELDS = ("chunk_id", "parent_id", "chunk", "title")
+
+# 점수 계산 시 한 번에 float32로 올리는 행 수 (float16 행렬 전체를 복사하지 않도록)
+_BLOCK_ROWS = 65536
+
+
+def _safe(name: str) -> str:
+    return re.sub(r"[^\w.-]", "_", name)
+
+
+def local_index_dir(index_name: Optional[str] = None) -> str:
+    return os.path.join(AppConfig.CACHE_DIR, "local_index", _safe(index_name or AppConfig.AIS_INDEX))
+
+
+def _read_shard(base: str, mmap_mode: Optional[str] = None) -> Tuple[List[Dict[str, Any]], Optional[np.ndarray]]:
+    try:
+        with open(f"{base}.json", encoding="utf-8") as f:
+            docs = json.load(f)
+        vectors = np.load(f"{base}.npy", mmap_mode=mmap_mode)
+    except FileNotFoundError:
+        return [], None
+    except (OSError, ValueError) as exc:
+        logger.warning("로컬 인덱스 샤드를 읽을 수 없습니다: %s (%s)", base, exc)
+        return [], None
+    if len(docs) != len(vectors):
+        logger.warning("로컬 인덱스 샤드 문서/벡터 수 불일치로 무시: %s", base)
+        return [], None
+    return docs, vectors
+
+
+class LocalShardWriter:
+    """
+    문서(parent_id) 하나의 로컬 인덱스 샤드 기록기
+    - add로 받은 청크는 임시 파일(벡터: float32 행, 문서: JSON 줄)에 바로 기록하고, 메모리에는 chunk_id → 행 번호만 둔다.
+      (문서가 커져도 인덱싱 메모리는 파이프라인 큐 크기 × 배치 크기로 유지)
+    - incremental=True: 이전 샤드에서 keep에 남아 있고 이번에 다시 올리지 않은 청크는 그대로 유지 (delta 인덱싱)
+    """
+
+    def __init__(self, parent_id: str, index_name: Optional[str] = None, incremental: bool = False):
+        self.base = os.path.join(local_index_dir(index_name), "shards", _safe(parent_id))
+        self.incremental = incremental
+        self._rows: Dict[str, int] = {}
+        self._count = 0
+        self._dims = 0
+        self._vector_file: Optional[IO[bytes]] = None
+        self._doc_file: Optional[IO[str]] = None
+
+    def add(self, docs: Iterable[Dict[str, Any]]) -> None:
+        for doc in docs:
+            vector = np.asarray(doc["text_vector"], dtype=np.float32)
+            if self._vector_file is None:
+                os.makedirs(os.path.dirname(self.base), exist_ok=True)
+                self._vector_file = open(f"{self.base}.vectors.spool", "wb")
+                self._doc_file = open(f"{self.base}.docs.spool", "w", encoding="utf-8")
+                self._dims = len(vector)
+            if len(vector) != self._dims:
+                raise ValueError(f"벡터 차원이 다릅니다: {doc['chunk_id']} ({len(vector)} != {self._dims})")
+            self._vector_file.write(vector.tobytes())
+            self._doc_file.write(json.dumps({field: doc.get(field) for field in DOC_FIELDS}, ensure_ascii=False) + "\n")
+            self._rows[doc["chunk_id"]] = self._count
+            self._count += 1
+
+    def _spooled_vectors(self) -> Optional[np.ndarray]:
+        """임시 파일을 닫고 기록한 벡터를 memory-map 행렬로 (기록한 청크가 없으면 None)"""
+        if self._vector_file is None or self._doc_file is None:
+            return None
+        self._vector_file.close()
+        self._doc_file.close()
+        return np.memmap(f"{self.base}.vectors.spool", dtype=np.float32, mode="r", shape=(self._count, self._dims))
+
+    def _spooled_docs(self) -> Iterable[Tuple[int, Dict[str, Any]]]:
+        if self._doc_file is None:
+            return
+        with open(f"{self.base}.docs.spool", encoding="utf-8") as f:
+            for row, line in enumerate(f):
+                yield row, json.loads(line)
+
+    def commit(self, keep: Set[str]) -> int:
+        """keep(현재 매니페스트의 chunk_id)에 있는 청크만 남겨 샤드를 원자적으로 교체하고 행 수를 반환"""
+        spooled = self._spooled_vectors()
+        previous_docs: List[Dict[str, Any]] = []
+        previous_vectors: Optional[np.ndarray] = None
+        if self.incremental:
+            previous_docs, previous_vectors = _read_shard(self.base, mmap_mode="r")
+            if previous_vectors is not None and self._dims and previous_vectors.shape[1] != self._dims:
+                logger.warning("이전 샤드와 벡터 차원이 달라 기존 청크를 버립니다: %s", self.base)
+                previous_docs, previous_vectors = [], None
+        carried = [
+            i for i, doc in enumerate(previous_docs) if doc["chunk_id"] in keep and doc["chunk_id"] not in self._rows
+        ]
+        # 같은 chunk_id를 여러 번 받았으면 마지막 행만 사용
+        fresh = {row for chunk_id, row in self._rows.items() if chunk_id in keep}
+        if self.incremental:
+            missing = len(keep) - len(carried) - len(fresh)
+            if missing > 0:
+                logger.warning("로컬 인덱스에 없는 기존 청크 %d개: 전체 재인덱싱(delta 없이)으로 채울 수 있습니다.", missing)
+
+        total = len(carried) + len(fresh)
+        dims = self._dims or (previous_vectors.shape[1] if previous_vectors is not None else 0)
+        os.makedirs(os.path.dirname(self.base), exist_ok=True)
+        if total and dims:
+            matrix = np.lib.format.open_memmap(f"{self.base}.npy.tmp", mode="w+", dtype=np.float32, shape=(total, dims))
+        else:
+            matrix = None
+            with open(f"{self.base}.npy.tmp", "wb") as f:
+                np.save(f, np.zeros((0, dims), dtype=np.float32))
+        position = 0
+        with open(f"{self.base}.json.tmp", "w", encoding="utf-8") as f:
+            f.write("[")
+            for i in carried:
+                f.write(("," if position else "") + json.dumps(previous_docs[i], ensure_ascii=False))
+                matrix[position] = previous_vectors[i]  # type: ignore[index]
+                position += 1
+            for row, doc in self._spooled_docs():
+                if row in fresh:
+                    f.write(("," if position else "") + json.dumps(doc, ensure_ascii=False))
+                    matrix[position] = spooled[row]  # type: ignore[index]
+                    position += 1
+            f.write("]")
+        if matrix is not None:
+            matrix.flush()
+            del matrix
+        os.replace(f"{self.base}.npy.tmp", f"{self.base}.npy")
+        os.replace(f"{self.base}.json.tmp", f"{self.base}.json")
+        for suffix in (".vectors.spool", ".docs.spool"):
+            try:
+                os.remove(self.base + suffix)
+            except FileNotFoundError:
+                pass
+        return total
+
+
+def _compact_dir(index_name: Optional[str], version: str) -> str:
+    return os.path.join(local_index_dir(index_name), "compact", _safe(version))
+
+
+def build_local_index(index_name: Optional[str] = None, version: Optional[str] = None, dtype: str = "float32") -> str:
+    """
+    샤드를 합쳐 버전별 검색용 행렬(vectors.npy)과 문서 목록(docs.json)을 만든다
+    :return: 만든 디렉터리 경로
+    """
+    root = local_index_dir(index_name)
+    version = version or get_index_version(index_name)
+    target = _compact_dir(index_name, version)
+    if os.path.isdir(target):
+        return target
+
+    started = time.perf_counter()
+    docs: List[Dict[str, Any]] = []
+    blocks: List[np.ndarray] = []
+    dims = 0
+    for json_path in sorted(glob.glob(os.path.join(root, "shards", "*.json"))):
+        shard_docs, shard_vectors = _read_shard(json_path[: -len(".json")])
+        if shard_vectors is None or not len(shard_docs):
+            continue
+        dims = dims or shard_vectors.shape[1]
+        if shard_vectors.shape[1] != dims:
+            logger.warning("벡터 차원이 다른 샤드는 제외: %s (%d != %d)", json_path, shard_vectors.shape[1], dims)
+            continue
+        docs.extend(shard_docs)
+        blocks.append(shard_vectors)
+
+    matrix = np.vstack(blocks).astype(np.float32) if blocks else np.zeros((0, dims), dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    matrix = (matrix / np.where(norms == 0, 1, norms)).astype(dtype)
+
+    # 임시 디렉터리에 만든 뒤 이름을 바꿔, 다른 프로세스가 덜 만든 파일을 열지 않도록 함
+    tmp = f"{target}.tmp-{os.getpid()}-{threading.get_ident()}"
+    os.makedirs(tmp, exist_ok=True)
+    np.save(os.path.join(tmp, "vectors.npy"), matrix)
+    with open(os.path.join(tmp, "docs.json"), "w", encoding="utf-8") as f:
+        json.dump(docs, f, ensure_ascii=False)
+    try:
+        os.rename(tmp, target)
+    except OSError:
+        shutil.rmtree(tmp, ignore_errors=True)  # 다른 프로세스가 먼저 만듦
+
+    # 이전 버전 정리 (이미 열린 memory-map은 파일이 지워져도 계속 유효)
+    for old in glob.glob(os.path.join(root, "compact", "*")):
+        if old != target and ".tmp-" not in old:
+            shutil.rmtree(old, ignore_errors=True)
+    logger.info(
+        "로컬 인덱스 생성: %d건, 차원 %d, %s, %.2f초", len(docs), dims, dtype, time.perf_counter() - started
+    )
+    return target
+
+
+class LocalVectorIndex:
+    """memory-map 행렬 + NumPy 내적 top-k 검색 + BM25 하이브리드 (인덱스 버전이 바뀌면 자동으로 다시 엶)"""
+
+    def __init__(self, index_name: Optional[str] = None, dtype: str = AppConfig.LOCAL_VECTOR_DTYPE):
+        self.index_name = index_name
+        self.dtype = dtype
+        self._version: Optional[str] = None
+        # (행렬, 문서 목록, chunk_id → 문서, chunk_id → 행 번호) - 다시 열 때 한 번에 교체
+        self._state: Tuple[Optional[np.ndarray], List[Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, int]] = (
+            None,
+            [],
+            {},
+            {},
+        )
+        self._refreshing: Optional[str] = None
+        self._lock = threading.Lock()
+        self.keywords = BM25Index()
+
+    def _load(self, version: str) -> None:
+        path = build_local_index(self.index_name, version, self.dtype)
+        matrix = np.load(os.path.join(path, "vectors.npy"), mmap_mode="r")
+        with open(os.path.join(path, "docs.json"), encoding="utf-8") as f:
+            docs = json.load(f)
+        if AppConfig.LOCAL_HYBRID_SEARCH and AppConfig.RETRIEVER_BACKEND == "local":
+            started = time.perf_counter()
+            added, removed = self.keywords.sync((doc["chunk_id"], doc.get("chunk") or "") for doc in docs)
+            logger.info(
+                "로컬 키워드 인덱스 갱신: 추가/교체 %d건, 삭제 %d건, %.2f초",
+                added,
+                removed,
+                time.perf_counter() - started,
+            )
+        self._state = (
+            matrix,
+            docs,
+            {doc["chunk_id"]: doc for doc in docs},
+            {doc["chunk_id"]: row for row, doc in enumerate(docs)},
+        )
+        self._version = version
+
+    def _refresh(self, version: str) -> None:
+        try:
+            with self._lock:
+                if version != self._version:
+                    self._load(version)
+        except Exception as exc:  # noqa: BLE001
+            logger.warning("로컬 인덱스를 다시 열지 못해 이전 스냅샷을 계속 사용: %s", exc)
+        finally:
+            self._refreshing = None
+
+    def _current(
+        self,
+    ) -> Tuple[Optional[np.ndarray], List[Dict[str, Any]], Dict[str, Dict[str, Any]], Dict[str, int]]:
+        """
+        현재 스냅샷 (한 검색 안에서는 같은 행렬/문서/행 번호 묶음을 사용)
+        - 버전이 바뀌면 백그라운드에서 다시 열고 그동안은 이전 스냅샷으로 응답
+        - 처음 열 때는 로컬 검색 백엔드이거나 합친 행렬이 이미 있으면 호출한 스레드에서 바로 엶
+          (Azure 백엔드에서 합치기가 필요하면 백그라운드로 만들고, 그동안은 빈 스냅샷 → MMR 후보 벡터를 Azure에서 조회)
+        """
+        version = get_index_version(self.index_name)
+        if version == self._version:
+            return self._state
+        if self._version is None and (
+            AppConfig.RETRIEVER_BACKEND == "local" or os.path.isdir(_compact_dir(self.index_name, version))
+        ):
+            with self._lock:
+                if self._version is None:
+                    self._load(version)
+            return self._state
+        with self._lock:
+            if self._refreshing is None:
+                self._refreshing = version
+                threading.Thread(target=self._refresh, args=(version,), name="local-index-refresh", daemon=True).start()
+        return self._state
+
+    def _snapshot(self) -> Tuple[Optional[np.ndarray], List[Dict[str, Any]]]:
+        """현재 스냅샷의 (행렬, 문서 목록)"""
+        matrix, docs, _, _ = self._current()
+        return matrix, docs
+
+    def __len__(self) -> int:
+        return len(self._snapshot()[1])
+
+    def __contains__(self, chunk_id: object) -> bool:
+        return chunk_id in self._current()[3]
+
+    @property
+    def docs(self) -> List[Dict[str, Any]]:
+        return self._snapshot()[1]
+
+    @staticmethod
+    def _score(matrix: Optional[np.ndarray], vector: List[float]) -> np.ndarray:
+        if matrix is None or not len(matrix):
+            return np.zeros(0, dtype=np.float32)
+        query = np.asarray(vector, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1.0)
+        if matrix.shape[1] != query.shape[0]:
+            raise ValueError(f"질의 벡터 차원({query.shape[0]})이 로컬 인덱스 차원({matrix.shape[1]})과 다릅니다.")
+        if matrix.dtype == np.float32:
+            return np.asarray(matrix @ query)
+        out = np.empty(len(matrix), dtype=np.float32)
+        for start in range(0, len(matrix), _BLOCK_ROWS):
+            out[start : start + _BLOCK_ROWS] = matrix[start : start + _BLOCK_ROWS].astype(np.float32) @ query
+        return out
+
+    def scores(self, vector: List[float]) -> np.ndarray:
+        """모든 청크와의 코사인 유사도 (float32, docs 순서)"""
+        return self._score(self._snapshot()[0], vector)
+
+    def vectors(self, chunk_ids: Sequence[str]) -> np.ndarray:
+        """chunk_id 순서대로 정규화된 벡터 행렬 (float32, 없는 청크는 0벡터)"""
+        matrix, _, _, rows = self._current()
+        dims = matrix.shape[1] if matrix is not None and matrix.ndim == 2 else 0
+        out = np.zeros((len(chunk_ids), dims), dtype=np.float32)
+        for i, chunk_id in enumerate(chunk_ids):
+            row = rows.get(chunk_id)
+            if row is not None and matrix is not None and row < len(matrix):
+                out[i] = matrix[row]
+        return out
+
+    def search(self, vector: List[float], top_k: int) -> List[Tuple[Dict[str, Any], float]]:
+        """(문서, 코사인 유사도) 상위 top_k개 (유사도 내림차순)"""
+        matrix, docs = self._snapshot()
+        scores = self._score(matrix, vector)
+        if not len(scores) or top_k <= 0:
+            return []
+        if top_k < len(scores):
+            candidates = np.argpartition(-scores, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(scores))
+        order = candidates[np.argsort(-scores[candidates], kind="stable")]
+        return [(docs[i], float(scores[i])) for i in order]
+
+    def hybrid_search(
+        self,
+        vector: List[float],
+        search_text: str,
+        top_k: int,
+        candidates: int = 50,
+        rrf_k: int = 60,
+    ) -> List[Tuple[Dict[str, Any], float]]:
+        """
+        벡터 상위 candidates개와 BM25 상위 candidates개를 RRF로 합쳐 상위 top_k개를 반환
+        :param search_text: 키워드 검색어 (정규화 + 동의어 확장된 search_text)
+        :return: (문서, RRF 점수) 점수 내림차순
+        """
+        by_id = self._current()[2]
+        vector_hits = self.search(vector, max(top_k, candidates))
+        keyword_hits = self.keywords.search(search_text, max(top_k, candidates))
+        fused = reciprocal_rank_fusion(
+            [[doc["chunk_id"] for doc, _ in vector_hits], [doc_id for doc_id, _ in keyword_hits]],
+            k=rrf_k,
+        )
+        results = []
+        for doc_id, score in fused:
+            doc = by_id.get(doc_id)
+            if doc is None:  # 다른 스레드가 다시 연 직후 - 키워드 인덱스에만 있는 문서
+                continue
+            results.append((doc, score))
+            if len(results) == top_k:
+                break
+        return results
+
+
+_default_index: Optional[LocalVectorIndex] = None
+_default_lock = threading.Lock()
+
+
+def get_local_index() -> LocalVectorIndex:
+    global _default_index
+    with _default_lock:
+        if _default_index is None:
+            _default_index = LocalVectorIndex()
+    return _default_index
@@ -0,0 +1,243 @@
+"""
+bulk.py : 디렉터리/글롭 단위 대량 PDF 인덱싱 CLI
+- 여러 PDF를 프로세스 풀에서 동시에 index_pdf로 처리한다.
+- 파일별 완료 상태를 체크포인트(JSON)에 기록해, 중단되거나 실패한 뒤 다시 실행하면 남은 파일부터 이어서 처리한다.
+- 진행 중 files/sec, pages/sec, chunks/sec를 주기적으로 출력한다.
+
+사용 예:
+    python -m app.ingest.bulk docs/ "manuals/**/*.pdf" --processes 4 --delta
+"""
+
+import glob
+import json
+import logging
+import os
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from app.config import AppConfig
+from app.ingest.indexer import document_id, index_pdf, prebuild_local_index
+from app.ingest.manifest import file_sha256
+
+logger = logging.getLogger("entraaid_app")
+
+
+def _glob_root(pattern: str) -> str:
+    """글롭 패턴에서 와일드카드가 처음 나오기 전까지의 디렉터리 (상대 경로 기준점)"""
+    parts: List[str] = []
+    for part in os.path.normpath(pattern).split(os.sep)[:-1]:
+        if glob.has_magic(part):
+            break
+        parts.append(part)
+    return os.sep.join(parts) or os.curdir
+
+
+def expand_documents(inputs: Iterable[str]) -> List[Tuple[str, str]]:
+    """
+    디렉터리(하위 포함), 글롭 패턴, 파일 경로를 (PDF 절대 경로, 문서 id) 목록으로 펼친다 (중복 제거, 정렬)
+    - 문서 id는 입력 루트(디렉터리, 글롭의 고정 부분) 기준 상대 경로로 만들어 폴더가 다른 같은 이름 파일을 구분
+    - 확장자 대소문자는 가리지 않음 (.pdf, .PDF, .Pdf ...)
+    :raises ValueError: 서로 다른 파일이 같은 문서 id가 되는 경우 (서로의 청크를 지우게 되므로 시작 전에 거부)
+    """
+    found: Dict[str, str] = {}
+    for item in inputs:
+        if os.path.isdir(item):
+            root = item
+            matches = glob.glob(os.path.join(item, "**", "*"), recursive=True)
+        elif glob.has_magic(item):
+            root = _glob_root(item)
+            matches = glob.glob(item, recursive=True)
+        else:
+            root = os.path.dirname(item) or os.curdir
+            matches = [item]
+        for path in sorted(matches):
+            if os.path.isfile(path) and path.lower().endswith(".pdf"):
+                found.setdefault(os.path.abspath(path), document_id(os.path.relpath(path, root)))
+            elif not os.path.isdir(item):  # 디렉터리를 훑을 때 만나는 PDF 아닌 파일은 조용히 건너뜀
+                logger.warning("PDF 파일이 아니거나 존재하지 않아 건너뜀: %s", path)
+
+    owners: Dict[str, List[str]] = {}
+    for path, doc_id in found.items():
+        owners.setdefault(doc_id, []).append(path)
+    conflicts = {doc_id: paths for doc_id, paths in owners.items() if len(paths) > 1}
+    if conflicts:
+        details = "; ".join(f"{doc_id}: {', '.join(paths)}" for doc_id, paths in sorted(conflicts.items()))
+        raise ValueError(f"문서 id가 겹치는 파일이 있습니다. 입력 루트를 나눠 지정하세요: {details}")
+    return list(found.items())
+
+
+def expand_inputs(inputs: Iterable[str]) -> List[str]:
+    """디렉터리(하위 포함), 글롭 패턴, 파일 경로를 PDF 파일 목록으로 펼친다 (중복 제거, 정렬)"""
+    return [path for path, _ in expand_documents(inputs)]
+
+
+class Checkpoint:
+    """파일별 처리 상태를 JSON으로 저장 (메인 프로세스만 기록)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("체크포인트를 읽을 수 없어 처음부터 시작합니다: %s (%s)", path, exc)
+
+    def is_done(self, path: str, sha256: str) -> bool:
+        entry = self.entries.get(path)
+        return bool(entry and entry.get("status") == "done" and entry.get("sha256") == sha256)
+
+    def record(self, path: str, **fields: Any) -> None:
+        self.entries[path] = {**fields, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def _index_one(path: str, doc_id: str, delta: bool) -> Optional[Dict[str, Any]]:
+    """워커 프로세스: 파일 하나 인덱싱 (파일 단위로 병렬화하므로 페이지 추출은 단일 프로세스)"""
+    return index_pdf(path, workers=1, delta=delta, doc_id=doc_id)
+
+
+class _Progress:
+    def __init__(self, total: int):
+        self.total = total
+        self.files = 0
+        self.failed = 0
+        self.pages = 0
+        self.chunks = 0
+        self.started = time.perf_counter()
+
+    def add(self, summary: Optional[Dict[str, Any]]) -> None:
+        self.files += 1
+        if summary is None:
+            self.failed += 1
+            return
+        self.pages += summary.get("pages", 0)
+        self.chunks += summary.get("chunks", 0)
+
+    def log(self, running: int) -> None:
+        elapsed = max(time.perf_counter() - self.started, 1e-9)
+        logger.info(
+            "📦 진행 %d/%d (실행 중 %d, 실패 %d) | %.2f files/s, %.1f pages/s, %.1f chunks/s",
+            self.files,
+            self.total,
+            running,
+            self.failed,
+            self.files / elapsed,
+            self.pages / elapsed,
+            self.chunks / elapsed,
+        )
+
+
+def run_bulk(
+    inputs: Iterable[str],
+    processes: int = 0,
+    delta: bool = AppConfig.INGEST_DELTA,
+    checkpoint_path: Optional[str] = None,
+    report_interval: float = 5.0,
+) -> Dict[str, Any]:
+    """
+    대량 인덱싱 실행
+    :param inputs: 디렉터리 / 글롭 / 파일 경로 목록
+    :param processes: 동시에 처리할 파일 수 (0: CPU 수)
+    :param delta: 변경된 청크만 재인덱싱
+    :param checkpoint_path: 체크포인트 파일 경로 (기본값: CACHE_DIR/bulk_checkpoint.json)
+    :param report_interval: 진행 로그 주기(초)
+    :return: 처리 결과 요약
+    """
+    checkpoint = Checkpoint(checkpoint_path or os.path.join(AppConfig.CACHE_DIR, "bulk_checkpoint.json"))
+    files = expand_documents(inputs)
+
+    # 이전 실행에서 완료된(내용이 바뀌지 않은) 파일은 건너뜀
+    todo: List[tuple] = []
+    for path, doc_id in files:
+        sha256 = file_sha256(path)
+        if checkpoint.is_done(path, sha256):
+            continue
+        todo.append((path, doc_id, sha256))
+    logger.info("📚 대상 파일 %d개 중 %d개 처리 (완료 %d개 건너뜀)", len(files), len(todo), len(files) - len(todo))
+
+    progress = _Progress(len(todo))
+    if not todo:
+        return {"files": len(files), "processed": 0, "failed": 0}
+
+    processes = processes if processes > 0 else (os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=min(processes, len(todo))) as executor:
+        futures: Dict[Future, tuple] = {
+            executor.submit(_index_one, path, doc_id, delta): (path, sha256) for path, doc_id, sha256 in todo
+        }
+        pending = set(futures)
+        last_report = time.perf_counter()
+        try:
+            while pending:
+                done, pending = wait(pending, timeout=report_interval, return_when=FIRST_COMPLETED)
+                for future in done:
+                    path, sha256 = futures[future]
+                    try:
+                        summary = future.result()
+                    except Exception as exc:  # noqa: BLE001 - 워커 프로세스 비정상 종료 등
+                        logger.error("❌ 처리 실패: %s (%s)", path, exc)
+                        summary = None
+                    if summary is not None and summary.get("upload", {}).get("failed"):
+                        logger.warning("⚠️ 일부 청크 업로드 실패, 다음 실행에서 다시 처리: %s", path)
+                        checkpoint.record(path, status="failed", sha256=sha256, error="upload failures")
+                        progress.add(None)
+                        continue
+                    progress.add(summary)
+                    if summary is None:
+                        checkpoint.record(path, status="failed", sha256=sha256)
+                    else:
+                        checkpoint.record(
+                            path,
+                            status="done",
+                            sha256=sha256,
+                            pages=summary.get("pages", 0),
+                            chunks=summary.get("chunks", 0),
+                            skipped=bool(summary.get("skipped")),
+                        )
+                if time.perf_counter() - last_report >= report_interval:
+                    progress.log(len(pending))
+                    last_report = time.perf_counter()
+        except KeyboardInterrupt:
+            logger.warning("중단 요청: 진행 중인 파일은 다음 실행에서 다시 처리됩니다.")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+
+    progress.log(0)
+    prebuild_local_index()
+    return {
+        "files": len(files),
+        "processed": progress.files,
+        "failed": progress.failed,
+        "pages": progress.pages,
+        "chunks": progress.chunks,
+        "elapsed_sec": round(time.perf_counter() - progress.started, 3),
+    }
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="디렉터리/글롭 단위 대량 PDF 인덱싱 (체크포인트로 이어서 실행)")
+    parser.add_argument("inputs", nargs="+", help="PDF 파일, 디렉터리 또는 글롭 패턴 (예: 'docs/**/*.pdf')")
+    parser.add_argument("--processes", type=int, default=0, help="동시에 처리할 파일 수 (0: CPU 수)")
+    parser.add_argument("--delta", action="store_true", default=AppConfig.INGEST_DELTA, help="변경된 청크만 재인덱싱")
+    parser.add_argument("--checkpoint", type=str, default=None, help="체크포인트 파일 경로")
+    parser.add_argument("--report-interval", type=float, default=5.0, help="진행 로그 주기(초)")
+    args = parser.parse_args()
+
+    result = run_bulk(
+        args.inputs,
+        processes=args.processes,
+        delta=args.delta,
+        checkpoint_path=args.checkpoint,
+        report_interval=args.report_interval,
+    )
+    print(json.dumps(result, ensure_ascii=False))
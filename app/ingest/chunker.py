@@ -1,17 +1,192 @@
-# 타입 힌트에서 List 사용
-from typing import List
+# 문장/문단 경계 탐색용 정규식
+import re
+
+# 벤치마크 시간 측정용
+import time
+
+# 타입 힌트에서 List 등 사용
+from typing import Iterator, List, Optional, Tuple
+
+# 토큰 수 계산용 (임베딩 모델 text-embedding-3-* 와 같은 cl100k_base 인코딩)
+import tiktoken
 
 # 공용 로거 불러오기
 from app.core.logger import logger
 
+# 토큰 인코딩 이름 (text-embedding-3-small / gpt-4o-mini 계열과 호환)
+_ENCODING_NAME = "cl100k_base"
+
+# 문장 경계: 종결 부호(. ! ? 。 …) 뒤 공백, 또는 줄바꿈 묶음
+# - 세그먼트가 뒤따르는 공백까지 포함하므로 세그먼트를 이어 붙이면 원문과 정확히 같아짐
+_SEGMENT_RE = re.compile(r".*?(?:(?<=[.!?。！？…])\s+|\n+|\Z)", re.DOTALL)
+
+_encoding: Optional[tiktoken.Encoding] = None
+
+
+def _get_encoding() -> tiktoken.Encoding:
+    global _encoding
+    if _encoding is None:
+        _encoding = tiktoken.get_encoding(_ENCODING_NAME)
+    return _encoding
+
+
+def _iter_segments(text: str) -> Iterator[Tuple[int, int, int, bool]]:
+    """
+    텍스트를 문장 단위 세그먼트로 나눠 (시작, 끝, 토큰 수, 문단 끝 여부)를 내보냄
+    - 정규식 한 번의 순회로 처리 (전체 O(n))
+    """
+    encoding = _get_encoding()
+    for match in _SEGMENT_RE.finditer(text):
+        start, end = match.span()
+        if start == end:
+            continue
+        segment = match.group()
+        n_tokens = len(encoding.encode(segment, disallowed_special=()))
+        yield start, end, n_tokens, segment.endswith("\n\n")
+
+
+def _split_long_segment(text: str, start: int, end: int, chunk_size: int, overlap: int) -> Iterator[Tuple[int, int]]:
+    """토큰 예산보다 긴 세그먼트를 토큰 경계로 잘라 (시작, 끝) 구간을 내보냄"""
+    encoding = _get_encoding()
+    tokens = encoding.encode(text[start:end], disallowed_special=())
+    _, offsets = encoding.decode_with_offsets(tokens)
+    step = max(1, chunk_size - overlap)
+    for i in range(0, len(tokens), step):
+        piece_start = start + offsets[i]
+        piece_end = start + offsets[i + chunk_size] if i + chunk_size < len(tokens) else end
+        yield piece_start, piece_end
+        if i + chunk_size >= len(tokens):
+            break
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def iter_chunk_spans(text: str, chunk_size: int = 500, overlap: int = 50) -> Iterator[Tuple[int, int]]:
+    """
+    텍스트 하나를 토큰 예산 단위 청크로 나눠 원문 기준 (시작, 끝) 문자 위치를 내보내는 함수
+    - 문장 경계에서 자르고, 청크가 절반 이상 찼으면 문단 경계에서 먼저 끊음
+    - 앞 청크의 마지막 문장들을 overlap 토큰 이내로 다음 청크 앞에 다시 포함
+    - 한 문장이 chunk_size보다 길면 토큰 경계로 잘라 냄
+    - 원문을 한 번만 훑고 부분 문자열을 복사하지 않으므로 O(n)
+    :param text: 원문 텍스트
+    :param chunk_size: 청크당 최대 토큰 수
+    :param overlap: 청크 간 중복 토큰 수
+    :return: (시작, 끝) 이터레이터 (양끝 공백 제외)
+    """
+    # 현재 청크에 담긴 세그먼트 (시작, 끝, 토큰 수), 앞쪽 carried개는 이전 청크에서 넘어온 overlap
+    current: List[Tuple[int, int, int]] = []
+    current_tokens = 0
+    carried = 0
+
+    def close() -> Iterator[Tuple[int, int]]:
+        nonlocal current, current_tokens, carried
+        span = _strip_span(text, current[0][0], current[-1][1])
+        if span[0] < span[1]:
+            yield span
+        # overlap 토큰 이내의 마지막 세그먼트들을 다음 청크로 넘김 (청크 전체는 넘기지 않음)
+        keep = 0
+        keep_tokens = 0
+        for segment in reversed(current[1:]):
+            if keep_tokens + segment[2] > overlap:
+                break
+            keep += 1
+            keep_tokens += segment[2]
+        current = current[len(current) - keep :] if keep else []
+        current_tokens = keep_tokens
+        carried = keep
+
+    for start, end, n_tokens, paragraph_end in _iter_segments(text):
+        if n_tokens > chunk_size:
+            # 긴 문장: 지금까지의 청크를 닫고 토큰 경계로 잘라 냄 (overlap은 토큰 단위로 적용)
+            if len(current) > carried:
+                yield from close()
+            current, current_tokens, carried = [], 0, 0
+            for span in _split_long_segment(text, start, end, chunk_size, overlap):
+                span = _strip_span(text, *span)
+                if span[0] < span[1]:
+                    yield span
+            continue
+
+        # 예산을 넘으면 새 내용이 있는 청크는 닫고, overlap만 남았으면 앞에서부터 덜어 냄
+        while current and current_tokens + n_tokens > chunk_size:
+            if len(current) > carried:
+                yield from close()
+            else:
+                current_tokens -= current.pop(0)[2]
+                carried -= 1
+
+        current.append((start, end, n_tokens))
+        current_tokens += n_tokens
+
+        if paragraph_end and current_tokens >= chunk_size // 2:
+            yield from close()
+
+    if len(current) > carried:
+        span = _strip_span(text, current[0][0], current[-1][1])
+        if span[0] < span[1]:
+            yield span
+
+
+class ChunkRecord:
+    """
+    원문 페이지 텍스트의 (시작, 끝) 위치만 가리키는 청크 레코드
+    - 문자열을 복사해 두지 않고, 임베딩/업로드 시점에 text로 꺼내 씀
+    - __slots__로 인스턴스 dict를 없애 청크 수가 많아도 메모리 사용량을 줄임
+    """
+
+    __slots__ = ("source", "page_no", "start", "end", "chunk_id", "digest")
+
+    def __init__(self, source: str, page_no: int, start: int, end: int, chunk_id: str = "", digest: str = ""):
+        self.source = source  # 페이지 원문 (같은 페이지의 청크끼리 공유)
+        self.page_no = page_no
+        self.start = start
+        self.end = end
+        self.chunk_id = chunk_id
+        self.digest = digest  # 내용 해시 (필요할 때만 채움)
+
+    @property
+    def text(self) -> str:
+        return self.source[self.start : self.end]
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def location(self) -> dict:
+        return {"page_no": self.page_no, "char_start": self.start, "char_end": self.end}
+
+    def __repr__(self) -> str:
+        return f"ChunkRecord(id={self.chunk_id!r}, page={self.page_no}, span={self.start}:{self.end})"
+
+
+def iter_chunk_records(
+    text: str,
+    page_no: int,
+    chunk_size: int = 500,
+    overlap: int = 50,
+) -> Iterator[ChunkRecord]:
+    """
+    페이지 텍스트를 ChunkRecord로 나눠 내보내는 함수 (iter_chunk_spans + 페이지 번호)
+    :param text: 페이지 원문
+    :param page_no: 페이지 번호
+    :return: ChunkRecord 이터레이터
+    """
+    for start, end in iter_chunk_spans(text, chunk_size=chunk_size, overlap=overlap):
+        yield ChunkRecord(text, page_no, start, end)
+
 
 def chunk_text(texts: List[str], chunk_size: int = 500, overlap: int = 50) -> List[str]:
     """
-    텍스트 리스트를 일정한 크기로 분할하는 함수
+    텍스트 리스트를 토큰 예산 단위로 분할하는 함수
     (방어 로직 + 로그 기록 포함)
     :param texts: 여러 페이지에서 추출된 텍스트 리스트
-    :param chunk_size: 분할할 최대 단어 수 (기본값 500)
-    :param overlap: 청킹 시 중복 단어 수 (기본값 50)
+    :param chunk_size: 청크당 최대 토큰 수 (기본값 500)
+    :param overlap: 청크 간 중복 토큰 수 (기본값 50)
     :return: 분할된 텍스트 덩어리 리스트
     """
 
@@ -34,30 +209,41 @@ def chunk_text(texts: List[str], chunk_size: int = 500, overlap: int = 50) -> Li
             logger.warning(f"{idx}번째 텍스트가 비어 있어 건너뜀")
             continue
 
-        # 단어 단위로 분리
-        words = text.split()
-        start = 0
-
-        # 텍스트 끝까지 순회하며 청킹 진행
-        while start < len(words):
-            end = min(start + chunk_size, len(words))
-            # 단어들을 다시 하나의 문자열로 합치기
-            chunk = " ".join(words[start:end])
-
-            # 빈 문자열 방어
-            if chunk.strip():
-                chunks.append(chunk)
-                logger.debug(
-                    f"{idx}번째 텍스트에서 청크 생성 "
-                    f"(단어 {start}~{end}, 길이 {len(chunk)}자)"
-                )
-            else:
-                logger.warning(f"{idx}번째 텍스트에서 빈 청크 생성됨 (무시)")
-
-            # overlap 만큼 겹치도록 시작점 이동
-            start += chunk_size - overlap
+        for record in iter_chunk_records(text, idx, chunk_size=chunk_size, overlap=overlap):
+            chunks.append(record.text)
+            logger.debug(f"{idx}번째 텍스트에서 청크 생성 (문자 {record.start}~{record.end})")
 
     # 결과 요약 로그
     logger.info(f"청킹 완료: 총 {len(chunks)}개 청크 생성")
 
     return chunks
+
+
+def benchmark(sizes: Tuple[int, ...] = (1, 2, 4, 8, 16), base_chars: int = 200_000) -> None:
+    """
+    입력 크기를 늘려 가며 청킹 시간을 재서 선형 확장 여부를 확인하는 함수
+    - 문자당 처리 시간(ns/char)이 크기와 무관하게 일정하면 O(n)
+    """
+    sentence = "Entra ID 앱 신청은 포털에서 진행합니다. 승인 후 권한이 부여됩니다!\n"
+    paragraph = sentence * 8 + "\n"
+    _get_encoding()  # 인코딩 로딩 시간은 측정에서 제외
+    print(f"{'chars':>12} {'chunks':>8} {'ms':>10} {'ns/char':>10}")
+    for factor in sizes:
+        text = (paragraph * (base_chars * factor // len(paragraph) + 1))[: base_chars * factor]
+        started = time.perf_counter()
+        count = sum(1 for _ in iter_chunk_spans(text))
+        elapsed = time.perf_counter() - started
+        print(f"{len(text):>12} {count:>8} {elapsed * 1000:>10.1f} {elapsed / len(text) * 1e9:>10.1f}")
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="토큰 기반 청커 벤치마크")
+    parser.add_argument("--bench", action="store_true", help="입력 크기별 청킹 시간 측정")
+    parser.add_argument("--base-chars", type=int, default=200_000, help="가장 작은 입력의 문자 수")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(base_chars=args.base_chars)
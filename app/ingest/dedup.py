@@ -0,0 +1,102 @@
+"""
+dedup.py : 임베딩 전 중복/유사 중복 청크 제거
+- 정규화(소문자, 공백·기호 제거)한 텍스트 해시로 완전 중복을 찾는다.
+- 문자 3-gram SimHash(64비트)와 4개 밴드 LSH로 해밍 거리 max_distance 이하인 유사 중복을 찾는다.
+  (max_distance ≤ 3이면 비둘기집 원리로 4개 밴드 중 하나는 반드시 일치하므로 누락 없음)
+- 대표 청크 하나만 임베딩하고, 나머지 중복의 위치는 대표 chunk_id 아래 메타데이터로 모은다.
+"""
+
+import hashlib
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional
+
+# SimHash 비트 수와 LSH 밴드 구성
+_BITS = 64
+_BANDS = 4
+_BAND_BITS = _BITS // _BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+
+# 비교용 정규화: 한글/영문/숫자만 남김
+_NON_WORD_RE = re.compile(r"[^0-9a-z가-힣]+")
+
+
+def normalize_for_dedup(text: str) -> str:
+    return _NON_WORD_RE.sub("", (text or "").lower())
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash(normalized: str, shingle: int = 3) -> int:
+    """문자 n-gram 빈도로 가중한 64비트 SimHash"""
+    if len(normalized) <= shingle:
+        return _hash64(normalized)
+    weights = [0] * _BITS
+    grams = Counter(normalized[i : i + shingle] for i in range(len(normalized) - shingle + 1))
+    for gram, count in grams.items():
+        h = _hash64(gram)
+        for bit in range(_BITS):
+            weights[bit] += count if h >> bit & 1 else -count
+    value = 0
+    for bit, weight in enumerate(weights):
+        if weight > 0:
+            value |= 1 << bit
+    return value
+
+
+class NearDuplicateFilter:
+    """
+    스트리밍 중복 판별기
+    - check()가 None이면 새 대표 청크, 값이 있으면 그 대표 chunk_id의 중복
+    """
+
+    def __init__(self, max_distance: int = 3, min_chars: int = 30):
+        self.max_distance = max_distance
+        self.min_chars = min_chars  # 이보다 짧은 청크는 완전 중복만 판별
+        self._exact: Dict[str, str] = {}
+        self._bands: List[Dict[int, List[int]]] = [{} for _ in range(_BANDS)]
+        self._signatures: List[int] = []
+        self._keys: List[str] = []
+        self.duplicates: Dict[str, List[Dict[str, Any]]] = {}
+        self.exact_hits = 0
+        self.near_hits = 0
+
+    def check(self, key: str, text: str) -> Optional[str]:
+        normalized = normalize_for_dedup(text)
+        digest = hashlib.sha256(normalized.encode("utf-8")).hexdigest()
+        representative = self._exact.get(digest)
+        if representative is not None:
+            self.exact_hits += 1
+            return representative
+
+        signature: Optional[int] = None
+        if len(normalized) >= self.min_chars:
+            signature = simhash(normalized)
+            bands = [(signature >> (i * _BAND_BITS)) & _BAND_MASK for i in range(_BANDS)]
+            candidates = set()
+            for table, band in zip(self._bands, bands):
+                candidates.update(table.get(band, ()))
+            for index in sorted(candidates):
+                if bin(self._signatures[index] ^ signature).count("1") <= self.max_distance:
+                    self.near_hits += 1
+                    return self._keys[index]
+            index = len(self._signatures)
+            self._signatures.append(signature)
+            self._keys.append(key)
+            for table, band in zip(self._bands, bands):
+                table.setdefault(band, []).append(index)
+
+        self._exact[digest] = key
+        return None
+
+    def add_duplicate(self, representative: str, location: Dict[str, Any]) -> None:
+        self.duplicates.setdefault(representative, []).append(location)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "representatives": len(self._exact),
+            "exact_duplicates": self.exact_hits,
+            "near_duplicates": self.near_hits,
+        }
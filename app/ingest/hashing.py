@@ -0,0 +1,23 @@
+"""
+hashing.py : 파일/청크 내용 해시
+- 설정(AppConfig)에 의존하지 않으므로 로더와 추출 워커 프로세스에서도 Azure 환경변수 없이 import할 수 있다.
+"""
+
+import hashlib
+
+# 파일 해시 계산 시 한 번에 읽는 크기
+_READ_SIZE = 1024 * 1024
+
+
+def file_sha256(path: str) -> str:
+    """파일 전체 SHA-256 (스트리밍 계산)"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(_READ_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def content_hash(text: str) -> str:
+    """청크 내용 SHA-256"""
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
@@ -1,126 +1,363 @@
 """
 indexer.py : PDF → 청킹 → 임베딩 생성 → Azure Cognitive Search 업로드
 - Portal Indexer 대신 직접 임베딩을 생성하고 벡터 필드(text_vector)에 저장
+- 추출 → 청킹 → 임베딩 → 업로드 스테이지를 제한된 큐로 연결해 동시에 실행
 """
 
+import hashlib
 import os
+import re
 import uuid
 import logging
-from typing import List
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, BinaryIO, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
 
-from azure.core.credentials import AzureKeyCredential
-from azure.search.documents import SearchClient, IndexDocumentsBatch
+from azure.search.documents import SearchClient
 
-
-from openai import AzureOpenAI
 from app.config import AppConfig
-
-# PDF 텍스트 추출 (PyPDF2 사용, fitz 제거)
-from PyPDF2 import PdfReader
+from app.core.embeddings import get_embedding_batcher
+from app.core.index_version import bump_index_version
+from app.core.chunk_store import ChunkStoreWriter
+from app.core.local_index import LocalShardWriter, build_local_index
+from app.ingest.chunker import ChunkRecord, chunk_text, iter_chunk_records
+from app.ingest.dedup import NearDuplicateFilter
+from app.ingest.loader import iter_pdf_pages
+from app.ingest.manifest import ChunkManifest, content_hash, file_sha256
+from app.ingest.pipeline import run_pipeline
+from app.ingest.uploader import BulkUploader, UploadSummary, create_search_client
 
 # 로거 설정
 logger = logging.getLogger("entraaid_app")
 logging.basicConfig(level=logging.INFO)
 
 
+_search_client: Optional[SearchClient] = None
+
+
+def _get_search_client() -> SearchClient:
+    """업로드용 SearchClient를 한 번만 생성해 재사용"""
+    global _search_client
+    if _search_client is None:
+        _search_client = create_search_client()
+    return _search_client
+
+
 def load_pdf_text(pdf_path: str) -> List[str]:
     """
     PDF 파일에서 페이지별 텍스트 추출
+    - 설정된 추출 백엔드(AppConfig.PDF_BACKEND)와 페이지 텍스트 캐시를 쓰는 공용 로더(app.ingest.loader)를 사용
     """
-    reader = PdfReader(pdf_path)
-    texts = []
-    for i, page in enumerate(reader.pages):
-        text = page.extract_text()
-        if text:
-            texts.append(text.strip())
-        else:
-            logger.warning(f"⚠️ {i+1} 페이지에서 텍스트를 추출하지 못했습니다.")
+    texts = [text.strip() for _, text in iter_pdf_pages(pdf_path)]
     logger.info(f"✅ PDF 텍스트 추출 완료: 총 {len(texts)} 페이지")
     return texts
 
 
-def chunk_texts(texts: List[str], max_chunk_size: int = 1000) -> List[str]:
+def chunk_texts(
+    texts: List[str],
+    max_chunk_size: int = AppConfig.CHUNK_TOKENS,
+    overlap: int = AppConfig.CHUNK_OVERLAP_TOKENS,
+) -> List[str]:
     """
-    텍스트를 일정 길이(max_chunk_size) 단위로 청킹
+    텍스트를 토큰 예산(max_chunk_size) 단위로 청킹
+    - 문장/문단 경계와 overlap을 고려하는 공용 청커(app.ingest.chunker)를 사용
     """
-    chunks = []
-    for text in texts:
-        while len(text) > max_chunk_size:
-            chunks.append(text[:max_chunk_size])
-            text = text[max_chunk_size:]
-        if text:
-            chunks.append(text)
-    logger.info(f"✅ 청킹 완료: 총 {len(chunks)} 청크 생성")
-    return chunks
+    return chunk_text(texts, chunk_size=max_chunk_size, overlap=overlap)
 
 
 def embed_texts(chunks: List[str]) -> List[List[float]]:
     """
     Azure OpenAI Embedding API 호출
+    - 토큰 수 기준 배치 분할, 동시 요청, 429 재시도는 EmbeddingBatcher가 처리
     """
-    client = AzureOpenAI(
-        api_key=AppConfig.AOAI_API_KEY,
-        api_version=AppConfig.AOAI_API_VERSION,
-        azure_endpoint=AppConfig.AOAI_ENDPOINT if AppConfig.AOAI_ENDPOINT is not None else "",
-    )
-
-    response = client.embeddings.create(
-        model=AppConfig.AOAI_EMBED_DEPLOYMENT,  # .env에 지정한 임베딩 모델
-        input=chunks,
-    )
-
-    embeddings = [d.embedding for d in response.data]
+    embeddings = get_embedding_batcher().embed(chunks)
     logger.info(f"✅ 임베딩 생성 완료: 총 {len(embeddings)} 벡터")
     return embeddings
 
 
-def upload_to_search(chunks: List[str], embeddings: List[List[float]], pdf_name: str):
+def document_id(name: str) -> str:
+    """
+    문서 경로(입력 루트 기준 상대 경로 또는 컨테이너/Blob 이름) → parent_id (chunk_id 접두사)
+    - 확장자를 뗀 경로를 키 허용 문자(영숫자, _, -, =)로 바꿈
+    - 바꾸면서 정보가 사라졌으면(폴더 구분자, 한글, 공백 등) 원래 경로의 해시를 붙여
+      a/guide.pdf 와 b/guide.pdf, a_guide.pdf 가 서로 다른 id가 되게 함
+    """
+    stem = os.path.splitext(name.replace("\\", "/").strip("/"))[0]
+    safe = re.sub(r"[^A-Za-z0-9_=-]", "_", stem)
+    if safe == stem and safe:
+        return safe
+    return f"{safe}_{hashlib.sha1(stem.encode('utf-8')).hexdigest()[:10]}"
+
+
+def _build_document(
+    chunk_id: str,
+    chunk: str,
+    embedding: List[float],
+    pdf_name: str,
+    location: Optional[Dict[str, int]] = None,
+    title: Optional[str] = None,
+) -> Dict[str, Any]:
+    doc: Dict[str, Any] = {
+        "chunk_id": chunk_id,  # 키: 허용 문자만 사용
+        "parent_id": pdf_name,
+        "chunk": chunk,
+        "title": title or pdf_name,
+        "text_vector": embedding,
+    }
+    # 인덱스 스키마에 page_no/char_start/char_end 필드가 있을 때만 위치 정보 포함
+    if location and AppConfig.AIS_LOCATION_FIELDS:
+        doc.update(location)
+    return doc
+
+
+def upload_to_search(chunks: List[str], embeddings: List[List[float]], pdf_name: str, start_index: int = 0) -> UploadSummary:
     """
     청크 + 임베딩을 Azure Cognitive Search에 업로드
+    - 배치 분할/동시 전송/실패 키 재시도는 BulkUploader가 처리
+    :param start_index: chunk_id 번호 시작값 (배치 단위 업로드 시 사용)
     """
-    search_client = SearchClient(
-        endpoint=AppConfig.AIS_ENDPOINT,
-        index_name=AppConfig.AIS_INDEX,
-        credential=AzureKeyCredential(AppConfig.AIS_API_KEY),
+    docs = (
+        _build_document(f"{pdf_name}_{i}", chunk, embedding, pdf_name)
+        for i, (chunk, embedding) in enumerate(zip(chunks, embeddings), start=start_index)
     )
 
-    batch = IndexDocumentsBatch()
+    summary = BulkUploader(client=_get_search_client()).upload(docs)
+    if summary.succeeded:
+        bump_index_version()
+    logger.info(f"✅ {summary.succeeded}개 문서 업로드 완료")
+    print("✅ 업로드 결과:", summary.to_dict())
+    return summary
 
-    for i, (chunk, embedding) in enumerate(zip(chunks, embeddings)):
-        doc = {
-            "chunk_id": f"{pdf_name}_{i}",  # 키: 허용 문자만 사용
-            "parent_id": pdf_name,
-            "chunk": chunk,
-            "title": pdf_name,
-            "text_vector": embedding,
-        }
-        batch = IndexDocumentsBatch()
-        batch.add_upload_actions([doc])  # ✅ 리스트로 전달
 
+def _chunk_stage(pages: Iterator[Tuple[int, str]], pdf_name: str, content_ids: bool = False) -> Iterator[ChunkRecord]:
+    """
+    페이지 텍스트를 ChunkRecord(페이지 번호 + 문자 위치)로 변환
+    - content_ids=False: 순번 기반 chunk_id (f"{pdf_name}_{i}")
+    - content_ids=True: 내용 해시 기반 chunk_id (앞부분이 바뀌어도 뒤 청크 id가 밀리지 않음)
+    """
+    index = 0
+    seen: Dict[str, int] = {}
+    for page_no, text in pages:
+        for record in iter_chunk_records(text, page_no, AppConfig.CHUNK_TOKENS, AppConfig.CHUNK_OVERLAP_TOKENS):
+            record.digest = content_hash(record.text)
+            if content_ids:
+                short = record.digest[:16]
+                seen[short] = seen.get(short, 0) + 1
+                suffix = f"_{seen[short]}" if seen[short] > 1 else ""
+                record.chunk_id = f"{pdf_name}_{short}{suffix}"
+            else:
+                record.chunk_id = f"{pdf_name}_{index}"
+            index += 1
+            yield record
+
+
+def _dedup_stage(records: Iterator[ChunkRecord], dedup: NearDuplicateFilter) -> Iterator[ChunkRecord]:
+    """
+    완전/유사 중복 청크를 걸러 대표 청크만 통과시킴
+    - 걸러진 청크의 chunk_id와 위치는 대표 chunk_id 아래에 기록 (임베딩·업로드하지 않음)
+    """
+    for record in records:
+        representative = dedup.check(record.chunk_id, record.text)
+        if representative is None:
+            yield record
+        else:
+            dedup.add_duplicate(representative, {"chunk_id": record.chunk_id, **record.location()})
+
+
+def _delta_stage(
+    records: Iterator[ChunkRecord],
+    previous: ChunkManifest,
+    current: ChunkManifest,
+) -> Iterator[ChunkRecord]:
+    """모든 청크를 새 매니페스트에 기록하고, 이전 실행과 내용이 다른 청크만 통과시킴"""
+    for record in records:
+        current.chunks[record.chunk_id] = record.digest
+        if previous.chunks.get(record.chunk_id) != record.digest:
+            yield record
+
+
+def _embed_stage(records: Iterator[ChunkRecord], batch_size: int) -> Iterator[Tuple[List[ChunkRecord], List[List[float]]]]:
+    """
+    레코드를 batch_size 단위로 묶어 임베딩 생성 (청크 텍스트는 이 시점에 꺼냄)
+    - 최대 EMBED_CONCURRENCY개 배치를 동시에 요청하고, 완료 결과는 입력 순서대로 내보냄
+    """
+    pending: Deque[Tuple[List[ChunkRecord], "Future[List[List[float]]]"]] = deque()
+    with ThreadPoolExecutor(max_workers=max(1, AppConfig.EMBED_CONCURRENCY)) as executor:
+
+        def submit(batch: List[ChunkRecord]) -> Iterator[Tuple[List[ChunkRecord], List[List[float]]]]:
+            pending.append((batch, executor.submit(embed_texts, [record.text for record in batch])))
+            while len(pending) > AppConfig.EMBED_CONCURRENCY:
+                done_batch, future = pending.popleft()
+                yield done_batch, future.result()
 
-    result = search_client.index_documents(batch=batch)
-    logger.info(f"✅ {len(chunks)}개 문서 업로드 완료")
-    print("✅ 업로드 결과:", result)
+        batch: List[ChunkRecord] = []
+        for record in records:
+            batch.append(record)
+            if len(batch) >= batch_size:
+                yield from submit(batch)
+                batch = []
+        if batch:
+            yield from submit(batch)
+        while pending:
+            done_batch, future = pending.popleft()
+            yield done_batch, future.result()
 
 
-def index_pdf(pdf_path: str):
+def _upload_stage(
+    batches: Iterable[Tuple[List[ChunkRecord], List[List[float]]]],
+    pdf_name: str,
+    uploader: BulkUploader,
+    local_writer: Optional[LocalShardWriter] = None,
+    chunk_writer: Optional[ChunkStoreWriter] = None,
+    title: Optional[str] = None,
+) -> Iterator[int]:
+    """
+    임베딩된 배치를 업로더에 넘김 (전송은 업로더 스레드에서 동시에 진행, 로컬 인덱스 샤드/청크 저장소에도 기록)
+    - 이 스테이지의 처리 수(StageStats)는 업로더에 넘긴 문서 수다. 서비스가 확인한 성공/실패 수는
+      uploader.flush()의 UploadSummary(index_pdf 요약의 "upload")에 있다.
+    """
+    for records, embeddings in batches:
+        docs = [
+            _build_document(record.chunk_id, record.text, embedding, pdf_name, record.location(), title)
+            for record, embedding in zip(records, embeddings)
+        ]
+        uploader.submit(docs)
+        if local_writer is not None:
+            local_writer.add(docs)
+        if chunk_writer is not None:
+            chunk_writer.add(docs)
+        yield len(docs)
+
+
+def prebuild_local_index() -> None:
+    """
+    현재 인덱스 버전의 로컬 검색 행렬을 미리 합쳐 둠 (인덱싱 실행이 끝날 때 한 번)
+    - 리트리버가 버전 변경 후 첫 검색에서 합치기를 기다리지 않도록 함 (같은 CACHE_DIR을 쓸 때)
+    - 파일마다 하면 샤드 전체를 매번 다시 읽으므로 대량 인덱싱은 끝에서만 호출
+    """
+    if not AppConfig.LOCAL_INDEX_ENABLED:
+        return
+    try:
+        build_local_index(dtype=AppConfig.LOCAL_VECTOR_DTYPE)
+    except Exception as exc:  # noqa: BLE001 - 리트리버가 필요할 때 다시 만듦
+        logger.warning(f"로컬 인덱스 미리 합치기 실패: {exc}")
+
+
+def _delete_from_search(chunk_ids: List[str]) -> UploadSummary:
+    """인덱스에서 chunk_id 목록을 삭제"""
+    uploader = BulkUploader(client=_get_search_client(), action="delete")
+    return uploader.upload({"chunk_id": chunk_id} for chunk_id in chunk_ids)
+
+
+def index_pdf(
+    pdf_path: str,
+    workers: int = AppConfig.INGEST_WORKERS,
+    batch_size: int = AppConfig.INGEST_BATCH_SIZE,
+    queue_size: int = AppConfig.INGEST_QUEUE_SIZE,
+    delta: bool = AppConfig.INGEST_DELTA,
+    dedup: bool = AppConfig.INGEST_DEDUP,
+    stream: Optional[BinaryIO] = None,
+    file_hash: Optional[str] = None,
+    doc_id: Optional[str] = None,
+) -> Optional[Dict[str, Any]]:
     """
     전체 파이프라인 실행
+    - 추출/청킹/임베딩/업로드가 동시에 진행되며, 메모리에는 큐 크기 × 배치 크기만큼만 유지
+      (로컬 인덱스 샤드/청크 저장소에 넣을 벡터와 본문도 받는 즉시 임시 파일에 기록)
+    - 실행마다 청크 해시 매니페스트를 갱신하고, 이전 실행에만 있던 chunk_id는 인덱스에서 삭제
+    - delta=True: 파일 해시가 같으면 건너뛰고, 새로 생기거나 바뀐 청크만 임베딩·업로드
+    - dedup=True: 머리글/바닥글 같은 반복 청크는 대표 하나만 임베딩하고 나머지 위치는 매니페스트에 기록
+    :param stream: 로컬 파일 대신 읽을 PDF 바이너리 스트림 (pdf_path는 문서 이름으로만 사용)
+    :param file_hash: 변경 판단용 파일 식별값 (스트림이면 Blob ETag 등, 기본값: 파일 SHA-256)
+    :param doc_id: 문서 id (parent_id, chunk_id 접두사, 매니페스트/로컬 인덱스/청크 저장소 파일 이름).
+                   폴더가 다른 같은 이름 파일을 구분하려면 document_id(상대 경로)를 넘김 (기본값: document_id(파일 이름))
+    :return: 스테이지별 통계를 담은 요약 (실패 시 None)
     """
     try:
         logger.info(f"📄 PDF 파일 처리 시작: {pdf_path}")
-        pdf_name = os.path.splitext(os.path.basename(pdf_path))[0]
+        title = os.path.splitext(os.path.basename(pdf_path))[0]
+        pdf_name = doc_id or document_id(os.path.basename(pdf_path))
+
+        if file_hash is None and stream is None:
+            file_hash = file_sha256(pdf_path)
+        previous = ChunkManifest.load(pdf_name)
+        id_scheme = "content" if delta else "position"
+        if delta and file_hash is not None and previous.file_hash == file_hash and previous.id_scheme == id_scheme:
+            logger.info(f"⏭️ 파일 해시가 이전 실행과 같아 건너뜁니다: {pdf_path}")
+            return {"pdf_name": pdf_name, "skipped": True, "pages": 0, "chunks": 0}
 
-        texts = load_pdf_text(pdf_path)
-        chunks = chunk_texts(texts)
-        embeddings = embed_texts(chunks)
-        upload_to_search(chunks, embeddings, pdf_name)
+        # delta가 아니면 이전 해시를 무시해 모든 청크를 다시 올림
+        baseline = previous if delta else ChunkManifest(pdf_name)
+        current = ChunkManifest(pdf_name, id_scheme=id_scheme)
 
-        logger.info("🎉 인덱싱 파이프라인 완료")
+        uploader = BulkUploader(client=_get_search_client())
+        local_writer = LocalShardWriter(pdf_name, incremental=delta) if AppConfig.LOCAL_INDEX_ENABLED else None
+        chunk_writer = ChunkStoreWriter(pdf_name, incremental=delta) if AppConfig.CHUNK_STORE_ENABLED else None
+        duplicates = NearDuplicateFilter(AppConfig.DEDUP_MAX_DISTANCE, AppConfig.DEDUP_MIN_CHARS)
+        stages = [("chunk", lambda pages: _chunk_stage(pages, pdf_name, content_ids=delta))]
+        if dedup:
+            stages.append(("dedup", lambda records: _dedup_stage(records, duplicates)))
+        stages += [
+            ("delta", lambda records: _delta_stage(records, baseline, current)),
+            ("embed", lambda records: _embed_stage(records, batch_size)),
+            ("upload", lambda batches: _upload_stage(batches, pdf_name, uploader, local_writer, chunk_writer, title)),
+        ]
+        stats = run_pipeline(
+            iter_pdf_pages(stream if stream is not None else pdf_path, workers=workers),
+            stages,
+            queue_size=queue_size,
+            source_name="extract",
+        )
+        upload_summary = uploader.flush()
+        current.duplicates = duplicates.duplicates
+
+        # 이번 실행에 없는 chunk_id(이전 버전의 잔여 청크) 삭제
+        orphans = sorted(set(previous.chunks) - set(current.chunks))
+        delete_summary = _delete_from_search(orphans) if orphans else None
+
+        # 업로드/삭제에 실패한 청크는 다음 실행에서 다시 처리되도록 매니페스트에 반영
+        for chunk_id in upload_summary.failed:
+            current.chunks.pop(chunk_id, None)
+        if delete_summary is not None:
+            for chunk_id in delete_summary.failed:
+                current.chunks[chunk_id] = previous.chunks[chunk_id]
+        clean = not upload_summary.failed and (delete_summary is None or not delete_summary.failed)
+        current.file_hash = file_hash if clean else None
+        current.save()
+        if local_writer is not None:
+            local_writer.commit(set(current.chunks))
+        if chunk_writer is not None:
+            chunk_writer.commit(set(current.chunks))
+
+        # 인덱스 내용이 바뀌었으면 버전 토큰을 갱신해 검색/답변 캐시를 무효화
+        if upload_summary.succeeded or (delete_summary is not None and delete_summary.succeeded):
+            bump_index_version()
+
+        stage_stats = {s.name: s for s in stats}
+        summary = {
+            "pdf_name": pdf_name,
+            "pages": stage_stats["extract"].items_out,
+            "chunks": stage_stats["chunk"].items_out,
+            "unique_chunks": stage_stats["delta"].items_in,
+            "changed_chunks": stage_stats["delta"].items_out,
+            "deleted_chunks": delete_summary.succeeded if delete_summary else 0,
+            "elapsed_sec": round(max(s.elapsed for s in stats), 3),
+            "stages": [s.to_dict() for s in stats],
+            "upload": upload_summary.to_dict(),
+            "dedup": duplicates.stats(),
+        }
+        bottleneck = max(stats, key=lambda s: s.busy)
+        logger.info(
+            f"🎉 인덱싱 파이프라인 완료: 페이지 {summary['pages']}개, 청크 {summary['chunks']}개 "
+            f"(중복 제외 {summary['unique_chunks']}개, 변경 {summary['changed_chunks']}개, 삭제 {summary['deleted_chunks']}개), "
+            f"{summary['elapsed_sec']}초 (병목 스테이지: {bottleneck.name})"
+        )
+        return summary
 
     except Exception as e:
         logger.error(f"❌ 인덱싱 실패: {e}", exc_info=True)
         print(f"❌ 인덱싱 실패: {e}")
+        return None
 
 
 # 단독 실행 시 동작
@@ -129,6 +366,13 @@ if __name__ == "__main__":
 
     parser = argparse.ArgumentParser(description="PDF 파일 인덱싱")
     parser.add_argument("file_path", type=str, help="인덱싱할 PDF 파일 경로")
+    parser.add_argument("--workers", type=int, default=AppConfig.INGEST_WORKERS, help="PDF 추출 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=AppConfig.INGEST_BATCH_SIZE, help="임베딩/업로드 배치 크기")
+    parser.add_argument("--delta", action="store_true", default=AppConfig.INGEST_DELTA, help="변경된 청크만 재인덱싱")
+    parser.add_argument(
+        "--no-dedup", dest="dedup", action="store_false", default=AppConfig.INGEST_DEDUP, help="중복 청크 제거 끄기"
+    )
     args = parser.parse_args()
 
-    index_pdf(args.file_path)
+    index_pdf(args.file_path, workers=args.workers, batch_size=args.batch_size, delta=args.delta, dedup=args.dedup)
+    prebuild_local_index()
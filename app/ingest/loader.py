@@ -1,56 +1,265 @@
+# 여러 프로세스에 페이지 범위를 나눠 추출하기 위한 프로세스 풀
+from concurrent.futures import ProcessPoolExecutor
+
+# 워커 수 기본값 계산용
+import os
+
+# 벤치마크 시간 측정용
+import time
+
 # pathlib에서 Path 클래스를 불러오기 (파일 경로 다루기 위함)
 from pathlib import Path
 
-# 타입 힌트를 위해 List 불러오기
-from typing import List
-
-# pypdf 라이브러리에서 PDF 읽기 기능을 제공하는 PdfReader 불러오기
-from pypdf import PdfReader
+# 타입 힌트를 위해 List 등 불러오기
+from typing import Any, BinaryIO, Iterator, List, Optional, Tuple, Union
 
 # 공용 로거 불러오기
 from app.core.logger import logger
 
+# 페이지 텍스트 캐시 (파일 해시 기준)
+from app.ingest.hashing import file_sha256
+from app.ingest.page_cache import get_page_cache
 
-def load_pdf(file_path: str) -> List[str]:
+# 추출 백엔드 (pypdf / PyPDF2 / PyMuPDF 중 AppConfig.PDF_BACKEND)
+from app.ingest.pdf_backends import PdfBackend, get_backend
+
+
+def _open_reader(path: Path, backend: PdfBackend) -> Tuple[Any, int]:
     """
-    PDF 파일에서 텍스트를 추출하는 함수 (방어 로직 + 로그 포함)
-    :param file_path: 로컬 PDF 파일 경로
-    :return: 각 페이지별 텍스트를 담은 리스트
+    PDF 파일을 열어 (문서 객체, 페이지 수)를 반환하는 함수 (존재 여부 검사 + 에러 방어)
+    :param path: 로컬 PDF 파일 경로 객체
+    :param backend: 추출 백엔드
+    :return: (백엔드 문서 객체, 페이지 수)
     """
 
-    # 파일 경로 객체 생성
-    path = Path(file_path)
-
     # 파일이 존재하지 않으면 에러 발생 + 로그 기록
     if not path.exists():
-        logger.error(f"PDF 파일을 찾을 수 없습니다: {file_path}")
-        raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {file_path}")
+        logger.error(f"PDF 파일을 찾을 수 없습니다: {path}")
+        raise FileNotFoundError(f"PDF 파일을 찾을 수 없습니다: {path}")
 
     # PDF 파일 열기 (에러 방어)
     try:
-        reader = PdfReader(str(path))
-        logger.info(f"PDF 파일 열기 성공: {file_path}, 총 {len(reader.pages)} 페이지")
+        document = backend.open(str(path))
+        total = backend.page_count(document)
+        logger.info(f"PDF 파일 열기 성공: {path}, 총 {total} 페이지 ({backend.name})")
     except Exception as e:
-        logger.exception(f"PDF 파일을 열 수 없습니다: {file_path}")
-        raise RuntimeError(f"PDF 파일을 열 수 없습니다: {file_path}, 에러: {e}")
-
-    # 추출된 텍스트를 담을 리스트
-    texts = []
-
-    # 페이지 단위로 텍스트 추출
-    for i, page in enumerate(reader.pages):
-        try:
-            text = page.extract_text()
-            if text and text.strip():
-                texts.append(text)
-                logger.debug(f"{i} 페이지 텍스트 추출 성공 (길이: {len(text)}자)")
-            else:
-                logger.warning(f"{i} 페이지 텍스트가 비어 있음")
-        except Exception as e:
-            logger.exception(f"{i} 페이지 텍스트 추출 실패")
-            continue  # 다음 페이지 계속 진행
+        logger.exception(f"PDF 파일을 열 수 없습니다: {path}")
+        raise RuntimeError(f"PDF 파일을 열 수 없습니다: {path}, 에러: {e}")
+
+    return document, total
+
+
+def _extract_page(backend: PdfBackend, document: Any, page_no: int) -> Optional[str]:
+    """
+    한 페이지의 텍스트를 추출하는 함수 (실패/빈 페이지는 None)
+    :param backend: 추출 백엔드
+    :param document: 백엔드 문서 객체
+    :param page_no: 1부터 시작하는 페이지 번호
+    :return: 추출된 텍스트 또는 None
+    """
+    try:
+        text = backend.extract_page(document, page_no)
+        if text and text.strip():
+            logger.debug(f"{page_no} 페이지 텍스트 추출 성공 (길이: {len(text)}자)")
+            return text
+        logger.warning(f"{page_no} 페이지 텍스트가 비어 있음")
+    except Exception:
+        logger.exception(f"{page_no} 페이지 텍스트 추출 실패")
+    return None
+
+
+# 병렬 추출 최소 기준: 워커 하나가 이보다 적은 페이지를 맡게 되면 단일 프로세스로 추출
+# (프로세스 시작 + 워커별 PDF 열기 비용이 페이지 추출 시간보다 커지는 작은 문서)
+MIN_PAGES_PER_WORKER = 8
+
+# 워커 프로세스마다 한 번만 연 (백엔드, 문서) - 프로세스 풀 initializer에서 설정
+_worker_document: Optional[Tuple[PdfBackend, Any]] = None
+
+
+def _init_worker(file_path: str, backend_name: str) -> None:
+    """
+    워커 프로세스 초기화: 문서를 한 번만 열어 둠 (문서 객체는 프로세스 간 공유 불가)
+    - 작업(페이지 범위)마다 다시 열면 xref/trailer를 매번 다시 파싱함
+    """
+    global _worker_document
+    backend = get_backend(backend_name)
+    _worker_document = (backend, backend.open(file_path))
+
+
+def _extract_page_range(start: int, end: int) -> List[Tuple[int, Optional[str]]]:
+    """
+    워커 프로세스에서 [start, end) 범위의 페이지를 추출하는 함수 (_init_worker가 연 문서 사용)
+    :return: (페이지 번호, 텍스트 또는 None) 리스트
+    """
+    if _worker_document is None:
+        raise RuntimeError("워커 프로세스에 열린 문서가 없습니다.")
+    backend, document = _worker_document
+    return [(page_no, _extract_page(backend, document, page_no)) for page_no in range(start, end)]
+
+
+def iter_pdf_pages(
+    file_path: Union[str, BinaryIO],
+    workers: int = 1,
+    pages_per_task: Optional[int] = None,
+    use_cache: bool = True,
+    backend: Optional[str] = None,
+    min_pages_per_worker: int = MIN_PAGES_PER_WORKER,
+) -> Iterator[Tuple[int, str]]:
+    """
+    PDF 페이지 텍스트를 (페이지 번호, 텍스트) 형태로 순서대로 내보내는 제너레이터
+    - workers > 1 이면 페이지 범위를 프로세스 풀에 나눠 병렬 추출 (문서는 워커 프로세스마다 한 번만 엶)
+    - 페이지 수가 2 × workers × min_pages_per_worker 미만이면 병렬화 이득이 없으므로 단일 프로세스로 추출
+    - 앞선 범위가 끝나는 대로 바로 내보내므로 전체 추출을 기다리지 않음
+    - 실패하거나 비어 있는 페이지는 로그만 남기고 건너뜀 (load_pdf와 동일)
+    - 파일 경로 대신 seek 가능한 바이너리 스트림(Blob 범위 읽기 등)을 넘기면 단일 프로세스로 추출
+    - 파일 경로이고 페이지 텍스트 캐시가 켜져 있으면, 같은 파일 해시의 추출 결과를 재사용
+    :param file_path: 로컬 PDF 파일 경로 또는 바이너리 스트림
+    :param workers: 추출 프로세스 수 (1이면 단일 프로세스, 0 이하면 CPU 수)
+    :param pages_per_task: 작업 하나가 맡을 페이지 수 (기본값: 워커당 약 4개 작업)
+    :param use_cache: 페이지 텍스트 캐시 사용 여부
+    :param backend: 추출 백엔드 이름 (기본값: AppConfig.PDF_BACKEND)
+    :param min_pages_per_worker: 병렬 추출 최소 기준 (0이면 페이지 수와 무관하게 workers대로 병렬 추출)
+    :return: (1부터 시작하는 페이지 번호, 텍스트) 이터레이터
+    """
+
+    extractor = get_backend(backend)
+
+    # 캐시 조회 (파일 경로일 때만, 파일 해시 + 백엔드 이름/버전으로 키를 만듦)
+    cache = get_page_cache() if use_cache and isinstance(file_path, (str, os.PathLike)) else None
+    file_hash = None
+    if cache is not None and Path(file_path).exists():
+        file_hash = file_sha256(str(file_path))
+        cached = cache.get_document(file_hash, extractor.name, extractor.version)
+        if cached is not None:
+            pages = [(page_no, text) for page_no, text in cached if text is not None]
+            logger.info(f"PDF 텍스트 캐시 적중: {file_path} ({len(pages)} 페이지)")
+            yield from pages
+            return
+
+    # 파일 경로 객체 생성 + PDF 열기 (스트림은 워커 프로세스에 넘길 수 없으므로 단일 프로세스)
+    if isinstance(file_path, (str, os.PathLike)):
+        path = Path(file_path)
+        document, total = _open_reader(path, extractor)
+    else:
+        document = extractor.open(file_path)
+        total = extractor.page_count(document)
+        workers = 1
+
+    # 워커 수 결정 (페이지 수보다 많을 필요 없음)
+    if workers <= 0:
+        workers = os.cpu_count() or 1
+    workers = max(1, min(workers, total))
+    if total < 2 * workers * min_pages_per_worker:
+        workers = 1
+
+    # 성공한 페이지 수 집계 + 캐시에 기록할 전체 결과 (빈 페이지는 None)
+    extracted = 0
+    results: List[Tuple[int, Optional[str]]] = []
+    complete = True
+
+    if workers == 1:
+        # 단일 프로세스: 이미 연 문서로 순차 추출
+        for page_no in range(1, total + 1):
+            text = _extract_page(extractor, document, page_no)
+            results.append((page_no, text))
+            if text is not None:
+                extracted += 1
+                yield page_no, text
+    else:
+        # 페이지 범위 분할 (작은 작업 여러 개로 나눠 첫 페이지가 빨리 나오도록 함)
+        step = pages_per_task or max(1, -(-total // (workers * 4)))
+        ranges = [(start, min(start + step, total + 1)) for start in range(1, total + 1, step)]
+
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(str(path), extractor.name)
+        ) as executor:
+            futures = [executor.submit(_extract_page_range, start, end) for start, end in ranges]
+            # 제출 순서대로 결과를 받아 페이지 순서를 유지
+            for (start, end), future in zip(ranges, futures):
+                try:
+                    range_results = future.result()
+                except Exception:
+                    # 워커에서 PDF 자체를 열지 못한 경우 해당 범위만 건너뜀 (캐시에는 기록하지 않음)
+                    logger.exception(f"{start}~{end - 1} 페이지 범위 추출 실패")
+                    complete = False
+                    continue
+                results.extend(range_results)
+                for page_no, text in range_results:
+                    if text is not None:
+                        extracted += 1
+                        yield page_no, text
 
     # 결과 로그 기록
-    logger.info(f"PDF 텍스트 추출 완료: 총 {len(texts)} 페이지 성공")
+    logger.info(f"PDF 텍스트 추출 완료: 총 {extracted} 페이지 성공")
+
+    # 모든 페이지를 끝까지 추출한 경우에만 캐시에 저장
+    if cache is not None and file_hash is not None and complete:
+        cache.put_document(file_hash, extractor.name, extractor.version, results)
+
+
+def load_pdf(file_path: str, workers: int = 1) -> List[str]:
+    """
+    PDF 파일에서 텍스트를 추출하는 함수 (방어 로직 + 로그 포함)
+    :param file_path: 로컬 PDF 파일 경로
+    :param workers: 추출 프로세스 수 (기본값 1: 단일 프로세스)
+    :return: 각 페이지별 텍스트를 담은 리스트
+    """
+    return [text for _, text in iter_pdf_pages(file_path, workers=workers)]
+
+
+def benchmark(file_path: str, workers: int, repeat: int = 3, backend: Optional[str] = None) -> None:
+    """
+    단일 프로세스 추출과 병렬 추출의 소요 시간을 비교하는 함수
+    - parallel: 페이지 수와 무관하게 workers개 프로세스로 추출, auto: 기본 기준(MIN_PAGES_PER_WORKER) 적용
+    :param file_path: 로컬 PDF 파일 경로
+    :param workers: 병렬 추출 프로세스 수
+    :param repeat: 반복 측정 횟수 (최솟값을 사용)
+    :param backend: 추출 백엔드 이름 (기본값: AppConfig.PDF_BACKEND)
+    """
+    timings = {}
+    outputs = {}
+    runs = (
+        ("serial", 1, MIN_PAGES_PER_WORKER),
+        (f"parallel(workers={workers})", workers, 0),
+        (f"auto(workers={workers})", workers, MIN_PAGES_PER_WORKER),
+    )
+    for label, n, min_pages in runs:
+        best = float("inf")
+        for _ in range(repeat):
+            started = time.perf_counter()
+            outputs[label] = list(
+                iter_pdf_pages(file_path, workers=n, use_cache=False, backend=backend, min_pages_per_worker=min_pages)
+            )
+            best = min(best, time.perf_counter() - started)
+        timings[label] = best
+
+    # 두 경로의 결과가 같은지 확인
+    serial_out = outputs["serial"]
+    same = all(out == serial_out for out in outputs.values())
+
+    serial_time = timings["serial"]
+    for label, elapsed in timings.items():
+        print(f"{label:<24} {elapsed * 1000:9.1f} ms  (x{serial_time / elapsed:.2f})")
+    print(f"pages={len(serial_out)}, 결과 일치={same}")
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="PDF 텍스트 추출 / 벤치마크")
+    parser.add_argument("file_path", type=str, help="추출할 PDF 파일 경로")
+    parser.add_argument("--workers", type=int, default=0, help="추출 프로세스 수 (0: CPU 수)")
+    parser.add_argument("--bench", action="store_true", help="단일 프로세스 대비 소요 시간 비교")
+    parser.add_argument("--repeat", type=int, default=3, help="벤치마크 반복 횟수")
+    parser.add_argument("--no-cache", dest="use_cache", action="store_false", help="페이지 텍스트 캐시 사용 안 함")
+    parser.add_argument("--backend", type=str, default=None, help="추출 백엔드 (기본값: PDF_BACKEND 설정)")
+    args = parser.parse_args()
 
-    return texts
+    if args.bench:
+        benchmark(args.file_path, workers=args.workers or (os.cpu_count() or 1), repeat=args.repeat, backend=args.backend)
+    else:
+        for page_no, text in iter_pdf_pages(
+            args.file_path, workers=args.workers, use_cache=args.use_cache, backend=args.backend
+        ):
+            print(f"--- page {page_no} ({len(text)}자)")
@@ -0,0 +1,87 @@
+"""
+manifest.py : 증분 인덱싱용 청크 해시 매니페스트
+- parent_id(문서) 단위로 원본 파일 해시와 chunk_id → 청크 내용 해시를 로컬 JSON으로 보관한다.
+- 다음 실행에서 파일 해시가 같으면 전체를 건너뛰고, 달라졌으면 새/변경 청크만 임베딩·업로드하며
+  더 이상 존재하지 않는 chunk_id는 인덱스에서 삭제한다.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from app.config import AppConfig
+from app.ingest.hashing import content_hash, file_sha256  # noqa: F401 - 기존 import 경로 유지
+
+logger = logging.getLogger("entraaid_app")
+
+
+def _manifest_dir() -> str:
+    return os.path.join(AppConfig.CACHE_DIR, "manifests")
+
+
+class ChunkManifest:
+    """
+    문서 하나의 파일 해시 + chunk_id별 내용 해시
+    - id_scheme: chunk_id 생성 방식 ("position" | "content")
+    - duplicates: 대표 chunk_id → 임베딩을 생략한 중복 청크 위치 목록
+    """
+
+    def __init__(
+        self,
+        parent_id: str,
+        file_hash: Optional[str] = None,
+        chunks: Optional[Dict[str, str]] = None,
+        id_scheme: str = "position",
+        duplicates: Optional[Dict[str, List[Dict[str, Any]]]] = None,
+    ):
+        self.parent_id = parent_id
+        self.file_hash = file_hash
+        self.chunks: Dict[str, str] = dict(chunks or {})
+        self.id_scheme = id_scheme
+        self.duplicates: Dict[str, List[Dict[str, Any]]] = dict(duplicates or {})
+
+    @staticmethod
+    def path_for(parent_id: str) -> str:
+        safe = re.sub(r"[^\w.-]", "_", parent_id)
+        return os.path.join(_manifest_dir(), f"{safe}.json")
+
+    @classmethod
+    def load(cls, parent_id: str) -> "ChunkManifest":
+        """저장된 매니페스트를 읽는다 (없거나 손상되었으면 빈 매니페스트)"""
+        path = cls.path_for(parent_id)
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+            return cls(
+                parent_id,
+                data.get("file_hash"),
+                data.get("chunks"),
+                data.get("id_scheme", "position"),
+                data.get("duplicates"),
+            )
+        except FileNotFoundError:
+            return cls(parent_id)
+        except (OSError, ValueError) as exc:
+            logger.warning("매니페스트를 읽을 수 없어 새로 만듭니다: %s (%s)", path, exc)
+            return cls(parent_id)
+
+    def save(self) -> None:
+        """임시 파일에 쓴 뒤 교체해 중간 실패에도 이전 매니페스트를 보존"""
+        path = self.path_for(self.parent_id)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "parent_id": self.parent_id,
+                    "file_hash": self.file_hash,
+                    "id_scheme": self.id_scheme,
+                    "chunks": self.chunks,
+                    "duplicates": self.duplicates,
+                },
+                f,
+                ensure_ascii=False,
+            )
+        os.replace(tmp_path, path)
@@ -0,0 +1,139 @@
+"""
+page_cache.py : PDF 페이지 텍스트 캐시
+- 키: (파일 SHA-256, 추출 백엔드, 백엔드 버전, 페이지 번호)
+- 값: zlib 압축한 UTF-8 텍스트 (빈/실패 페이지는 NULL로 기록해 다시 추출하지 않음)
+- 문서 단위로 모든 페이지가 기록된 경우에만 적중으로 보므로, 중간에 끊긴 추출 결과는 쓰지 않는다.
+- 청크 크기/overlap만 바꿔 다시 인덱싱할 때 PDF 파싱을 건너뛰고 청킹부터 다시 실행할 수 있다.
+"""
+
+from __future__ import annotations
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("entraaid_app")
+
+# 압축 수준 (페이지 텍스트는 작아서 6 이상은 크기 차이가 거의 없음)
+_COMPRESS_LEVEL = 6
+
+_default_cache: Optional["PageTextCache"] = None
+_default_lock = threading.Lock()
+
+
+class PageTextCache:
+    """SQLite(WAL) 기반 페이지 텍스트 캐시 (프로세스 간 공유 가능)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS documents ("
+            " file_hash TEXT NOT NULL,"
+            " backend TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " page_count INTEGER NOT NULL,"
+            " created_at REAL NOT NULL,"
+            " PRIMARY KEY (file_hash, backend, version))"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS pages ("
+            " file_hash TEXT NOT NULL,"
+            " backend TEXT NOT NULL,"
+            " version TEXT NOT NULL,"
+            " page_no INTEGER NOT NULL,"
+            " text BLOB,"
+            " PRIMARY KEY (file_hash, backend, version, page_no))"
+        )
+        self._conn.commit()
+
+    def get_document(self, file_hash: str, backend: str, version: str) -> Optional[List[Tuple[int, Optional[str]]]]:
+        """
+        문서 전체 페이지를 (페이지 번호, 텍스트 또는 None) 리스트로 반환
+        - 기록된 적 없거나 일부 페이지만 있으면 None
+        """
+        key = (file_hash, backend, version)
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT page_count FROM documents WHERE file_hash=? AND backend=? AND version=?", key
+            ).fetchone()
+            rows = (
+                self._conn.execute(
+                    "SELECT page_no, text FROM pages WHERE file_hash=? AND backend=? AND version=? ORDER BY page_no",
+                    key,
+                ).fetchall()
+                if row
+                else []
+            )
+            if not row or len(rows) != row[0]:
+                self.misses += 1
+                return None
+            self.hits += 1
+        return [(page_no, zlib.decompress(blob).decode("utf-8") if blob is not None else None) for page_no, blob in rows]
+
+    def put_document(
+        self,
+        file_hash: str,
+        backend: str,
+        version: str,
+        pages: Sequence[Tuple[int, Optional[str]]],
+    ) -> None:
+        """문서의 모든 페이지를 한 트랜잭션으로 기록"""
+        key = (file_hash, backend, version)
+        rows = [
+            (*key, page_no, zlib.compress(text.encode("utf-8"), _COMPRESS_LEVEL) if text is not None else None)
+            for page_no, text in pages
+        ]
+        with self._lock:
+            with self._conn:
+                self._conn.execute("DELETE FROM pages WHERE file_hash=? AND backend=? AND version=?", key)
+                self._conn.executemany(
+                    "INSERT INTO pages(file_hash, backend, version, page_no, text) VALUES (?, ?, ?, ?, ?)", rows
+                )
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO documents(file_hash, backend, version, page_count, created_at)"
+                    " VALUES (?, ?, ?, ?, ?)",
+                    (*key, len(rows), time.time()),
+                )
+        logger.debug("페이지 텍스트 캐시 저장: %s (%s %s, %d 페이지)", file_hash[:12], backend, version, len(rows))
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            documents = self._conn.execute("SELECT COUNT(*) FROM documents").fetchone()[0]
+            pages, size = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(text)), 0) FROM pages").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "documents": documents,
+            "pages": pages,
+            "bytes": size,
+        }
+
+
+def get_page_cache() -> Optional[PageTextCache]:
+    """
+    설정으로 켜져 있으면 공용 캐시(CACHE_DIR/pages.sqlite), 꺼져 있으면 None
+    - 설정은 호출 시점에 읽음: 로더/추출 워커는 캐시를 쓰지 않으면 Azure 환경변수 없이도 import·실행 가능
+    """
+    global _default_cache
+    from app.config import AppConfig
+
+    if not AppConfig.PAGE_CACHE_ENABLED:
+        return None
+    with _default_lock:
+        if _default_cache is None:
+            _default_cache = PageTextCache(os.path.join(AppConfig.CACHE_DIR, "pages.sqlite"))
+    return _default_cache
@@ -0,0 +1,225 @@
+"""
+pdf_backends.py : PDF 텍스트 추출 백엔드 레지스트리 + 속도 벤치마크
+- pypdf / PyPDF2 / PyMuPDF(fitz)를 같은 인터페이스(open, page_count, extract_page)로 감싼다.
+- 설치된 백엔드만 사용할 수 있고, 인덱싱에서 쓸 백엔드는 AppConfig.PDF_BACKEND로 고른다.
+  (설정은 이름을 넘기지 않았을 때만 읽으므로, 로더/추출 워커는 Azure 환경변수 없이도 import할 수 있다.)
+- 벤치마크는 백엔드마다 별도 프로세스에서 말뭉치 전체를 추출해 pages/sec, 최대 RSS, 빈 페이지 비율을 비교한다.
+
+사용 예:
+    python -m app.ingest.pdf_backends docs/ --bench
+"""
+
+import abc
+import importlib
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, BinaryIO, Dict, List, Optional, Type, Union
+
+try:
+    # 최대 RSS 측정용 (Windows에는 없음)
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None  # type: ignore[assignment]
+
+
+class PdfBackend(abc.ABC):
+    """
+    추출 백엔드 공통 인터페이스
+    - 라이브러리는 생성 시점에 import 하므로, 설치되지 않았으면 ImportError
+    - 세 메서드를 모두 구현하지 않은 백엔드는 생성 시점에 TypeError
+    """
+
+    name = ""
+    module = ""
+
+    def __init__(self) -> None:
+        self.lib = importlib.import_module(self.module)
+        self.version = str(getattr(self.lib, "__version__", "") or getattr(self.lib, "VersionBind", ""))
+
+    @abc.abstractmethod
+    def open(self, source: Union[str, BinaryIO]) -> Any:
+        """파일 경로 또는 바이너리 스트림으로 문서 열기"""
+
+    @abc.abstractmethod
+    def page_count(self, document: Any) -> int:
+        """문서의 페이지 수"""
+
+    @abc.abstractmethod
+    def extract_page(self, document: Any, page_no: int) -> str:
+        """1부터 시작하는 페이지 번호의 텍스트 (실패 시 예외)"""
+
+
+_REGISTRY: Dict[str, Type[PdfBackend]] = {}
+
+
+def register_backend(cls: Type[PdfBackend]) -> Type[PdfBackend]:
+    """백엔드 클래스를 이름으로 등록하는 데코레이터"""
+    _REGISTRY[cls.name] = cls
+    return cls
+
+
+@register_backend
+class PypdfBackend(PdfBackend):
+    name = "pypdf"
+    module = "pypdf"
+
+    def open(self, source: Union[str, BinaryIO]) -> Any:
+        return self.lib.PdfReader(source)
+
+    def page_count(self, document: Any) -> int:
+        return len(document.pages)
+
+    def extract_page(self, document: Any, page_no: int) -> str:
+        return document.pages[page_no - 1].extract_text()
+
+
+@register_backend
+class PyPDF2Backend(PypdfBackend):
+    name = "PyPDF2"
+    module = "PyPDF2"
+
+
+@register_backend
+class PyMuPDFBackend(PdfBackend):
+    name = "pymupdf"
+    module = "fitz"
+
+    def open(self, source: Union[str, BinaryIO]) -> Any:
+        if isinstance(source, (str, os.PathLike)):
+            return self.lib.open(source)
+        # 스트림은 메모리로 읽어 엶 (PyMuPDF는 파이썬 파일 객체를 직접 읽지 못함)
+        return self.lib.open(stream=source.read(), filetype="pdf")
+
+    def page_count(self, document: Any) -> int:
+        return document.page_count
+
+    def extract_page(self, document: Any, page_no: int) -> str:
+        return document[page_no - 1].get_text()
+
+
+_instances: Dict[str, PdfBackend] = {}
+
+
+def default_backend_name() -> str:
+    """설정의 PDF_BACKEND (호출 시점에 읽음)"""
+    from app.config import AppConfig
+
+    return AppConfig.PDF_BACKEND
+
+
+def get_backend(name: Optional[str] = None) -> PdfBackend:
+    """
+    이름으로 백엔드 인스턴스를 반환 (기본값: AppConfig.PDF_BACKEND)
+    - 등록되지 않았으면 ValueError, 라이브러리가 설치되지 않았으면 ImportError
+    """
+    name = name or default_backend_name()
+    if name not in _instances:
+        if name not in _REGISTRY:
+            raise ValueError(f"알 수 없는 PDF 백엔드: {name} (등록된 백엔드: {', '.join(_REGISTRY)})")
+        _instances[name] = _REGISTRY[name]()
+    return _instances[name]
+
+
+def available_backends() -> List[str]:
+    """현재 환경에 설치된 백엔드 이름 목록"""
+    names = []
+    for name in _REGISTRY:
+        try:
+            get_backend(name)
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def _peak_rss_mb() -> Optional[float]:
+    if resource is None:
+        return None
+    # ru_maxrss 단위: Linux는 KB, macOS는 바이트
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(rss / 1024 / 1024 if sys.platform == "darwin" else rss / 1024, 1)
+
+
+def _bench_backend(name: str, files: List[str]) -> Dict[str, Any]:
+    """(별도 프로세스) 백엔드 하나로 말뭉치 전체를 추출"""
+    backend = get_backend(name)
+    pages = empty = failed = 0
+    started = time.perf_counter()
+    for path in files:
+        try:
+            document = backend.open(path)
+            count = backend.page_count(document)
+        except Exception:  # noqa: BLE001 - 열리지 않는 파일은 실패로만 집계
+            failed += 1
+            continue
+        for page_no in range(1, count + 1):
+            pages += 1
+            try:
+                text = backend.extract_page(document, page_no)
+            except Exception:  # noqa: BLE001
+                text = ""
+            if not text or not text.strip():
+                empty += 1
+    elapsed = time.perf_counter() - started
+    return {
+        "backend": name,
+        "version": backend.version,
+        "files": len(files),
+        "failed_files": failed,
+        "pages": pages,
+        "seconds": round(elapsed, 3),
+        "pages_per_sec": round(pages / elapsed, 1) if elapsed else 0.0,
+        "peak_rss_mb": _peak_rss_mb(),
+        "empty_page_rate": round(empty / pages, 4) if pages else 0.0,
+    }
+
+
+def benchmark(files: List[str], backends: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+    """
+    설치된 백엔드별로 말뭉치 추출 성능을 측정
+    - 최대 RSS가 섞이지 않도록 백엔드마다 새 프로세스(spawn)에서 실행
+    :param files: PDF 파일 경로 목록
+    :param backends: 측정할 백엔드 이름 (기본값: 설치된 전체)
+    :return: 백엔드별 측정 결과 (pages/sec 내림차순)
+    """
+    names = backends or available_backends()
+    results = []
+    context = multiprocessing.get_context("spawn")
+    for name in names:
+        with ProcessPoolExecutor(max_workers=1, mp_context=context) as executor:
+            results.append(executor.submit(_bench_backend, name, files).result())
+    results.sort(key=lambda r: r["pages_per_sec"], reverse=True)
+
+    print(f"{'backend':<10} {'version':<10} {'pages':>7} {'pages/s':>9} {'peak RSS(MB)':>13} {'empty':>7} {'failed':>7}")
+    for r in results:
+        rss = f"{r['peak_rss_mb']:.1f}" if r["peak_rss_mb"] is not None else "-"
+        print(
+            f"{r['backend']:<10} {r['version']:<10} {r['pages']:>7} {r['pages_per_sec']:>9.1f} "
+            f"{rss:>13} {r['empty_page_rate']:>7.1%} {r['failed_files']:>7}"
+        )
+    return results
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    from app.ingest.bulk import expand_inputs
+
+    parser = argparse.ArgumentParser(description="PDF 추출 백엔드 목록 / 벤치마크")
+    parser.add_argument("inputs", nargs="*", help="PDF 파일, 디렉터리 또는 글롭 패턴")
+    parser.add_argument("--bench", action="store_true", help="백엔드별 추출 속도 비교")
+    parser.add_argument("--backends", type=str, default="", help="측정할 백엔드 (쉼표 구분, 기본값: 설치된 전체)")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark(expand_inputs(args.inputs), [b for b in args.backends.split(",") if b] or None)
+    else:
+        installed = available_backends()
+        for backend_name in _REGISTRY:
+            mark = "*" if backend_name == default_backend_name() else " "
+            status = f"v{get_backend(backend_name).version}" if backend_name in installed else "미설치"
+            print(f"{mark} {backend_name:<10} {status}")
@@ -0,0 +1,207 @@
+"""
+pipeline.py : 제한된 큐로 연결된 스트리밍 스테이지 파이프라인
+- 각 스테이지는 별도 스레드에서 실행되고, 스테이지 사이는 maxsize가 있는 큐로 연결된다.
+- 큐가 가득 차면 앞 스테이지가 대기하므로 메모리 사용량은 큐 크기 × 항목 크기로 제한된다.
+- 스테이지별 처리량과 큐 깊이, 입력/출력 대기 시간을 집계해 병목 스테이지를 드러낸다.
+"""
+
+import logging
+import queue
+import threading
+import time
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+logger = logging.getLogger("entraaid_app")
+
+# 스테이지 정의: (이름, 입력 이터레이터를 받아 출력 이터러블을 돌려주는 함수)
+Stage = Tuple[str, Callable[[Iterator[Any]], Iterable[Any]]]
+
+# 큐 종료 표시
+_DONE = object()
+
+# 큐 대기 시 중단 여부를 확인하는 주기(초)
+_POLL_INTERVAL = 0.1
+
+
+class PipelineAborted(Exception):
+    """다른 스테이지의 오류로 파이프라인이 중단되었음을 알리는 예외"""
+
+
+class StageStats:
+    """
+    스테이지 하나의 실행 통계
+    - wait_in: 입력 큐가 비어 기다린 시간 (앞 스테이지가 느림)
+    - wait_out: 출력 큐가 가득 차 기다린 시간 (뒤 스테이지가 느림)
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self.items_in = 0
+        self.items_out = 0
+        self.wait_in = 0.0
+        self.wait_out = 0.0
+        self.started = 0.0
+        self.finished = 0.0
+        self.max_queue_depth = 0
+        self._depth_sum = 0
+        self._depth_samples = 0
+
+    def sample_depth(self, depth: int) -> None:
+        self.max_queue_depth = max(self.max_queue_depth, depth)
+        self._depth_sum += depth
+        self._depth_samples += 1
+
+    @property
+    def elapsed(self) -> float:
+        end = self.finished or time.perf_counter()
+        return max(end - self.started, 0.0) if self.started else 0.0
+
+    @property
+    def busy(self) -> float:
+        return max(self.elapsed - self.wait_in - self.wait_out, 0.0)
+
+    @property
+    def throughput(self) -> float:
+        elapsed = self.elapsed
+        return self.items_out / elapsed if elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        avg_depth = self._depth_sum / self._depth_samples if self._depth_samples else 0.0
+        return {
+            "stage": self.name,
+            "items_in": self.items_in,
+            "items_out": self.items_out,
+            "elapsed_sec": round(self.elapsed, 3),
+            "busy_sec": round(self.busy, 3),
+            "wait_in_sec": round(self.wait_in, 3),
+            "wait_out_sec": round(self.wait_out, 3),
+            "throughput_per_sec": round(self.throughput, 2),
+            "avg_queue_depth": round(avg_depth, 2),
+            "max_queue_depth": self.max_queue_depth,
+        }
+
+
+def _put(q: "queue.Queue[Any]", item: Any, stats: StageStats, abort: threading.Event) -> None:
+    started = time.perf_counter()
+    try:
+        while True:
+            if abort.is_set():
+                raise PipelineAborted()
+            try:
+                q.put(item, timeout=_POLL_INTERVAL)
+                return
+            except queue.Full:
+                continue
+    finally:
+        stats.wait_out += time.perf_counter() - started
+
+
+def _iter_queue(q: "queue.Queue[Any]", stats: StageStats, abort: threading.Event) -> Iterator[Any]:
+    while True:
+        stats.sample_depth(q.qsize())
+        started = time.perf_counter()
+        try:
+            while True:
+                if abort.is_set():
+                    raise PipelineAborted()
+                try:
+                    item = q.get(timeout=_POLL_INTERVAL)
+                    break
+                except queue.Empty:
+                    continue
+        finally:
+            stats.wait_in += time.perf_counter() - started
+        if item is _DONE:
+            return
+        stats.items_in += 1
+        yield item
+
+
+def _log_progress(stats: Sequence[StageStats]) -> None:
+    logger.info(
+        "⏱️ 파이프라인 진행: "
+        + " | ".join(
+            f"{s.name} {s.items_out}건 ({s.throughput:.1f}/s, 큐 최대 {s.max_queue_depth})" for s in stats
+        )
+    )
+
+
+def run_pipeline(
+    source: Iterable[Any],
+    stages: Sequence[Stage],
+    queue_size: int = 4,
+    source_name: str = "source",
+    report_interval: Optional[float] = 5.0,
+) -> List[StageStats]:
+    """
+    소스와 스테이지들을 각각 스레드로 실행하고 제한된 큐로 연결한다.
+    - 한 스테이지에서 오류가 나면 전체를 중단하고 첫 번째 오류를 다시 발생시킨다.
+    - 마지막 스테이지의 출력은 개수만 집계하고 버린다.
+    :param source: 첫 스테이지로 들어갈 항목 이터러블
+    :param stages: (이름, 변환 함수) 목록
+    :param queue_size: 스테이지 사이 큐의 최대 항목 수
+    :param source_name: 통계에 표시할 소스 이름
+    :param report_interval: 진행 로그 주기(초), None이면 끝날 때만 기록
+    :return: 소스를 포함한 스테이지별 통계
+    """
+    abort = threading.Event()
+    errors: List[BaseException] = []
+    all_stats = [StageStats(source_name)] + [StageStats(name) for name, _ in stages]
+    queues: List["queue.Queue[Any]"] = [queue.Queue(maxsize=max(1, queue_size)) for _ in stages]
+
+    def run_source() -> None:
+        stats = all_stats[0]
+        stats.started = time.perf_counter()
+        try:
+            for item in source:
+                stats.items_out += 1
+                _put(queues[0], item, stats, abort)
+            _put(queues[0], _DONE, stats, abort)
+        except PipelineAborted:
+            pass
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+            abort.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    def run_stage(index: int, func: Callable[[Iterator[Any]], Iterable[Any]]) -> None:
+        stats = all_stats[index + 1]
+        out_q = queues[index + 1] if index + 1 < len(queues) else None
+        stats.started = time.perf_counter()
+        try:
+            for item in func(_iter_queue(queues[index], stats, abort)):
+                stats.items_out += 1
+                if out_q is not None:
+                    _put(out_q, item, stats, abort)
+            if out_q is not None:
+                _put(out_q, _DONE, stats, abort)
+        except PipelineAborted:
+            pass
+        except BaseException as exc:  # noqa: BLE001
+            errors.append(exc)
+            abort.set()
+        finally:
+            stats.finished = time.perf_counter()
+
+    threads = [threading.Thread(target=run_source, name=f"pipeline-{source_name}", daemon=True)]
+    for index, (name, func) in enumerate(stages):
+        threads.append(
+            threading.Thread(target=run_stage, args=(index, func), name=f"pipeline-{name}", daemon=True)
+        )
+    for thread in threads:
+        thread.start()
+
+    # 주기적으로 진행 상황 기록
+    last_report = time.perf_counter()
+    for thread in threads:
+        while thread.is_alive():
+            thread.join(timeout=_POLL_INTERVAL)
+            if report_interval and time.perf_counter() - last_report >= report_interval:
+                _log_progress(all_stats)
+                last_report = time.perf_counter()
+
+    _log_progress(all_stats)
+    if errors:
+        raise errors[0]
+    return all_stats
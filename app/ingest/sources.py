@@ -0,0 +1,284 @@
+"""
+sources.py : 로컬 경로 대신 저장소(Blob Storage)에서 직접 PDF를 읽어 인덱싱
+- 컨테이너의 PDF 목록을 조회하고, 파일을 디스크에 내려받지 않고 범위(Range) 읽기 스트림으로 추출 스테이지에 넘긴다.
+- Blob ETag를 로컬 상태 파일에 기록해 두고, 다음 실행에서 ETag가 같은 Blob은 건너뛴다.
+- LocalSource는 디렉터리를 같은 인터페이스로 감싼 대체 소스 (오프라인 테스트용, ETag 대신 mtime/크기 사용)
+- 문서 id는 소스 라벨 + 소스 루트 기준 경로로 만든다. 절대 경로/연결 문자열이 들어가지 않으므로 체크아웃을 옮겨도 같고,
+  라벨이 없는 LocalSource는 같은 디렉터리를 bulk.py로 인덱싱할 때와 같은 id가 된다.
+
+사용 예:
+    python -m app.ingest.sources --prefix manuals/ --delta
+    python -m app.ingest.sources --local docs/
+"""
+
+import io
+import json
+import logging
+import os
+import time
+from collections import OrderedDict
+from typing import Any, BinaryIO, Dict, Iterator, List, Optional
+
+from app.config import AppConfig
+from app.ingest.indexer import document_id, index_pdf, prebuild_local_index
+
+logger = logging.getLogger("entraaid_app")
+
+
+class SourceItem:
+    """소스 안의 PDF 하나 (이름 + 변경 식별값)"""
+
+    __slots__ = ("name", "etag", "size")
+
+    def __init__(self, name: str, etag: str, size: int):
+        self.name = name
+        self.etag = etag
+        self.size = size
+
+    def __repr__(self) -> str:
+        return f"SourceItem(name={self.name!r}, etag={self.etag!r}, size={self.size})"
+
+
+class _BlobRangeReader(io.RawIOBase):
+    """
+    Blob을 범위 요청으로 읽는 seek 가능한 스트림
+    - PdfReader는 파일 끝의 xref부터 읽고 객체 위치로 이리저리 이동하므로,
+      block_size 단위로 정렬된 블록을 요청하고 최근 블록 몇 개를 메모리에 보관해 같은 구간을 다시 받지 않음
+    - ETag를 고정해 읽는 도중 Blob이 바뀌면 요청이 실패하도록 함
+    """
+
+    def __init__(self, blob_client: Any, size: int, etag: str, block_size: int, max_blocks: int = 8):
+        from azure.core import MatchConditions
+
+        self._blob = blob_client
+        self._size = size
+        self._etag = etag
+        self._match = MatchConditions.IfNotModified
+        self._block_size = block_size
+        self._max_blocks = max(1, max_blocks)
+        self._blocks: "OrderedDict[int, bytes]" = OrderedDict()
+        self._pos = 0
+        self.requests = 0
+        self.bytes_read = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._pos
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_SET:
+            self._pos = offset
+        elif whence == io.SEEK_CUR:
+            self._pos += offset
+        elif whence == io.SEEK_END:
+            self._pos = self._size + offset
+        else:
+            raise ValueError(f"잘못된 whence 값: {whence}")
+        self._pos = max(0, self._pos)
+        return self._pos
+
+    def _block(self, index: int) -> bytes:
+        block = self._blocks.get(index)
+        if block is not None:
+            self._blocks.move_to_end(index)
+            return block
+        offset = index * self._block_size
+        length = min(self._block_size, self._size - offset)
+        block = self._blob.download_blob(
+            offset=offset, length=length, etag=self._etag, match_condition=self._match
+        ).readall()
+        self.requests += 1
+        self.bytes_read += len(block)
+        self._blocks[index] = block
+        if len(self._blocks) > self._max_blocks:
+            self._blocks.popitem(last=False)
+        return block
+
+    def readinto(self, buffer: Any) -> int:
+        if self._pos >= self._size:
+            return 0
+        index, skip = divmod(self._pos, self._block_size)
+        data = self._block(index)[skip : skip + len(buffer)]
+        buffer[: len(data)] = data
+        self._pos += len(data)
+        return len(data)
+
+
+class BlobSource:
+    """Blob 컨테이너의 PDF 목록 조회 + 범위 읽기 스트림"""
+
+    def __init__(
+        self,
+        conn_str: str = AppConfig.BLOB_CONN_STR,
+        container: str = AppConfig.BLOB_CONTAINER,
+        prefix: str = AppConfig.BLOB_PREFIX,
+        block_size: int = AppConfig.BLOB_READ_BLOCK_MB * 1024 * 1024,
+        container_client: Optional[Any] = None,
+        label: Optional[str] = None,
+    ):
+        """:param label: 문서 id 접두사 (기본값: 컨테이너 이름)"""
+        if container_client is None:
+            if not conn_str or not container:
+                raise ValueError("BLOB_CONN_STR와 BLOB_CONTAINER를 설정해야 합니다.")
+            # Blob 소스를 쓸 때만 필요한 의존성
+            from azure.storage.blob import ContainerClient
+
+            container_client = ContainerClient.from_connection_string(conn_str, container)
+        self._container = container_client
+        self.prefix = prefix
+        self.block_size = max(64 * 1024, block_size)
+        container_name = getattr(container_client, "container_name", container)
+        self.name = f"blob:{container_name}"
+        self.label = container_name if label is None else label
+
+    def list(self) -> Iterator[SourceItem]:
+        for blob in self._container.list_blobs(name_starts_with=self.prefix or None):
+            if blob.name.lower().endswith(".pdf"):
+                yield SourceItem(blob.name, blob.etag.strip('"'), blob.size)
+
+    def open(self, item: SourceItem) -> BinaryIO:
+        raw = _BlobRangeReader(self._container.get_blob_client(item.name), item.size, f'"{item.etag}"', self.block_size)
+        return io.BufferedReader(raw)  # type: ignore[return-value]
+
+
+class LocalSource:
+    """로컬 디렉터리를 BlobSource와 같은 인터페이스로 감싼 대체 소스"""
+
+    def __init__(self, root: str, prefix: str = "", label: str = ""):
+        """:param label: 문서 id 접두사 (기본값 없음: 루트 기준 상대 경로만 사용, bulk.expand_documents와 같은 id)"""
+        self.root = os.path.abspath(root)
+        self.prefix = prefix
+        self.name = f"local:{self.root}"
+        self.label = label
+
+    def list(self) -> Iterator[SourceItem]:
+        for dirpath, _, filenames in sorted(os.walk(self.root)):
+            for filename in sorted(filenames):
+                path = os.path.join(dirpath, filename)
+                name = os.path.relpath(path, self.root).replace(os.sep, "/")
+                if not filename.lower().endswith(".pdf") or not name.startswith(self.prefix):
+                    continue
+                stat = os.stat(path)
+                yield SourceItem(name, f"{stat.st_mtime_ns:x}-{stat.st_size:x}", stat.st_size)
+
+    def open(self, item: SourceItem) -> BinaryIO:
+        return open(os.path.join(self.root, item.name), "rb")
+
+
+class EtagState:
+    """소스별 마지막으로 인덱싱에 성공한 ETag 기록 (JSON)"""
+
+    def __init__(self, path: Optional[str] = None):
+        self.path = path or os.path.join(AppConfig.CACHE_DIR, "source_etags.json")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.entries = json.load(f)
+        except FileNotFoundError:
+            pass
+        except (OSError, ValueError) as exc:
+            logger.warning("ETag 상태 파일을 읽을 수 없어 처음부터 시작합니다: %s (%s)", self.path, exc)
+
+    def is_current(self, key: str, etag: str) -> bool:
+        return self.entries.get(key, {}).get("etag") == etag
+
+    def record(self, key: str, etag: str) -> None:
+        self.entries[key] = {"etag": etag, "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S")}
+        os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.entries, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, self.path)
+
+
+def source_document_id(source: Any, item: SourceItem) -> str:
+    """소스 라벨 + 소스 루트 기준 경로로 만든 문서 id (머신/체크아웃 위치와 무관)"""
+    label = getattr(source, "label", "")
+    return document_id(f"{label}/{item.name}" if label else item.name)
+
+
+def index_source(
+    source: Any,
+    delta: bool = AppConfig.INGEST_DELTA,
+    state_path: Optional[str] = None,
+) -> Dict[str, Any]:
+    """
+    소스의 PDF를 차례로 스트리밍 인덱싱
+    - ETag가 이전 성공 실행과 같으면 열지도 않고 건너뜀
+    - 업로드 실패가 있으면 ETag를 기록하지 않아 다음 실행에서 다시 처리
+    :param source: BlobSource 또는 LocalSource
+    :param delta: 변경된 청크만 재인덱싱
+    :param state_path: ETag 상태 파일 경로 (기본값: CACHE_DIR/source_etags.json)
+    :return: 처리 결과 요약
+    """
+    state = EtagState(state_path)
+    started = time.perf_counter()
+    counts = {"listed": 0, "unchanged": 0, "indexed": 0, "failed": 0, "pages": 0, "chunks": 0}
+    failed: List[str] = []
+
+    for item in source.list():
+        counts["listed"] += 1
+        key = f"{source.name}/{item.name}"
+        if state.is_current(key, item.etag):
+            counts["unchanged"] += 1
+            continue
+
+        logger.info("☁️ 스트리밍 인덱싱: %s (%.1fMB)", item.name, item.size / 1024 / 1024)
+        with source.open(item) as stream:
+            # 문서 id는 전체 경로로 만들어 teamA/guide.pdf 와 teamB/guide.pdf 를 구분
+            summary = index_pdf(
+                item.name,
+                delta=delta,
+                stream=stream,
+                file_hash=f"etag:{item.etag}",
+                doc_id=source_document_id(source, item),
+            )
+
+        if summary is None or summary.get("upload", {}).get("failed"):
+            counts["failed"] += 1
+            failed.append(item.name)
+            continue
+        state.record(key, item.etag)
+        counts["indexed"] += 1
+        counts["pages"] += summary.get("pages", 0)
+        counts["chunks"] += summary.get("chunks", 0)
+
+    if counts["indexed"]:
+        prebuild_local_index()
+    result: Dict[str, Any] = {
+        **counts,
+        "failed_items": failed,
+        "elapsed_sec": round(time.perf_counter() - started, 3),
+    }
+    logger.info(
+        "☁️ 소스 인덱싱 완료: 목록 %d개, 변경 없음 %d개, 인덱싱 %d개, 실패 %d개",
+        counts["listed"],
+        counts["unchanged"],
+        counts["indexed"],
+        counts["failed"],
+    )
+    return result
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Blob Storage(또는 로컬 디렉터리)에서 스트리밍 인덱싱")
+    parser.add_argument("--local", type=str, default=None, help="Blob 대신 사용할 로컬 디렉터리")
+    parser.add_argument("--prefix", type=str, default=AppConfig.BLOB_PREFIX, help="Blob 이름 접두사")
+    parser.add_argument("--delta", action="store_true", default=AppConfig.INGEST_DELTA, help="변경된 청크만 재인덱싱")
+    parser.add_argument("--state", type=str, default=None, help="ETag 상태 파일 경로")
+    parser.add_argument("--label", type=str, default=None, help="문서 id 접두사 (기본값: 로컬은 없음, Blob은 컨테이너 이름)")
+    args = parser.parse_args()
+
+    if args.local:
+        selected: Any = LocalSource(args.local, prefix=args.prefix, label=args.label or "")
+    else:
+        selected = BlobSource(prefix=args.prefix, label=args.label)
+    print(json.dumps(index_source(selected, delta=args.delta, state_path=args.state), ensure_ascii=False))
@@ -0,0 +1,234 @@
+"""
+uploader.py : Azure AI Search 대량 업로드 엔진
+- 문서 수와 페이로드 크기(바이트) 기준으로 배치를 나누고, 여러 배치를 동시에 전송한다.
+- IndexingResult에서 실패한 키만 골라 재시도하고(409/422/429/5xx), 나머지 실패는 요약에 남긴다.
+- SearchClient 대신 index_documents(batch=...)를 가진 객체를 넣으면 로컬 가짜 엔드포인트로도 검증할 수 있다.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from typing import Any, Dict, Iterable, List, Optional, Set
+
+from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError, ServiceRequestError, ServiceResponseError
+from azure.search.documents import IndexDocumentsBatch, SearchClient
+
+from app.config import AppConfig
+
+logger = logging.getLogger("entraaid_app")
+
+# 문서 단위 재시도 대상 상태 코드 (Azure AI Search 권장: 409, 422, 503 + 429/5xx)
+_RETRYABLE_STATUS = {409, 422, 429, 500, 502, 503, 504}
+
+
+def create_search_client(
+    endpoint: Optional[str] = None,
+    index_name: Optional[str] = None,
+    api_key: Optional[str] = None,
+) -> SearchClient:
+    """설정값(또는 인자로 지정한 로컬 엔드포인트)으로 SearchClient 생성"""
+    return SearchClient(
+        endpoint=endpoint or AppConfig.AIS_ENDPOINT,
+        index_name=index_name or AppConfig.AIS_INDEX,
+        credential=AzureKeyCredential(api_key or AppConfig.AIS_API_KEY),
+    )
+
+
+class UploadSummary:
+    """업로드 결과 요약"""
+
+    def __init__(self):
+        self.total = 0
+        self.succeeded = 0
+        self.retried = 0
+        self.batches = 0
+        self.failed: Dict[str, str] = {}
+        self.started = time.perf_counter()
+        self.elapsed = 0.0
+
+    @property
+    def docs_per_sec(self) -> float:
+        return self.succeeded / self.elapsed if self.elapsed else 0.0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "succeeded": self.succeeded,
+            "failed": len(self.failed),
+            "failed_keys": sorted(self.failed),
+            "retried": self.retried,
+            "batches": self.batches,
+            "elapsed_sec": round(self.elapsed, 3),
+            "docs_per_sec": round(self.docs_per_sec, 2),
+        }
+
+
+def _retry_after_seconds(exc: HttpResponseError) -> Optional[float]:
+    response = getattr(exc, "response", None)
+    if response is None:
+        return None
+    for name, scale in (("retry-after-ms", 0.001), ("Retry-After", 1.0)):
+        value = response.headers.get(name)
+        if value:
+            try:
+                return float(value) * scale
+            except ValueError:
+                continue
+    return None
+
+
+class BulkUploader:
+    """
+    배치 분할 + 동시 전송 + 실패 키 재시도를 수행하는 업로더
+    - submit()으로 문서를 흘려 넣고 flush()로 남은 배치를 보내 요약을 받는다.
+    - 동시에 대기 중인 배치는 concurrency × 2개로 제한해 메모리를 묶어 둔다.
+    """
+
+    def __init__(
+        self,
+        client: Optional[Any] = None,
+        key_field: str = "chunk_id",
+        action: str = "upload",
+        max_batch_docs: int = AppConfig.UPLOAD_BATCH_DOCS,
+        max_batch_bytes: int = AppConfig.UPLOAD_BATCH_BYTES,
+        concurrency: int = AppConfig.UPLOAD_CONCURRENCY,
+        max_retries: int = AppConfig.UPLOAD_MAX_RETRIES,
+        base_backoff: float = 1.0,
+        max_backoff: float = 30.0,
+    ):
+        self.client = client if client is not None else create_search_client()
+        self.key_field = key_field
+        self.action = action
+        self.max_batch_docs = max(1, max_batch_docs)
+        self.max_batch_bytes = max(1, max_batch_bytes)
+        self.concurrency = max(1, concurrency)
+        self.max_retries = max(0, max_retries)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._buffer: List[Dict[str, Any]] = []
+        self._buffer_bytes = 0
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._futures: Set[Future] = set()
+        self._lock = threading.Lock()
+        self.summary = UploadSummary()
+
+    # ----- 배치 구성 -----
+    def submit(self, docs: Iterable[Dict[str, Any]]) -> None:
+        """문서를 버퍼에 쌓다가 배치 한도에 닿으면 전송"""
+        for doc in docs:
+            size = len(json.dumps(doc, ensure_ascii=False, default=str).encode("utf-8"))
+            if self._buffer and (
+                len(self._buffer) >= self.max_batch_docs or self._buffer_bytes + size > self.max_batch_bytes
+            ):
+                self._dispatch()
+            self._buffer.append(doc)
+            self._buffer_bytes += size
+            self.summary.total += 1
+
+    def flush(self) -> UploadSummary:
+        """남은 배치를 보내고 모든 전송이 끝날 때까지 기다린 뒤 요약 반환"""
+        if self._buffer:
+            self._dispatch()
+        for future in list(self._futures):
+            future.result()
+        self._futures.clear()
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+        summary = self.summary
+        summary.elapsed = time.perf_counter() - summary.started
+        log = logger.warning if summary.failed else logger.info
+        log(
+            "업로드 요약(%s): 성공 %d/%d건, 실패 %d건, 재시도 %d건, 배치 %d개, %.1f docs/sec",
+            self.action,
+            summary.succeeded,
+            summary.total,
+            len(summary.failed),
+            summary.retried,
+            summary.batches,
+            summary.docs_per_sec,
+        )
+        for key, error in list(summary.failed.items())[:10]:
+            logger.warning("  실패 key=%s: %s", key, error)
+        self.summary = UploadSummary()
+        return summary
+
+    def upload(self, docs: Iterable[Dict[str, Any]]) -> UploadSummary:
+        """submit + flush"""
+        self.submit(docs)
+        return self.flush()
+
+    def _dispatch(self) -> None:
+        batch, self._buffer, self._buffer_bytes = self._buffer, [], 0
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="search-upload")
+        # 대기 중인 배치가 너무 많으면 하나가 끝날 때까지 기다림 (역압)
+        while len(self._futures) >= self.concurrency * 2:
+            done, _ = wait(self._futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                self._futures.discard(future)
+                future.result()
+        self._futures.add(self._executor.submit(self._send_batch, batch))
+        self.summary.batches += 1
+
+    # ----- 전송 + 재시도 -----
+    def _backoff(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return retry_after + random.uniform(0, self.base_backoff)
+        return min(self.max_backoff, self.base_backoff * (2 ** attempt)) * random.uniform(0.5, 1.0)
+
+    def _index(self, docs: List[Dict[str, Any]]) -> List[Any]:
+        batch = IndexDocumentsBatch()
+        getattr(batch, f"add_{self.action}_actions")(docs)
+        return self.client.index_documents(batch=batch)
+
+    def _send_batch(self, docs: List[Dict[str, Any]]) -> None:
+        pending = docs
+        failed: Dict[str, str] = {}
+        last_errors: Dict[str, str] = {}
+        succeeded = retried = 0
+        for attempt in range(self.max_retries + 1):
+            if attempt:
+                retried += len(pending)
+            retry_after: Optional[float] = None
+            try:
+                results = self._index(pending)
+            except HttpResponseError as exc:
+                # 배치 전체 실패: 재시도 가능한 상태면 같은 배치를 다시 보냄
+                last_errors = {str(doc.get(self.key_field)): f"{exc.status_code}: {exc.message}" for doc in pending}
+                if exc.status_code not in _RETRYABLE_STATUS:
+                    break
+                retry_after = _retry_after_seconds(exc)
+            except (ServiceRequestError, ServiceResponseError) as exc:
+                last_errors = {str(doc.get(self.key_field)): str(exc) for doc in pending}
+            else:
+                # 문서별 결과: 재시도 가능한 실패 키만 다시 보냄
+                last_errors = {}
+                for result in results:
+                    if result.succeeded:
+                        succeeded += 1
+                    elif result.status_code in _RETRYABLE_STATUS:
+                        last_errors[result.key] = f"{result.status_code}: {result.error_message}"
+                    else:
+                        failed[result.key] = f"{result.status_code}: {result.error_message}"
+                pending = [doc for doc in pending if str(doc.get(self.key_field)) in last_errors]
+                if not pending:
+                    break
+
+            if attempt < self.max_retries:
+                delay = self._backoff(attempt, retry_after)
+                logger.warning("업로드 재시도 %d/%d: %d건, %.1f초 대기", attempt + 1, self.max_retries, len(pending), delay)
+                time.sleep(delay)
+
+        failed.update(last_errors)
+        with self._lock:
+            self.summary.succeeded += succeeded
+            self.summary.retried += retried
+            self.summary.failed.update(failed)
@@ -0,0 +1,128 @@
+"""
+answer_cache.py : 의미 기반 답변 캐시
+- 답변한 질문의 임베딩(정규화한 float32)을 NumPy 행렬에 보관하고, 새 질문과의 코사인 유사도가 임계값 이상이면
+  저장해 둔 답변/컨텍스트/출처를 그대로 돌려준다. ("EntraApp 신청 방법" ≈ "엔트라앱 신청 어떻게 해요")
+- 항목 수 한도를 넘으면 가장 오래 쓰지 않은 항목을 덮어쓰고, TTL이 지난 항목은 조회 대상에서 뺀다.
+- 인덱스 버전이 바뀌면 (재인덱싱) 전체를 비운다.
+"""
+
+from __future__ import annotations
+
+import copy
+import logging
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from app.config import AppConfig
+
+logger = logging.getLogger("entraaid_app")
+
+
+class SemanticAnswerCache:
+    """스레드 안전한 코사인 유사도 답변 캐시"""
+
+    def __init__(
+        self,
+        max_entries: int = AppConfig.ANSWER_CACHE_SIZE,
+        ttl_seconds: float = AppConfig.ANSWER_CACHE_TTL,
+        threshold: float = AppConfig.ANSWER_CACHE_THRESHOLD,
+    ):
+        self.max_entries = max(1, max_entries)
+        self.ttl_seconds = ttl_seconds
+        self.threshold = threshold
+        self._vectors: Optional[np.ndarray] = None  # (max_entries, dims), 행마다 단위 벡터
+        self._created = np.zeros(self.max_entries, dtype=np.float64)
+        self._last_used = np.zeros(self.max_entries, dtype=np.float64)
+        self._entries: List[Optional[Dict[str, Any]]] = [None] * self.max_entries
+        self._size = 0
+        self._index_version: Optional[str] = None
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _unit(vector: List[float]) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        norm = float(np.linalg.norm(array))
+        return array / norm if norm else array
+
+    def _sync_version(self, index_version: str) -> None:
+        if self._index_version != index_version:
+            if self._size:
+                logger.info("인덱스 버전 변경으로 답변 캐시 초기화: %d건", self._size)
+            self._entries = [None] * self.max_entries
+            self._size = 0
+            self._index_version = index_version
+
+    def lookup(
+        self,
+        vector: List[float],
+        index_version: str,
+        key: Tuple[Any, ...],
+    ) -> Optional[Tuple[Dict[str, Any], float]]:
+        """
+        가장 유사한 유효 항목을 찾음
+        :param key: 함께 일치해야 하는 조건 (top_k, 라우트 등)
+        :return: (저장된 항목 사본, 유사도) 또는 None
+        """
+        query = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            self._sync_version(index_version)
+            if not self._size or self._vectors is None or self._vectors.shape[1] != query.shape[0]:
+                self.misses += 1
+                return None
+            similarities = self._vectors[: self._size] @ query
+            valid = np.array([entry is not None and entry["key"] == key for entry in self._entries[: self._size]])
+            if self.ttl_seconds > 0:
+                valid &= now - self._created[: self._size] <= self.ttl_seconds
+            similarities = np.where(valid, similarities, -1.0)
+            best = int(np.argmax(similarities))
+            score = float(similarities[best])
+            if score < self.threshold:
+                self.misses += 1
+                return None
+            self._last_used[best] = now
+            self.hits += 1
+            return copy.deepcopy(self._entries[best]), score  # type: ignore[return-value]
+
+    def put(
+        self,
+        vector: List[float],
+        index_version: str,
+        key: Tuple[Any, ...],
+        question: str,
+        response: Dict[str, Any],
+    ) -> None:
+        unit = self._unit(vector)
+        now = time.time()
+        with self._lock:
+            self._sync_version(index_version)
+            if self._vectors is None or self._vectors.shape[1] != unit.shape[0]:
+                self._vectors = np.zeros((self.max_entries, unit.shape[0]), dtype=np.float32)
+                self._entries = [None] * self.max_entries
+                self._size = 0
+            if self._size < self.max_entries:
+                slot = self._size
+                self._size += 1
+            else:
+                # 만료된 항목이 있으면 그 자리를, 없으면 가장 오래 쓰지 않은 자리를 재사용
+                expired = np.flatnonzero(now - self._created > self.ttl_seconds) if self.ttl_seconds > 0 else []
+                slot = int(expired[0]) if len(expired) else int(np.argmin(self._last_used))
+            self._vectors[slot] = unit
+            self._created[slot] = now
+            self._last_used[slot] = now
+            self._entries[slot] = {"key": key, "question": question, "response": copy.deepcopy(response)}
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": self._size,
+            }
@@ -14,8 +14,11 @@ from langchain_openai import AzureChatOpenAI
 from pydantic import SecretStr
 
 from app.config import AppConfig
+from app.core.index_version import get_index_version
+from app.rag.answer_cache import SemanticAnswerCache
+from app.rag.context_builder import build_context
 from app.rag.prompts import SYSTEM_PROMPT, build_context_block, build_user_prompt
-from app.rag.retriever import search_top_k
+from app.rag.retriever import search_top_k, vectorize_question
 
 logger = logging.getLogger("entraaid_app")
 
@@ -62,6 +65,11 @@ greeting_chain = LLMChain(llm=llm, prompt=greeting_prompt)
 guide_chain = LLMChain(llm=llm, prompt=guide_prompt)
 default_chain = LLMChain(llm=llm, prompt=default_prompt)
 
+# 검색 컨텍스트로 만든 가이드 답변만 저장하고, 조회는 인사말을 뺀 모든 질문에서 수행
+# (키워드 라우터가 "엔트라앱 신청 어떻게 해요"처럼 표현만 다른 질문을 default로 보내도 같은 답변을 찾도록,
+#  적중은 가이드 답변에서 온 항목만 인정)
+_answer_cache: Optional[SemanticAnswerCache] = SemanticAnswerCache() if AppConfig.ANSWER_CACHE_ENABLED else None
+
 
 _GUIDE_KEYWORDS: List[str] = [
     "가이드",
@@ -111,14 +119,61 @@ def run_router_chain(question: str, context_text: str, preset_route: Optional[st
     return {"route": route, "result": result}
 
 
-def _build_context_text(docs: Sequence[Dict[str, Any]]) -> str:
-    chunks = [str(doc.get("chunk", "")).strip() for doc in docs if doc.get("chunk")]
-    return "\n\n".join(filter(None, chunks))
+def _build_context_text(docs: Sequence[Dict[str, Any]], question: str = "", meta: Optional[Dict[str, Any]] = None) -> str:
+    """토큰 예산에 맞춘 컨텍스트 (overlap 제거, 질문과 무관한 문장 제외), 압축 통계는 meta["context"]에 기록"""
+    context_text, stats = build_context(docs, question)
+    if meta is not None:
+        meta["context"] = stats
+    return context_text
+
+
+def _lookup_answer_cache(question: str, cache_key: tuple, index_version: str) -> tuple:
+    """(캐시된 응답 또는 None, 질문 벡터 또는 None) - 임베딩 실패 시 캐시 없이 진행"""
+    if _answer_cache is None:
+        return None, None
+    try:
+        vector = vectorize_question(question)
+    except Exception as exc:  # noqa: BLE001
+        logger.warning("답변 캐시용 질문 임베딩 실패, 캐시 없이 진행: %s", exc)
+        return None, None
+    found = _answer_cache.lookup(vector, index_version, cache_key)
+    if found is None:
+        return None, vector
+    entry, similarity = found
+    if entry["response"].get("route") != "guide":
+        return None, vector
+    # 캐시 항목은 그대로 두고 얕은 복사본에 이번 질문과 적중 정보를 채움
+    cached = entry["response"]
+    response = {
+        **cached,
+        "question": question,
+        "search_meta": {
+            **(cached.get("search_meta") or {}),
+            "answer_cache": {
+                "hit": True,
+                "similarity": round(similarity, 4),
+                "matched_question": entry["question"],
+                **_answer_cache.stats(),
+            },
+        },
+    }
+    logger.info("답변 캐시 적중: 유사도=%.3f, 원 질문='%s'", similarity, entry["question"])
+    return response, vector
 
 
 def answer_with_rag(question: str, top_k: int = 3) -> Dict[str, Any]:
-    """검색과 LLM을 조합해 답변을 생성한다."""
+    """검색과 LLM을 조합해 답변을 생성한다. (비슷한 질문의 답변이 캐시에 있으면 재사용)"""
     try:
+        route = route_func(question)
+        index_version = get_index_version()
+        cache_key = (top_k,)
+        cache_vector = None
+        # 인사말은 임베딩 호출 없이 진행
+        if route != "greeting" and _normalize_question(question):
+            cached_response, cache_vector = _lookup_answer_cache(question, cache_key, index_version)
+            if cached_response is not None:
+                return cached_response
+
         search_output = search_top_k(question, top_k=top_k)
         if isinstance(search_output, dict):
             docs = search_output.get("docs", [])
@@ -127,8 +182,7 @@ def answer_with_rag(question: str, top_k: int = 3) -> Dict[str, Any]:
             docs = search_output  # type: ignore[assignment]
             search_meta = {}
 
-        context_text = _build_context_text(docs)
-        route = route_func(question)
+        context_text = _build_context_text(docs, question, search_meta)
 
         if not context_text and route == "guide":
             logger.warning("검색 결과 컨텍스트가 비어 있습니다. 빈 컨텍스트로 LLM을 호출합니다.")
@@ -146,6 +200,10 @@ def answer_with_rag(question: str, top_k: int = 3) -> Dict[str, Any]:
             "search_meta": search_meta,
         }
 
+        if _answer_cache is not None and cache_vector is not None and answer_text and docs and route == "guide":
+            _answer_cache.put(cache_vector, index_version, cache_key, question, response)
+            search_meta["answer_cache"] = {"hit": False, **_answer_cache.stats()}
+
         logger.info(
             "RAG 응답 생성 완료: route=%s, 컨텍스트 문서 수=%d",
             response.get("route"),
@@ -0,0 +1,180 @@
+"""
+context_builder.py : 토큰 예산 기반 컨텍스트 조립
+- 검색된 청크를 그대로 이어 붙이지 않고, 프롬프트에 들어갈 토큰 수를 tiktoken으로 재서 예산 안에 맞춘다.
+  1) 같은 parent_id의 인접 청크가 공유하는 overlap 구간(앞 청크 끝 == 뒤 청크 앞)을 한 번만 남긴다.
+  2) 그래도 예산을 넘으면 질문과 어휘가 덜 겹치는 문장부터 뺀다. 남은 문장은 원래 순서대로 잇는다.
+     예산보다 긴 문장뿐이라 하나도 못 담으면, 가장 관련도 높은 문장을 예산 토큰 수만큼 잘라 담는다.
+- 질문 어휘와 겹치는 문장이 먼저 남으므로 답변 근거가 되는 문장은 빠지지 않고, 프롬프트 크기는 예산 이하로 고정된다.
+"""
+
+from __future__ import annotations
+
+import logging
+import re
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import tiktoken
+
+from app.config import AppConfig
+from app.core.keyword_index import tokenize
+
+logger = logging.getLogger("entraaid_app")
+
+# 문장 경계: 종결 부호 뒤 공백 또는 줄바꿈 묶음 (세그먼트를 이어 붙이면 원문과 같음, app.ingest.chunker와 동일)
+_SENTENCE_RE = re.compile(r".*?(?:(?<=[.!?。！？…])\s+|\n+|\Z)", re.DOTALL)
+
+_CHUNK_SEPARATOR = "\n\n"
+
+_encoding: Optional[tiktoken.Encoding] = None
+
+
+def get_encoding() -> tiktoken.Encoding:
+    """채팅 배포 모델에 맞는 tiktoken 인코딩 (알 수 없는 배포명은 o200k_base)"""
+    global _encoding
+    if _encoding is None:
+        try:
+            _encoding = tiktoken.encoding_for_model(AppConfig.AOAI_DEPLOYMENT)
+        except KeyError:
+            _encoding = tiktoken.get_encoding("o200k_base")
+    return _encoding
+
+
+def count_tokens(text: str) -> int:
+    return len(get_encoding().encode(text, disallowed_special=())) if text else 0
+
+
+def _overlap_length(head: str, tail: str, min_chars: int) -> int:
+    """head의 끝과 tail의 앞이 겹치는 가장 긴 길이 (min_chars 미만이면 0)"""
+    if min_chars <= 0 or len(head) < min_chars or len(tail) < min_chars:
+        return 0
+    probe = tail[:min_chars]
+    position = head.find(probe, max(0, len(head) - len(tail)))
+    while position != -1:
+        if tail.startswith(head[position:]):
+            return len(head) - position
+        position = head.find(probe, position + 1)
+    return 0
+
+
+def _dedup_chunks(docs: Sequence[Dict[str, Any]], min_chars: int) -> Tuple[List[str], int]:
+    """
+    같은 parent_id 청크끼리 겹치는 구간을 잘라 낸 청크 텍스트 목록 (검색 순서 유지)
+    - 앞서 남긴 청크의 끝 == 현재 청크의 앞이면 앞부분을, 현재 청크의 끝 == 앞서 남긴 청크의 앞이면 뒷부분을 자름
+    - 다른 청크에 통째로 포함된 청크는 빈 문자열
+    :return: (청크 텍스트 목록, 잘라 낸 문자 수)
+    """
+    kept_by_parent: Dict[Any, List[str]] = {}
+    texts: List[str] = []
+    removed = 0
+    for doc in docs:
+        original = str(doc.get("chunk") or "").strip()
+        parent = doc.get("parent_id")
+        siblings = kept_by_parent.setdefault(parent, []) if parent is not None else []
+        start, end = 0, len(original)
+        for sibling in siblings:
+            if start >= end:
+                break
+            if original[start:end] in sibling:
+                start = end
+                break
+            start += _overlap_length(sibling, original[start:end], min_chars)
+            end -= _overlap_length(original[start:end], sibling, min_chars)
+        text = original[start:end].strip() if start < end else ""
+        removed += len(original) - len(text)
+        if parent is not None and original:
+            siblings.append(original)
+        texts.append(text)
+    return texts, removed
+
+
+def _sentence_score(sentence: str, question_terms: set) -> float:
+    """질문 토큰 중 문장에 등장하는 비율 (0~1)"""
+    if not question_terms:
+        return 0.0
+    return len(question_terms.intersection(tokenize(sentence))) / len(question_terms)
+
+
+def build_context(
+    docs: Sequence[Dict[str, Any]],
+    question: str = "",
+    token_budget: Optional[int] = None,
+) -> Tuple[str, Dict[str, int]]:
+    """
+    검색 결과로 LLM 컨텍스트 텍스트를 조립
+    :param docs: 검색 결과 (순위 순, chunk/parent_id 사용)
+    :param question: 사용자 질문 (문장 관련도 계산용)
+    :param token_budget: 컨텍스트 최대 토큰 수 (None이면 CONTEXT_TOKEN_BUDGET, 0 이하면 제한 없음)
+    :return: (컨텍스트 텍스트, 압축 통계 dict)
+    """
+    budget = AppConfig.CONTEXT_TOKEN_BUDGET if token_budget is None else token_budget
+    originals = [str(doc.get("chunk") or "").strip() for doc in docs]
+    tokens_before = count_tokens(_CHUNK_SEPARATOR.join(filter(None, originals)))
+
+    texts, overlap_chars = _dedup_chunks(docs, AppConfig.CONTEXT_OVERLAP_MIN_CHARS)
+
+    # (청크 순위, 문장 순서, 문장, 토큰 수)
+    sentences: List[Tuple[int, int, str, int]] = []
+    for rank, text in enumerate(texts):
+        for position, match in enumerate(_SENTENCE_RE.finditer(text)):
+            sentence = match.group()
+            if sentence.strip():
+                sentences.append((rank, position, sentence, count_tokens(sentence)))
+
+    total = sum(item[3] for item in sentences)
+    # 청크 구분자 몫을 미리 빼 둠 (문장 토큰 합 + 구분자 ≈ 최종 토큰 수)
+    separators = count_tokens(_CHUNK_SEPARATOR) * max(0, sum(1 for text in texts if text) - 1)
+    dropped = 0
+    truncated = 0
+    if 0 < budget < total + separators:
+        budget_left = max(0, budget - separators)
+        # 관련도 높은 문장 → 상위 청크 → 앞 문장 순으로 예산이 찰 때까지 담고, 못 담은 문장은 뺀다
+        question_terms = set(tokenize(question))
+        order = sorted(
+            range(len(sentences)),
+            key=lambda i: (-_sentence_score(sentences[i][2], question_terms), sentences[i][0], sentences[i][1]),
+        )
+        keep = [False] * len(sentences)
+        used = 0
+        for i in order:
+            if used + sentences[i][3] <= budget_left:
+                keep[i] = True
+                used += sentences[i][3]
+        if order and not any(keep):
+            # 컨텍스트가 비지 않도록 가장 관련도 높은 문장을 토큰 단위로 잘라 담음 (청크 하나뿐이라 구분자 몫 없음)
+            best = order[0]
+            rank, position, sentence, _ = sentences[best]
+            head = get_encoding().encode(sentence, disallowed_special=())[:budget]
+            sentences[best] = (rank, position, get_encoding().decode(head).rstrip("\ufffd"), len(head))
+            keep[best] = True
+            truncated = 1
+        dropped = keep.count(False)
+        sentences = [item for item, kept in zip(sentences, keep) if kept]
+
+    parts: Dict[int, List[str]] = {}
+    for rank, _, sentence, _ in sentences:
+        parts.setdefault(rank, []).append(sentence)
+    context_text = _CHUNK_SEPARATOR.join(
+        joined for joined in ("".join(parts[rank]).strip() for rank in sorted(parts)) if joined
+    )
+
+    tokens_after = count_tokens(context_text)
+    stats = {
+        "token_budget": budget,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+        "overlap_chars_removed": overlap_chars,
+        "sentences_dropped": dropped,
+        "sentences_truncated": truncated,
+        "chunks_used": len(parts),
+    }
+    if stats["tokens_saved"]:
+        logger.info(
+            "컨텍스트 압축: %d → %d 토큰 (overlap %d자, 문장 %d개 제외, %d개 잘라 냄)",
+            tokens_before,
+            tokens_after,
+            overlap_chars,
+            dropped,
+            truncated,
+        )
+    return context_text, stats
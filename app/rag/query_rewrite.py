@@ -0,0 +1,292 @@
+"""
+query_rewrite.py : 질의 정규화/확장 사전 엔진
+- 복합어 치환(compound_replacements)과 구(phrase) 동의어를 각각 하나의 Aho-Corasick 오토마톤으로 컴파일해,
+  사전 크기와 무관하게 질의 길이에 비례하는 비용으로 한 번에 찾는다. 단어 동의어는 dict 조회.
+- 사전은 외부 JSON 파일(QUERY_REWRITE_DICTS, 쉼표 구분, 뒤 파일이 앞 파일을 덮어씀)에서 읽고,
+  파일이 바뀌면(mtime/크기) 재시작 없이 다시 컴파일한다. 읽기에 실패하면 이전 사전을 계속 쓴다.
+
+사전 형식:
+    {"compound_replacements": [["entraapp신청", "entraapp 신청"], ...],
+     "synonyms": {"신청": ["등록", ...]},
+     "phrase_synonyms": {"entra app": ["엔트라 앱"]}}
+
+사용 예:
+    python -m app.rag.query_rewrite "EntraApp신청가이드 알려줘"
+    python -m app.rag.query_rewrite --bench
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from app.config import AppConfig
+
+logger = logging.getLogger("entraaid_app")
+
+DEFAULT_DICT_PATH = os.path.join(os.path.dirname(__file__), "dictionaries", "query_rewrite.json")
+
+
+class AhoCorasick:
+    """다중 문자열 검색 오토마톤 (패턴 번호 = 입력 순서)"""
+
+    def __init__(self, patterns: Sequence[str]):
+        self.patterns = list(patterns)
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[List[int]] = [[]]
+        for pattern_id, pattern in enumerate(self.patterns):
+            if not pattern:
+                continue
+            state = 0
+            for char in pattern:
+                nxt = self._goto[state].get(char)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][char] = nxt
+                    self._goto.append({})
+                    self._fail.append(0)
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(pattern_id)
+
+        # BFS로 실패 링크 구성, 출력은 실패 링크를 따라 합쳐 둠
+        queue = deque(self._goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for char, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fail = self._fail[state]
+                while fail and char not in self._goto[fail]:
+                    fail = self._fail[fail]
+                candidate = self._goto[fail].get(char, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0  # 루트의 자식은 루트로
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+    def __len__(self) -> int:
+        return len(self.patterns)
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, int]]:
+        """(시작 위치, 패턴 번호) - 겹치는 매치 포함, 끝 위치 순"""
+        goto, fail, out, patterns = self._goto, self._fail, self._out, self.patterns
+        state = 0
+        for end, char in enumerate(text, start=1):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for pattern_id in out[state]:
+                yield end - len(patterns[pattern_id]), pattern_id
+
+
+class QueryRewriter:
+    """컴파일된 질의 재작성 사전"""
+
+    def __init__(
+        self,
+        compound_replacements: Iterable[Tuple[str, str]] = (),
+        synonyms: Optional[Dict[str, List[str]]] = None,
+        phrase_synonyms: Optional[Dict[str, List[str]]] = None,
+    ):
+        replacements = dict(compound_replacements)  # 같은 원문은 마지막 항목이 우선
+        self._replacement_targets = list(replacements.values())
+        self._replacements = AhoCorasick(list(replacements))
+        self.synonyms = {key.lower(): list(values) for key, values in (synonyms or {}).items()}
+        phrases = {key.lower(): list(values) for key, values in (phrase_synonyms or {}).items()}
+        self._phrase_values = list(phrases.values())
+        self._phrases = AhoCorasick(list(phrases))
+
+    def size(self) -> Dict[str, int]:
+        return {
+            "compound_replacements": len(self._replacements),
+            "synonyms": len(self.synonyms),
+            "phrase_synonyms": len(self._phrases),
+        }
+
+    def replace_compounds(self, text: str) -> Tuple[str, List[str]]:
+        """
+        복합어 치환 (대소문자 구분, 왼쪽부터 가장 긴 매치를 겹치지 않게 한 번에 치환)
+        :return: (치환된 텍스트, 적용된 "원문->치환" 목록)
+        """
+        matches = sorted(
+            self._replacements.iter_matches(text),
+            key=lambda m: (m[0], -len(self._replacements.patterns[m[1]])),
+        )
+        if not matches:
+            return text, []
+        parts: List[str] = []
+        applied: Dict[str, None] = {}
+        position = 0
+        for start, pattern_id in matches:
+            if start < position:
+                continue
+            source = self._replacements.patterns[pattern_id]
+            target = self._replacement_targets[pattern_id]
+            parts.append(text[position:start])
+            parts.append(target)
+            position = start + len(source)
+            applied[f"{source}->{target}"] = None
+        parts.append(text[position:])
+        return "".join(parts), list(applied)
+
+    def expand(self, normalized: str) -> List[str]:
+        """단어 동의어 + 구 동의어 (정렬, 질의 자체 제외)"""
+        if not normalized:
+            return []
+        normalized_lower = normalized.lower()
+        expansions = set()
+        for token in normalized_lower.split():
+            expansions.update(self.synonyms.get(token, ()))
+        for _, pattern_id in self._phrases.iter_matches(normalized_lower):
+            expansions.update(self._phrase_values[pattern_id])
+        expansions.discard(normalized_lower)
+        return sorted(syn for syn in expansions if syn)
+
+
+def _dict_paths() -> List[str]:
+    return [path.strip() for path in AppConfig.QUERY_REWRITE_DICTS.split(",") if path.strip()] or [DEFAULT_DICT_PATH]
+
+
+def _signature(paths: Sequence[str]) -> Tuple[Tuple[str, int, int], ...]:
+    signature = []
+    for path in paths:
+        try:
+            stat = os.stat(path)
+            signature.append((path, stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            signature.append((path, -1, -1))
+    return tuple(signature)
+
+
+def load_rewriter(paths: Sequence[str]) -> QueryRewriter:
+    """사전 파일들을 합쳐 컴파일 (없는 파일은 건너뜀, JSON 오류는 ValueError)"""
+    merged: Dict[str, Dict[str, object]] = {"compound_replacements": {}, "synonyms": {}, "phrase_synonyms": {}}
+    for path in paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except FileNotFoundError:
+            logger.warning("질의 재작성 사전 파일이 없습니다: %s", path)
+            continue
+        merged["compound_replacements"].update(dict(data.get("compound_replacements") or []))
+        merged["synonyms"].update(data.get("synonyms") or {})
+        merged["phrase_synonyms"].update(data.get("phrase_synonyms") or {})
+    return QueryRewriter(
+        merged["compound_replacements"].items(),  # type: ignore[arg-type]
+        merged["synonyms"],  # type: ignore[arg-type]
+        merged["phrase_synonyms"],  # type: ignore[arg-type]
+    )
+
+
+_current: Optional[QueryRewriter] = None
+_current_signature: Optional[Tuple[Tuple[str, int, int], ...]] = None
+_checked_at = 0.0
+_lock = threading.Lock()
+
+
+def get_query_rewriter() -> QueryRewriter:
+    """
+    현재 사전으로 컴파일된 재작성기
+    - QUERY_REWRITE_RELOAD_SEC마다 파일 변경을 확인해 바뀌었으면 다시 컴파일 (0이면 매번 확인, 음수면 확인 안 함)
+    """
+    global _current, _current_signature, _checked_at
+    now = time.monotonic()
+    interval = AppConfig.QUERY_REWRITE_RELOAD_SEC
+    if _current is not None and (interval < 0 or now - _checked_at < interval):
+        return _current
+    with _lock:
+        if _current is not None and interval >= 0 and now - _checked_at < interval:
+            return _current
+        paths = _dict_paths()
+        signature = _signature(paths)
+        _checked_at = now
+        if _current is None or signature != _current_signature:
+            started = time.perf_counter()
+            try:
+                rewriter = load_rewriter(paths)
+            except (OSError, ValueError, TypeError, AttributeError) as exc:
+                if _current is None:
+                    raise
+                logger.warning("질의 재작성 사전을 다시 읽지 못해 이전 사전을 유지합니다: %s", exc)
+                _current_signature = signature
+                return _current
+            logger.info(
+                "질의 재작성 사전 컴파일: %s, %.1fms", rewriter.size(), (time.perf_counter() - started) * 1000
+            )
+            _current, _current_signature = rewriter, signature
+        return _current
+
+
+def _linear_rewrite(
+    query: str,
+    replacements: List[Tuple[str, str]],
+    synonyms: Dict[str, List[str]],
+    phrases: Dict[str, List[str]],
+) -> List[str]:
+    """벤치마크 비교용: 사전을 순서대로 훑는 기존 방식"""
+    for src, dest in replacements:
+        if src in query:
+            query = query.replace(src, dest)
+    lower = query.lower()
+    expansions = set()
+    for token in re.split(r"\s+", lower):
+        expansions.update(synonyms.get(token, []))
+    for phrase, syns in phrases.items():
+        if phrase in lower:
+            expansions.update(syns)
+    return sorted(expansions)
+
+
+def benchmark(sizes: Sequence[int] = (10, 100, 1000, 10000), rounds: int = 2000) -> List[Dict[str, float]]:
+    """사전 크기별 질의 1건당 재작성 시간(µs) 비교 - 선형 탐색 vs 오토마톤"""
+    with open(DEFAULT_DICT_PATH, encoding="utf-8") as f:
+        base = json.load(f)
+    queries = ["EntraApp신청가이드 알려줘", "entra app 신청 방법이 궁금합니다", "엔트라앱 등록 절차 안내 부탁드립니다"]
+    results = []
+    for size in sizes:
+        replacements = [(f"합성어{i}신청", f"합성어{i} 신청") for i in range(size)] + [tuple(p) for p in base["compound_replacements"]]
+        phrases = {f"구문 {i} 예시": [f"동의어{i}"] for i in range(size)}
+        phrases.update(base["phrase_synonyms"])
+        synonyms = dict(base["synonyms"])
+        rewriter = QueryRewriter(replacements, synonyms, phrases)  # type: ignore[arg-type]
+
+        started = time.perf_counter()
+        for i in range(rounds):
+            _linear_rewrite(queries[i % len(queries)], replacements, synonyms, phrases)  # type: ignore[arg-type]
+        linear = (time.perf_counter() - started) / rounds * 1e6
+
+        started = time.perf_counter()
+        for i in range(rounds):
+            text, _ = rewriter.replace_compounds(queries[i % len(queries)])
+            rewriter.expand(text)
+        compiled = (time.perf_counter() - started) / rounds * 1e6
+        results.append({"entries": size, "linear_us": round(linear, 1), "automaton_us": round(compiled, 1)})
+
+    print(f"{'entries':>8} {'linear(us)':>11} {'automaton(us)':>14}")
+    for r in results:
+        print(f"{r['entries']:>8} {r['linear_us']:>11.1f} {r['automaton_us']:>14.1f}")
+    return results
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="질의 재작성 사전 확인 / 벤치마크")
+    parser.add_argument("query", nargs="?", default="", help="재작성해 볼 질의")
+    parser.add_argument("--bench", action="store_true", help="사전 크기별 재작성 시간 비교")
+    args = parser.parse_args()
+
+    if args.bench:
+        benchmark()
+    else:
+        current = get_query_rewriter()
+        print(current.size())
+        if args.query:
+            rewritten, applied = current.replace_compounds(args.query)
+            print(rewritten, applied, current.expand(rewritten))
@@ -5,16 +5,35 @@ retriever.py : Azure Cognitive Search 기반 문서 검색
 
 from __future__ import annotations
 
+import asyncio
+import hashlib
 import logging
 import re
-from typing import Any, Dict, List, Optional, Set, cast
-
+import time
+import weakref
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, cast
+
+import numpy as np
 from azure.core.credentials import AzureKeyCredential
+from azure.core.exceptions import HttpResponseError
 from azure.search.documents import SearchClient
+from azure.search.documents.aio import SearchClient as AsyncSearchClient
 from azure.search.documents.models import VectorizedQuery
-from openai import AzureOpenAI
+from openai import AsyncAzureOpenAI, AzureOpenAI
 
 from app.config import AppConfig
+from app.core.chunk_store import get_chunk_store
+from app.core.embedding_cache import get_embedding_cache, normalize_text
+from app.core.embeddings import get_embedding_batcher
+from app.core.index_version import get_index_version
+from app.core.keyword_index import reciprocal_rank_fusion
+from app.core.local_index import get_local_index
+from app.core.ttl_cache import TTLCache
+from app.rag.mmr import mmr_select
+from app.rag.query_rewrite import get_query_rewriter
 
 logger = logging.getLogger("entraaid_app")
 
@@ -22,29 +41,23 @@ logger = logging.getLogger("entraaid_app")
 _search_client: Optional[SearchClient] = None
 _embedding_client: Optional[AzureOpenAI] = None
 
+# 질의 임베딩 메모리 캐시: 정규화된 vector_query_text → float32 배열
+_query_vector_cache: Optional[TTLCache] = (
+    TTLCache(AppConfig.QUERY_EMBED_CACHE_SIZE, AppConfig.QUERY_EMBED_CACHE_TTL)
+    if AppConfig.QUERY_EMBED_CACHE_SIZE > 0
+    else None
+)
 
-_COMPOUND_REPLACEMENTS: List[tuple[str, str]] = [
-    ("entraapp신청가이드", "entraapp 신청 가이드"),
-    ("entraapp신청", "entraapp 신청"),
-    ("entraapp가이드", "entraapp 가이드"),
-    ("신청가이드", "신청 가이드"),
-]
-
-_SYNONYM_MAP: Dict[str, List[str]] = {
-    "entraapp": ["entra app", "entra id app", "엔트라앱"],
-    "entra": ["엔트라", "entra id"],
-    "신청": ["등록", "신청서", "apply", "application"],
-    "가이드": ["안내", "guide", "매뉴얼", "documentation"],
-    "안내": ["가이드", "도움말"],
-    "등록": ["신청", "가입"],
-    "알려줘": ["설명", "tell me"],
-}
+# 검색 결과 메모리 캐시: (인덱스, 인덱스 버전, 검색어, 벡터 해시, top_k, select 필드) → 문서 리스트
+_result_cache: Optional[TTLCache] = (
+    TTLCache(AppConfig.SEARCH_CACHE_SIZE, AppConfig.SEARCH_CACHE_TTL) if AppConfig.SEARCH_CACHE_SIZE > 0 else None
+)
 
-_PHRASE_SYNONYM_MAP: Dict[str, List[str]] = {
-    "entra app": ["엔트라 앱"],
-    "entra id app": ["entra app"],
-    "entraapp 신청": ["entra app 신청", "엔트라앱 신청"],
-}
+_SELECT_FIELDS = ("chunk_id", "parent_id", "chunk", "title", "content")
+# 로컬 청크 저장소로 본문을 채울 때 Azure에서 받는 필드
+_ID_FIELDS = ("chunk_id",)
+# MMR 후보 중 로컬 벡터 인덱스에 없는 청크만 따로 조회 (검색 응답에는 벡터를 싣지 않음)
+_VECTOR_FIELDS = ("chunk_id", "text_vector")
 
 
 def _ensure_config() -> None:
@@ -100,12 +113,7 @@ def _insert_space_between_alnum_hangul(text: str) -> str:
 def _normalize_query_text(query: str) -> tuple[str, List[str]]:
     if not query:
         return "", []
-    text = query.strip()
-    applied: List[str] = []
-    for src, dest in _COMPOUND_REPLACEMENTS:
-        if src in text:
-            text = text.replace(src, dest)
-            applied.append(f"{src}->{dest}")
+    text, applied = get_query_rewriter().replace_compounds(query.strip())
     text = _insert_space_between_alnum_hangul(text)
     text = re.sub(r"([a-z])([A-Z])", r"\1 \2", text)
     text = re.sub(r"\s+", " ", text)
@@ -113,18 +121,7 @@ def _normalize_query_text(query: str) -> tuple[str, List[str]]:
 
 
 def _expand_synonyms(normalized: str) -> List[str]:
-    if not normalized:
-        return []
-    tokens = [tok for tok in re.split(r"\s+", normalized.lower()) if tok]
-    expansions: Set[str] = set()
-    for token in tokens:
-        expansions.update(_SYNONYM_MAP.get(token, []))
-    normalized_lower = normalized.lower()
-    for phrase, syns in _PHRASE_SYNONYM_MAP.items():
-        if phrase in normalized_lower:
-            expansions.update(syns)
-    expansions.discard(normalized_lower)
-    return sorted({syn for syn in expansions if syn})
+    return get_query_rewriter().expand(normalized)
 
 
 def _prepare_query_plan(query: str) -> Dict[str, Any]:
@@ -147,66 +144,670 @@ def _prepare_query_plan(query: str) -> Dict[str, Any]:
     return plan
 
 
-def _vectorize_query(query: str) -> List[float]:
-    embedding_client = _get_embedding_client()
-    response = embedding_client.embeddings.create(
-        model=AppConfig.AOAI_EMBED_DEPLOYMENT,
-        input=query,
-    )
-    vector = response.data[0].embedding
-    logger.debug("임베딩 생성 길이=%d", len(vector))
+def _cached_query_vector(key: str) -> Optional[List[float]]:
+    if _query_vector_cache is None:
+        return None
+    packed = _query_vector_cache.get(key)
+    return packed.tolist() if packed is not None else None
+
+
+def _remember_query_vector(key: str, vector: List[float], source: str, meta: Optional[Dict[str, Any]]) -> None:
+    if _query_vector_cache is not None and source != "memory":
+        _query_vector_cache.put(key, array("f", vector))
+    if meta is not None:
+        meta["embedding_source"] = source
+        if _query_vector_cache is not None:
+            meta["query_embedding_cache"] = _query_vector_cache.stats()
+
+
+def _vectorize_query(query: str, meta: Optional[Dict[str, Any]] = None) -> List[float]:
+    """
+    질의 임베딩 (메모리 LRU → 영구 캐시 → API 순서로 조회)
+    - meta가 주어지면 어디서 가져왔는지(embedding_source)와 메모리 캐시 통계를 기록
+    """
+    key = normalize_text(query)
+    source = "memory"
+    vector = _cached_query_vector(key)
+    if vector is None:
+        vector, source = _embed_query(query)
+    _remember_query_vector(key, vector, source, meta)
     return vector
 
 
-def _materialize_result(doc: Any) -> Dict[str, Any]:
-    doc_dict = {key: doc.get(key) for key in doc.keys()}  # type: ignore[attr-defined]
+def vectorize_question(question: str) -> List[float]:
+    """질문을 검색과 같은 방식(정규화 → 임베딩 캐시)으로 벡터화 (의미 기반 답변 캐시용)"""
+    return _vectorize_query(_prepare_query_plan(question)["vector_query_text"])
+
+
+def _disk_cached_embedding(query: str) -> Optional[List[float]]:
+    cache = get_embedding_cache()
+    cached = cache.get(query) if cache is not None else None
+    if cached is not None:
+        logger.debug("임베딩 캐시 적중: 길이=%d", len(cached))
+    return cached
+
+
+def _embedding_request(query: str) -> Dict[str, Any]:
+    extra = {"dimensions": AppConfig.AOAI_EMBED_DIMENSIONS} if AppConfig.AOAI_EMBED_DIMENSIONS > 0 else {}
+    return {"model": AppConfig.AOAI_EMBED_DEPLOYMENT, "input": query, **extra}
+
+
+def _store_embedding(query: str, vector: List[float]) -> None:
+    logger.debug("임베딩 생성 길이=%d", len(vector))
+    cache = get_embedding_cache()
+    if cache is not None:
+        cache.put(query, vector)
+
+
+def _embed_query(query: str) -> tuple[List[float], str]:
+    """영구 캐시 또는 API로 질의 임베딩 생성 → (벡터, "disk" | "api")"""
+    cached = _disk_cached_embedding(query)
+    if cached is not None:
+        return cached, "disk"
+
+    response = _get_embedding_client().embeddings.create(**_embedding_request(query))
+    vector = response.data[0].embedding
+    _store_embedding(query, vector)
+    return vector, "api"
+
+
+def _result_cache_key(search_text: str, vector: List[float], top_k: int) -> tuple:
+    vector_hash = hashlib.sha1(array("f", vector).tobytes()).hexdigest()
+    mmr = (AppConfig.MMR_FETCH_K, AppConfig.MMR_LAMBDA) if AppConfig.MMR_ENABLED else None
+    return (AppConfig.AIS_INDEX, get_index_version(), search_text, vector_hash, top_k, _select_fields(), mmr)
+
+
+def _candidate_count(top_k: int) -> int:
+    """MMR 재정렬을 쓰면 후보를 MMR_FETCH_K개까지 더 가져옴"""
+    return max(top_k, AppConfig.MMR_FETCH_K) if AppConfig.MMR_ENABLED else top_k
+
+
+def _hydrate_locally() -> bool:
+    """본문을 로컬 청크 저장소에서 채울지 (SEARCH_HYDRATE_LOCAL이고 저장소에 청크가 있을 때)"""
+    return AppConfig.SEARCH_HYDRATE_LOCAL and len(get_chunk_store()) > 0
+
+
+def _select_fields() -> tuple:
+    return _ID_FIELDS if _hydrate_locally() else _SELECT_FIELDS
+
+
+def _needs_mmr(docs: List[Dict[str, Any]], top_k: int) -> bool:
+    return AppConfig.MMR_ENABLED and len(docs) > top_k
+
+
+def _local_vector_source(plan: Dict[str, Any], chunk_ids: List[str]) -> tuple[Any, List[str]]:
+    """(로컬 인덱스 또는 None, 로컬 인덱스에 없어 Azure에서 받아야 할 chunk_id 목록)"""
+    if plan.get("backend") != "local" and not AppConfig.LOCAL_INDEX_ENABLED:
+        return None, list(chunk_ids)
+    index = get_local_index()
+    return index, [chunk_id for chunk_id in chunk_ids if chunk_id not in index]
+
+
+def _stack_vectors(chunk_ids: List[str], index: Any, fetched: Dict[str, List[float]]) -> np.ndarray:
+    """로컬 인덱스 벡터와 Azure에서 받은 벡터를 chunk_id 순서의 행렬로 합침 (둘 다 없으면 0벡터)"""
+    matrix = index.vectors(chunk_ids) if index is not None else np.zeros((len(chunk_ids), 0), dtype=np.float32)
+    if not fetched:
+        return matrix
+    if not matrix.shape[1]:
+        dims = max(len(found or ()) for found in fetched.values())
+        matrix = np.zeros((len(chunk_ids), dims), dtype=np.float32)
+    for i, chunk_id in enumerate(chunk_ids):
+        found = fetched.get(chunk_id)
+        if found and len(found) == matrix.shape[1]:
+            matrix[i] = found
+    return matrix
+
+
+def _skip_mmr(plan: Dict[str, Any], exc: Exception) -> None:
+    logger.warning("MMR 후보 벡터를 가져오지 못해 MMR 없이 진행: %s", exc)
+    plan["mmr"] = {"skipped": f"text_vector 조회 실패: {exc}"}
+
+
+def _fetch_vectors(chunk_ids: List[str]) -> Dict[str, List[float]]:
+    """로컬 인덱스에 없는 후보의 text_vector를 id 필터로 조회 (retrievable이 아니면 HttpResponseError)"""
+    results = _get_search_client().search(
+        search_text=None, filter=_chunk_id_filter(chunk_ids), select=list(_VECTOR_FIELDS), top=len(chunk_ids)
+    )
+    return {doc["chunk_id"]: doc.get("text_vector") for doc in results}
+
+
+def _search_relevance(docs: List[Dict[str, Any]]) -> np.ndarray:
+    """
+    MMR 관련도 항: 검색 점수(Azure 하이브리드/RRF 점수)를 1위 점수로 나눠 0~1로 맞춤
+    - min-max로 펴면 후보 간 작은 점수 차이가 0~1 전체로 벌어져, 통째로 같은 청크도 중복 감점을 이기고 뽑힘
+    - 점수가 없는 후보가 있으면 검색 순위로 1/(RRF_K + 순위)를, 음수 점수(코사인)가 있으면 min-max를 씀
+    """
+    scores = [doc.get("score") for doc in docs]
+    if all(isinstance(score, (int, float)) for score in scores):
+        values = np.asarray(scores, dtype=np.float32)
+    else:
+        values = 1.0 / (AppConfig.RRF_K + np.arange(1, len(docs) + 1, dtype=np.float32))
+    if not len(values):
+        return values
+    if values.min() >= 0 and values.max() > 0:
+        return values / values.max()
+    span = float(values.max() - values.min())
+    if span <= 0:
+        return np.ones(len(values), dtype=np.float32)
+    return (values - values.min()) / span
+
+
+def _apply_mmr(
+    plan: Dict[str, Any],
+    vector: List[float],
+    docs: List[Dict[str, Any]],
+    top_k: int,
+    candidates: np.ndarray,
+    started: float,
+) -> List[Dict[str, Any]]:
+    # 관련도는 검색 점수(질의와의 코사인만 쓰면 BM25/RRF 순위가 버려짐), 중복도만 후보 벡터 코사인
+    order = mmr_select(vector, candidates, top_k, AppConfig.MMR_LAMBDA, relevance=_search_relevance(docs))
+    plan["mmr"] = {
+        "candidates": len(docs),
+        "lambda": AppConfig.MMR_LAMBDA,
+        "picked_ranks": [i + 1 for i in order],
+        "ms": round((time.perf_counter() - started) * 1000, 3),
+    }
+    return [docs[i] for i in order]
+
+
+def _rerank_mmr(plan: Dict[str, Any], vector: List[float], docs: List[Dict[str, Any]], top_k: int) -> List[Dict[str, Any]]:
+    """
+    후보를 MMR로 재정렬해 top_k개를 고름 (겹치는 인접 청크 대신 서로 다른 정보를 담은 청크 우선)
+    - 검색 응답에는 text_vector를 싣지 않음. 후보 벡터는 로컬 벡터 인덱스에서 읽고,
+      로컬 인덱스에 없는 후보만 Azure에 text_vector를 select해 조회
+    - 그 조회가 실패하면(text_vector가 retrievable이 아닌 인덱스 등) MMR 없이 검색 순위대로 top_k
+    """
+    if not _needs_mmr(docs, top_k):
+        return docs[:top_k]
+    started = time.perf_counter()
+    chunk_ids = [doc["chunk_id"] for doc in docs]
+    index, missing = _local_vector_source(plan, chunk_ids)
+    fetched: Dict[str, List[float]] = {}
+    if missing:
+        try:
+            fetched = _fetch_vectors(missing)
+        except HttpResponseError as exc:
+            _skip_mmr(plan, exc)
+            return docs[:top_k]
+    plan["mmr_vectors"] = {"local": len(chunk_ids) - len(missing), "remote": len(missing)}
+    return _apply_mmr(plan, vector, docs, top_k, _stack_vectors(chunk_ids, index, fetched), started)
+
+
+def _materialize_result(doc: Any, fields: Sequence[str]) -> Dict[str, Any]:
+    """검색 결과에서 select한 필드와 점수만 꺼냄 (@search.* 메타데이터 등 나머지 키는 복사하지 않음)"""
+    doc_dict = {field: doc[field] for field in fields if field in doc}
     doc_dict["score"] = doc.get("@search.score")
     doc_dict["reranker_score"] = doc.get("@search.reranker_score")
     return doc_dict
 
 
+def _chunk_id_filter(chunk_ids: Sequence[str]) -> str:
+    joined = ",".join(chunk_ids).replace("'", "''")
+    return f"search.in(chunk_id, '{joined}', ',')"
+
+
+def _apply_fetched(
+    plan: Dict[str, Any],
+    docs: List[Dict[str, Any]],
+    pending: List[Dict[str, Any]],
+    missing: List[str],
+    fetched: List[Dict[str, Any]],
+) -> List[Dict[str, Any]]:
+    """로컬 저장소에 없어 Azure에서 받은 본문을 채우고, 끝내 본문이 없는 문서는 뺌"""
+    by_id = {doc["chunk_id"]: doc for doc in fetched}
+    for doc in pending:
+        found = by_id.get(doc["chunk_id"])
+        if found is not None:
+            for field in ("chunk", "parent_id", "title"):
+                doc.setdefault(field, found.get(field))
+    plan["hydration"] = {"local": len(pending) - len(missing), "remote": len(fetched)}
+    if missing:
+        logger.warning("로컬 청크 저장소에 없는 청크 %d건을 Azure에서 조회: %s", len(missing), missing)
+    return [doc for doc in docs if doc.get("chunk")]
+
+
+def _hydrate_chunks(plan: Dict[str, Any], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    chunk_id만 받은 검색 결과에 본문을 채움 (프롬프트에 들어갈 top_k건만)
+    - 로컬 청크 저장소(memory-map)에서 채우고, 저장소에 없는 청크만 Azure에 id 필터로 한 번 더 조회
+    """
+    pending = [doc for doc in docs if "chunk" not in doc]
+    if not pending:
+        return docs
+    missing = get_chunk_store().hydrate(pending)
+    fetched: List[Dict[str, Any]] = []
+    if missing:
+        results = _get_search_client().search(
+            search_text=None, filter=_chunk_id_filter(missing), select=list(_SELECT_FIELDS), top=len(missing)
+        )
+        fetched = [_materialize_result(doc, _SELECT_FIELDS) for doc in results]
+    return _apply_fetched(plan, docs, pending, missing, fetched)
+
+
+def _search_azure(plan: Dict[str, Any], vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+    client = _get_search_client()
+    vector_query = VectorizedQuery(
+        vector=vector,
+        k_nearest_neighbors=top_k,
+        fields="text_vector",
+    )
+
+    fields = _select_fields()
+    results = client.search(
+        search_text=plan["search_text"],
+        vector_queries=[vector_query],
+        select=list(fields),
+        top=top_k,
+    )
+
+    docs: List[Dict[str, Any]] = []
+    for doc in results:
+        if "chunk" in fields and not doc.get("chunk"):
+            logger.debug("빈 chunk 문서 스킵: id=%s", doc.get("chunk_id"))
+            continue
+        docs.append(_materialize_result(doc, fields))
+    return docs
+
+
+def _search_local(plan: Dict[str, Any], vector: List[float], top_k: int) -> List[Dict[str, Any]]:
+    """
+    프로세스 내 로컬 인덱스 검색 (Azure 결과와 같은 필드 구성)
+    - LOCAL_HYBRID_SEARCH: 벡터 + BM25(search_text) RRF 결합, score는 RRF 점수 (Azure 하이브리드와 동일)
+    - 아니면 벡터 검색만, score는 코사인 유사도
+    """
+    index = get_local_index()
+    if AppConfig.LOCAL_HYBRID_SEARCH:
+        hits = index.hybrid_search(
+            vector, plan["search_text"], top_k, AppConfig.FUSION_CANDIDATES, AppConfig.RRF_K
+        )
+    else:
+        hits = index.search(vector, top_k)
+    plan["local_search"] = {"hybrid": AppConfig.LOCAL_HYBRID_SEARCH, "indexed_chunks": len(index)}
+    docs: List[Dict[str, Any]] = []
+    for doc, score in hits:
+        if not doc.get("chunk"):
+            continue
+        docs.append({**{field: doc.get(field) for field in _SELECT_FIELDS}, "score": score, "reranker_score": None})
+    return docs
+
+
+def _cached_results(plan: Dict[str, Any], vector: List[float], top_k: int) -> tuple[tuple, Optional[List[Dict[str, Any]]]]:
+    """검색 결과 캐시 조회 → (캐시 키, 문서 사본 또는 None), plan["search_cache"]에 적중 여부 기록"""
+    cache_key = _result_cache_key(plan["search_text"], vector, top_k)
+    if _result_cache is None:
+        return cache_key, None
+    cached_docs = _result_cache.get(cache_key)
+    plan["search_cache"] = {"hit": cached_docs is not None, "index_version": cache_key[1], **_result_cache.stats()}
+    if cached_docs is None:
+        return cache_key, None
+    plan["returned_docs"] = len(cached_docs)
+    logger.info("검색 캐시 적중: normalized='%s', 반환=%d건", plan["normalized_query"], len(cached_docs))
+    return cache_key, [dict(doc) for doc in cached_docs]
+
+
+def _log_search_done(plan: Dict[str, Any], docs: List[Dict[str, Any]]) -> None:
+    plan["returned_docs"] = len(docs)
+    logger.info(
+        "검색 완료: raw='%s', normalized='%s', expanded=%s, 반환=%d건",
+        plan["original_query"],
+        plan["normalized_query"],
+        plan["expansion_terms"],
+        len(docs),
+    )
+
+
+def _search_with_vector(plan: Dict[str, Any], vector: List[float], top_k: int) -> Dict[str, Any]:
+    """질의 벡터가 준비된 계획으로 검색 (결과 캐시 → 로컬/Azure)"""
+    try:
+        started = time.perf_counter()
+        if plan["backend"] == "local":
+            # 로컬 검색은 캐시 조회만큼 빠르므로 결과 캐시를 거치지 않음
+            docs = _rerank_mmr(plan, vector, _search_local(plan, vector, _candidate_count(top_k)), top_k)
+        else:
+            cache_key, cached_docs = _cached_results(plan, vector, top_k)
+            if cached_docs is not None:
+                return {"docs": _hydrate_chunks(plan, cached_docs), "meta": plan}
+
+            docs = _rerank_mmr(plan, vector, _search_azure(plan, vector, _candidate_count(top_k)), top_k)
+            # 캐시에는 본문을 채우기 전(chunk_id/점수만)의 결과를 둠
+            if _result_cache is not None:
+                _result_cache.put(cache_key, [dict(doc) for doc in docs])
+            docs = _hydrate_chunks(plan, docs)
+        plan["search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        _log_search_done(plan, docs)
+        return {"docs": docs, "meta": plan}
+
+    except Exception as exc:  # noqa: BLE001
+        return _search_failed(plan, exc)
+
+
+def _search_failed(plan: Dict[str, Any], exc: Exception) -> Dict[str, Any]:
+    logger.error("검색 중 오류: %s", exc, exc_info=True)
+    plan["error"] = str(exc)
+    return {"docs": [], "meta": plan}
+
+
 def search_top_k(query: str, top_k: int = 3) -> Dict[str, Any]:
-    """Azure Cognitive Search에서 상위 K건을 검색한다."""
+    """상위 K건을 검색한다. (RETRIEVER_BACKEND: azure = Azure Cognitive Search, local = 로컬 벡터/키워드 인덱스)"""
     plan = _prepare_query_plan(query)
     if not plan["vector_query_text"].strip():
         logger.warning("빈 쿼리가 전달되었습니다. 빈 결과를 반환합니다.")
         return {"docs": [], "meta": plan}
 
+    plan["backend"] = AppConfig.RETRIEVER_BACKEND
     try:
-        client = _get_search_client()
-        vector = _vectorize_query(plan["vector_query_text"])
+        vector = _vectorize_query(plan["vector_query_text"], plan)
+    except Exception as exc:  # noqa: BLE001
+        return _search_failed(plan, exc)
+    return _search_with_vector(plan, vector, top_k)
+
+
+def search_many(
+    queries: Sequence[str],
+    top_k: int = 3,
+    concurrency: int = AppConfig.SEARCH_MANY_CONCURRENCY,
+) -> List[Dict[str, Any]]:
+    """
+    여러 질의를 한 번에 검색 (평가/캐시 예열용)
+    - 모든 질의를 먼저 계획하고, 메모리 캐시에 없는 질의 벡터는 중복을 제거해 임베딩 배처로 묶어 요청
+      (요청당 토큰/입력 한도, 동시 요청, 429 재시도, 영구 캐시는 배처가 처리)
+    - 검색은 concurrency개 스레드로 동시에 실행
+    :return: 입력 순서대로 search_top_k와 같은 형식의 결과 리스트 (질의별 meta 포함)
+    """
+    started = time.perf_counter()
+    plans = [_prepare_query_plan(query) for query in queries]
+    results: List[Optional[Dict[str, Any]]] = [None] * len(plans)
+
+    # 질의 벡터: 메모리 캐시 → (중복 제거 후) 배치 임베딩
+    keys: Dict[str, str] = {}
+    vectors: Dict[str, List[float]] = {}
+    memory_hits = 0
+    for i, plan in enumerate(plans):
+        if not plan["vector_query_text"].strip():
+            results[i] = {"docs": [], "meta": plan}
+            continue
+        plan["backend"] = AppConfig.RETRIEVER_BACKEND
+        key = normalize_text(plan["vector_query_text"])
+        if key not in keys and key not in vectors:
+            cached = _cached_query_vector(key)
+            if cached is not None:
+                vectors[key] = cached
+                memory_hits += 1
+            else:
+                keys[key] = plan["vector_query_text"]
+
+    embed_error: Optional[Exception] = None
+    if keys:
+        try:
+            embedded = get_embedding_batcher().embed(list(keys.values()))
+            for key, vector in zip(keys, embedded):
+                vectors[key] = vector
+        except Exception as exc:  # noqa: BLE001
+            logger.error("일괄 질의 임베딩 실패: %s", exc, exc_info=True)
+            embed_error = exc
+
+    pending = []
+    for i, plan in enumerate(plans):
+        if results[i] is not None:
+            continue
+        key = normalize_text(plan["vector_query_text"])
+        vector = vectors.get(key)
+        if vector is None:
+            results[i] = _search_failed(plan, embed_error or RuntimeError("질의 임베딩 없음"))
+            continue
+        _remember_query_vector(key, vector, "batch" if key in keys else "memory", plan)
+        pending.append((i, plan, vector))
+
+    with ThreadPoolExecutor(max_workers=max(1, min(concurrency, len(pending) or 1))) as executor:
+        futures = [(i, executor.submit(_search_with_vector, plan, vector, top_k)) for i, plan, vector in pending]
+        for i, future in futures:
+            results[i] = future.result()
+
+    logger.info(
+        "일괄 검색 완료: 질의 %d건, 임베딩 %d건(메모리 캐시 %d건), 오류 %d건, %.2f초",
+        len(plans),
+        len(keys),
+        memory_hits,
+        sum(1 for r in results if r is not None and "error" in r["meta"]),
+        time.perf_counter() - started,
+    )
+    return cast(List[Dict[str, Any]], results)
 
-        vector_query = VectorizedQuery(
-            vector=vector,
-            k_nearest_neighbors=top_k,
-            fields="text_vector",
-        )
 
-        results = client.search(
-            search_text=plan["search_text"],
-            vector_queries=[vector_query],
-            select=["chunk_id", "parent_id", "chunk", "title", "content"],
-            top=top_k,
+# ===== 비동기 검색 =====
+# aio 클라이언트는 생성한 이벤트 루프에 묶이므로 루프별로 만들어 둔다.
+# (루프를 끝내기 전에 aclose_async_clients()를 await하거나 async_search_session()으로 감싸야 세션이 닫힘)
+# 디스크 캐시(SQLite)/청크 저장소/로컬 인덱스 조회와 NumPy 계산은 asyncio.to_thread로 돌려 이벤트 루프를 막지 않는다.
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, tuple[AsyncSearchClient, AsyncAzureOpenAI]]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def _get_async_clients() -> tuple[AsyncSearchClient, AsyncAzureOpenAI]:
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.get(loop)
+    if clients is None:
+        _ensure_config()
+        clients = (
+            AsyncSearchClient(
+                endpoint=AppConfig.AIS_ENDPOINT,
+                index_name=AppConfig.AIS_INDEX,
+                credential=AzureKeyCredential(AppConfig.AIS_API_KEY),
+            ),
+            AsyncAzureOpenAI(
+                azure_endpoint=cast(str, AppConfig.AOAI_ENDPOINT or "").rstrip("/"),
+                api_key=cast(str, AppConfig.AOAI_API_KEY or ""),
+                api_version=AppConfig.AOAI_API_VERSION,
+            ),
         )
+        _async_clients[loop] = clients
+        logger.info("비동기 SearchClient / AzureOpenAI 클라이언트 생성 완료: index=%s", AppConfig.AIS_INDEX)
+    return clients
+
+
+async def aclose_async_clients() -> None:
+    """현재 이벤트 루프의 비동기 클라이언트를 닫음 (API 서버 종료 시 호출)"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), None)
+    if clients is not None:
+        await clients[0].close()
+        await clients[1].close()
+
+
+@asynccontextmanager
+async def async_search_session() -> AsyncIterator[None]:
+    """
+    비동기 검색 구간 (끝나면 현재 루프의 클라이언트를 닫음)
+    예: async with async_search_session(): await asearch_top_k(...)
+    """
+    try:
+        yield
+    finally:
+        await aclose_async_clients()
 
-        docs: List[Dict[str, Any]] = []
-        for doc in results:
-            if not doc.get("chunk"):
-                logger.debug("빈 chunk 문서 스킵: id=%s", doc.get("chunk_id"))
-                continue
-            docs.append(_materialize_result(doc))
-
-        plan["returned_docs"] = len(docs)
-        logger.info(
-            "검색 완료: raw='%s', normalized='%s', expanded=%s, 반환=%d건",
-            plan["original_query"],
-            plan["normalized_query"],
-            plan["expansion_terms"],
-            len(docs),
+
+async def _aembed_query(query: str) -> tuple[List[float], str]:
+    """_embed_query의 비동기 버전 → (벡터, "disk" | "api")"""
+    cached = await asyncio.to_thread(_disk_cached_embedding, query)
+    if cached is not None:
+        return cached, "disk"
+
+    response = await _get_async_clients()[1].embeddings.create(**_embedding_request(query))
+    vector = response.data[0].embedding
+    await asyncio.to_thread(_store_embedding, query, vector)
+    return vector, "api"
+
+
+async def _asearch_azure(
+    search_text: Optional[str],
+    vector: Optional[List[float]],
+    top_k: int,
+    top: Optional[int] = None,
+    fields: Sequence[str] = _SELECT_FIELDS,
+) -> List[Dict[str, Any]]:
+    """
+    비동기 검색 (search_text만 주면 키워드 검색, vector만 주면 벡터 검색, 둘 다 주면 하이브리드)
+    :param fields: select할 필드 (_select_fields()는 청크 저장소를 열 수 있으므로 호출하는 쪽에서 스레드로 구해 넘김)
+    """
+    vector_queries = (
+        [VectorizedQuery(vector=vector, k_nearest_neighbors=top_k, fields="text_vector")] if vector is not None else None
+    )
+    results = await _get_async_clients()[0].search(
+        search_text=search_text,
+        vector_queries=vector_queries,
+        select=list(fields),
+        top=top or top_k,
+    )
+    docs: List[Dict[str, Any]] = []
+    async for doc in results:
+        if "chunk" in fields and not doc.get("chunk"):
+            logger.debug("빈 chunk 문서 스킵: id=%s", doc.get("chunk_id"))
+            continue
+        docs.append(_materialize_result(doc, fields))
+    return docs
+
+
+async def _afetch_vectors(chunk_ids: List[str]) -> Dict[str, List[float]]:
+    """_fetch_vectors의 비동기 버전"""
+    results = await _get_async_clients()[0].search(
+        search_text=None, filter=_chunk_id_filter(chunk_ids), select=list(_VECTOR_FIELDS), top=len(chunk_ids)
+    )
+    return {doc["chunk_id"]: doc.get("text_vector") async for doc in results}
+
+
+async def _arerank_mmr(
+    plan: Dict[str, Any], vector: List[float], docs: List[Dict[str, Any]], top_k: int
+) -> List[Dict[str, Any]]:
+    """_rerank_mmr의 비동기 버전 (로컬 인덱스에 없는 후보 벡터만 비동기로 조회)"""
+    if not _needs_mmr(docs, top_k):
+        return docs[:top_k]
+    started = time.perf_counter()
+    chunk_ids = [doc["chunk_id"] for doc in docs]
+    index, missing = await asyncio.to_thread(_local_vector_source, plan, chunk_ids)
+    fetched: Dict[str, List[float]] = {}
+    if missing:
+        try:
+            fetched = await _afetch_vectors(missing)
+        except HttpResponseError as exc:
+            _skip_mmr(plan, exc)
+            return docs[:top_k]
+    plan["mmr_vectors"] = {"local": len(chunk_ids) - len(missing), "remote": len(missing)}
+    return await asyncio.to_thread(
+        lambda: _apply_mmr(plan, vector, docs, top_k, _stack_vectors(chunk_ids, index, fetched), started)
+    )
+
+
+async def _ahydrate_chunks(plan: Dict[str, Any], docs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """_hydrate_chunks의 비동기 버전"""
+    pending = [doc for doc in docs if "chunk" not in doc]
+    if not pending:
+        return docs
+    missing = await asyncio.to_thread(get_chunk_store().hydrate, pending)
+    fetched: List[Dict[str, Any]] = []
+    if missing:
+        results = await _get_async_clients()[0].search(
+            search_text=None, filter=_chunk_id_filter(missing), select=list(_SELECT_FIELDS), top=len(missing)
         )
+        fetched = [_materialize_result(doc, _SELECT_FIELDS) async for doc in results]
+    return _apply_fetched(plan, docs, pending, missing, fetched)
+
+
+def _fuse_results(rankings: List[List[Dict[str, Any]]], top_k: int) -> List[Dict[str, Any]]:
+    """문서 목록들을 chunk_id 기준 RRF로 합침 (score는 RRF 점수, Azure 하이브리드 점수와 같은 척도)"""
+    by_id: Dict[str, Dict[str, Any]] = {}
+    for docs in rankings:
+        for doc in docs:
+            by_id.setdefault(doc["chunk_id"], doc)
+    fused = reciprocal_rank_fusion([[doc["chunk_id"] for doc in docs] for docs in rankings], k=AppConfig.RRF_K)
+    return [{**by_id[doc_id], "score": score} for doc_id, score in fused[:top_k]]
+
+
+async def asearch_top_k(query: str, top_k: int = 3) -> Dict[str, Any]:
+    """
+    search_top_k의 비동기 버전 (반환 형식 동일)
+    - 질의 임베딩이 메모리 캐시에 없으면 임베딩 생성과 키워드 검색을 동시에 시작하고,
+      벡터가 나오면 벡터 검색 결과와 RRF로 합친다. (두 네트워크 지연이 더해지지 않음)
+    - 하나의 이벤트 루프에서 여러 검색을 동시에 실행할 수 있다. (블로킹 조회/계산은 스레드에서 실행)
+    - 루프를 끝내기 전에 aclose_async_clients()를 await하거나 async_search_session() 안에서 호출한다.
+    """
+    plan = _prepare_query_plan(query)
+    if not plan["vector_query_text"].strip():
+        logger.warning("빈 쿼리가 전달되었습니다. 빈 결과를 반환합니다.")
+        return {"docs": [], "meta": plan}
+
+    backend = AppConfig.RETRIEVER_BACKEND
+    plan["backend"] = backend
+    keyword_task: Optional[asyncio.Task] = None
+    try:
+        key = normalize_text(plan["vector_query_text"])
+        vector = _cached_query_vector(key)
+        source = "memory"
+        started = time.perf_counter()
+        fetch_k = _candidate_count(top_k)
+        fields = await asyncio.to_thread(_select_fields) if backend != "local" else _SELECT_FIELDS
+        if vector is None and backend != "local":
+            candidates = max(fetch_k, AppConfig.FUSION_CANDIDATES)
+            keyword_task = asyncio.create_task(
+                _asearch_azure(plan["search_text"], None, fetch_k, candidates, fields=fields)
+            )
+        if vector is None:
+            vector, source = await _aembed_query(plan["vector_query_text"])
+        _remember_query_vector(key, vector, source, plan)
+
+        if backend == "local":
+            docs = await asyncio.to_thread(
+                lambda: _rerank_mmr(plan, vector, _search_local(plan, vector, fetch_k), top_k)
+            )
+        else:
+            cache_key, cached_docs = await asyncio.to_thread(_cached_results, plan, vector, top_k)
+            if cached_docs is not None:
+                if keyword_task is not None:
+                    keyword_task.cancel()
+                return {"docs": await _ahydrate_chunks(plan, cached_docs), "meta": plan}
+
+            if keyword_task is None:
+                plan["async_strategy"] = "hybrid"
+                docs = await _asearch_azure(plan["search_text"], vector, fetch_k, fields=fields)
+            else:
+                plan["async_strategy"] = "overlapped"
+                vector_docs, keyword_docs = await asyncio.gather(
+                    _asearch_azure(None, vector, fetch_k, fields=fields), keyword_task
+                )
+                docs = _fuse_results([vector_docs, keyword_docs], fetch_k)
+            docs = await _arerank_mmr(plan, vector, docs, top_k)
+            if _result_cache is not None:
+                _result_cache.put(cache_key, [dict(doc) for doc in docs])
+            docs = await _ahydrate_chunks(plan, docs)
+        plan["search_ms"] = round((time.perf_counter() - started) * 1000, 3)
+
+        _log_search_done(plan, docs)
         return {"docs": docs, "meta": plan}
 
     except Exception as exc:  # noqa: BLE001
+        if keyword_task is not None and not keyword_task.done():
+            keyword_task.cancel()
         logger.error("검색 중 오류: %s", exc, exc_info=True)
         plan["error"] = str(exc)
         return {"docs": [], "meta": plan}
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+    import json
+
+    parser = argparse.ArgumentParser(description="검색 결과 확인")
+    parser.add_argument("query", type=str, help="검색 질의")
+    parser.add_argument("--top-k", type=int, default=3, help="결과 문서 수")
+    parser.add_argument("--async", dest="use_async", action="store_true", help="asearch_top_k로 검색")
+    args = parser.parse_args()
+
+    async def _amain() -> Dict[str, Any]:
+        async with async_search_session():
+            return await asearch_top_k(args.query, top_k=args.top_k)
+
+    output = asyncio.run(_amain()) if args.use_async else search_top_k(args.query, top_k=args.top_k)
+    for rank, doc in enumerate(output["docs"], start=1):
+        print(f"{rank}. [{doc.get('chunk_id')}] score={doc.get('score')}  {str(doc.get('chunk') or '')[:80]!r}")
+    print(json.dumps(output["meta"], ensure_ascii=False, default=str, indent=2))
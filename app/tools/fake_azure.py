@@ -0,0 +1,511 @@
+"""
+fake_azure.py : 부하 테스트용 Azure AI Search / Azure OpenAI 대역 HTTP 서버
+- 앱이 쓰는 엔드포인트만 흉내 낸다.
+  · AI Search : 문서 업로드/삭제(docs/search.index), 하이브리드 검색(docs/search.post.search, vectorQueries 포함,
+                filter는 키 필드 search.in(...)만)
+  · OpenAI    : 임베딩(deployments/<배포>/embeddings), 채팅 완성(deployments/<배포>/chat/completions, stream 포함)
+- 임베딩은 토큰 해시 기반의 결정적 벡터라 같은 문장은 같은 벡터, 표현이 겹치는 문장은 가까운 벡터가 된다.
+  답변도 질문 해시로 정해지므로 같은 입력이면 항상 같은 응답을 준다.
+- 엔드포인트별로 지연 분포, 5xx/429 주입 비율, 초당 처리 한도(넘으면 429 + Retry-After)를 설정한다.
+- GET /_stats 로 엔드포인트별 요청 수, 상태 코드, 지연 백분위를 확인하고 POST /_reset 으로 초기화한다.
+
+사용 예:
+    python -m app.tools.fake_azure --port 8765 --latency search=lognormal:80:0.4 --latency chat=lognormal:900:0.3 \\
+        --rps embeddings=20 --throttle-rate 0.01
+    AIS_ENDPOINT=http://127.0.0.1:8765 AOAI_ENDPOINT=http://127.0.0.1:8765 streamlit run app/ui/streamlit_app.py
+"""
+
+from __future__ import annotations
+
+import base64
+import hashlib
+import json
+import logging
+import random
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import numpy as np
+
+from app.core.keyword_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+logger = logging.getLogger("entraaid_app")
+
+ENDPOINTS = ("search", "index", "embeddings", "chat")
+
+_SEARCH_PATH = re.compile(r"^/indexes(?:\('([^']+)'\)|/([^/]+))/docs/(search\.post\.search|search\.index)$")
+_OPENAI_PATH = re.compile(r"^/openai/deployments/([^/]+)/(embeddings|chat/completions)$")
+
+
+# ===== 지연 분포 =====
+
+
+def parse_latency(spec: str) -> Callable[[random.Random], float]:
+    """
+    지연 분포 문자열 → (난수 생성기 → 초) 함수
+    - const:<ms> | uniform:<최소ms>:<최대ms> | normal:<평균ms>:<표준편차ms> | lognormal:<중앙값ms>:<sigma>
+    """
+    kind, _, rest = spec.partition(":")
+    args = [float(value) for value in rest.split(":") if value]
+    if kind == "const" and len(args) == 1:
+        return lambda rng: args[0] / 1000
+    if kind == "uniform" and len(args) == 2:
+        return lambda rng: rng.uniform(args[0], args[1]) / 1000
+    if kind == "normal" and len(args) == 2:
+        return lambda rng: max(0.0, rng.gauss(args[0], args[1])) / 1000
+    if kind == "lognormal" and len(args) == 2:
+        return lambda rng: args[0] * rng.lognormvariate(0.0, args[1]) / 1000
+    raise ValueError(f"지연 분포 형식 오류: {spec} (예: const:50, uniform:20:80, normal:100:20, lognormal:80:0.4)")
+
+
+class _TokenBucket:
+    """초당 rate건 처리 한도 (버스트 = 1초 분량)"""
+
+    def __init__(self, rate: float):
+        self.rate = rate
+        self.tokens = rate
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def take(self) -> float:
+        """처리 가능하면 0, 아니면 다음 토큰까지 기다려야 하는 초"""
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return 0.0
+            return (1 - self.tokens) / self.rate
+
+
+class FakeAzureSettings:
+    """엔드포인트별 지연/장애/처리 한도 설정"""
+
+    def __init__(
+        self,
+        latency: Optional[Dict[str, str]] = None,
+        error_rate: Optional[Dict[str, float]] = None,
+        throttle_rate: Optional[Dict[str, float]] = None,
+        rps: Optional[Dict[str, float]] = None,
+        dimensions: int = 1536,
+        seed: int = 0,
+    ):
+        self.latency = {name: parse_latency(spec) for name, spec in (latency or {}).items()}
+        self.error_rate = error_rate or {}
+        self.throttle_rate = throttle_rate or {}
+        self.buckets = {name: _TokenBucket(rate) for name, rate in (rps or {}).items() if rate > 0}
+        self.dimensions = dimensions
+        self.seed = seed
+
+
+# ===== 결정적 임베딩 / 답변 =====
+
+
+def fake_embedding(text: str, dimensions: int) -> np.ndarray:
+    """토큰마다 해시 시드 난수 벡터를 더해 정규화 (같은 토큰을 공유할수록 코사인 유사도가 높음)"""
+    vector = np.zeros(dimensions, dtype=np.float32)
+    for token in tokenize(text) or [text]:
+        seed = int.from_bytes(hashlib.blake2b(token.encode("utf-8"), digest_size=8).digest(), "little")
+        vector += np.random.default_rng(seed).standard_normal(dimensions, dtype=np.float32)
+    norm = float(np.linalg.norm(vector))
+    return vector / norm if norm else vector
+
+
+def fake_answer(messages: List[Dict[str, Any]]) -> str:
+    question = ""
+    for message in reversed(messages):
+        if message.get("role") == "user":
+            content = message.get("content")
+            question = content if isinstance(content, str) else json.dumps(content, ensure_ascii=False)
+            break
+    digest = hashlib.sha1(question.encode("utf-8")).hexdigest()[:8]
+    summary = re.sub(r"\s+", " ", question)[-80:].strip()
+    return f"[fake-{digest}] 질문 요약: {summary}"
+
+
+def _count_tokens(text: str) -> int:
+    return max(1, len(text) // 3)
+
+
+# ===== 인메모리 검색 인덱스 =====
+
+
+_SEARCH_IN = re.compile(r"^\s*search\.in\(\s*(\w+)\s*,\s*'((?:[^']|'')*)'\s*(?:,\s*'([^']*)'\s*)?\)\s*$")
+
+
+def _parse_search_in(expression: Optional[str], key_field: str) -> Optional[Dict[str, None]]:
+    """
+    키 필드에 대한 search.in(...) 필터만 지원 (순서 유지한 키 목록, 필터가 없으면 None)
+    - 그 밖의 OData 필터는 ValueError (400 응답)
+    """
+    if not expression:
+        return None
+    match = _SEARCH_IN.match(expression)
+    if match is None or match.group(1) != key_field:
+        raise ValueError(f"지원하지 않는 필터: {expression}")
+    delimiters = match.group(3) or " ,"
+    values = re.split("[" + re.escape(delimiters) + "]", match.group(2).replace("''", "'"))
+    return dict.fromkeys(value for value in values if value)
+
+
+class _FakeSearchIndex:
+    """업로드된 문서의 벡터(코사인) + BM25 순위를 RRF로 합쳐 Azure 하이브리드 검색을 흉내 냄"""
+
+    def __init__(self, key_field: str = "chunk_id", vector_field: str = "text_vector", text_field: str = "chunk"):
+        self.key_field = key_field
+        self.vector_field = vector_field
+        self.text_field = text_field
+        self.docs: Dict[str, Dict[str, Any]] = {}
+        self.keywords = BM25Index()
+        self._matrix: Optional[Tuple[List[str], np.ndarray]] = None
+        self._lock = threading.Lock()
+
+    def apply(self, action: Dict[str, Any]) -> Tuple[str, bool, int, Optional[str]]:
+        kind = action.pop("@search.action", "upload")
+        key = action.get(self.key_field)
+        if not key:
+            return "", False, 400, f"키 필드({self.key_field})가 없습니다."
+        with self._lock:
+            if kind == "delete":
+                self.docs.pop(key, None)
+                self.keywords.remove(key)
+            elif kind in ("upload", "mergeOrUpload", "merge"):
+                if kind == "merge" and key not in self.docs:
+                    return key, False, 404, "문서가 없습니다."
+                doc = {**self.docs.get(key, {}), **action} if kind != "upload" else action
+                self.docs[key] = doc
+                self.keywords.add(key, str(doc.get(self.text_field) or ""))
+            else:
+                return key, False, 400, f"지원하지 않는 동작: {kind}"
+            self._matrix = None
+        return key, True, 201 if kind == "upload" else 200, None
+
+    def _vectors(self) -> Tuple[List[str], np.ndarray]:
+        with self._lock:
+            if self._matrix is None:
+                keys = [key for key, doc in self.docs.items() if doc.get(self.vector_field)]
+                matrix = np.asarray([self.docs[key][self.vector_field] for key in keys], dtype=np.float32)
+                if len(keys):
+                    matrix /= np.maximum(np.linalg.norm(matrix, axis=1, keepdims=True), 1e-12)
+                self._matrix = (keys, matrix)
+            return self._matrix
+
+    def search(self, body: Dict[str, Any]) -> List[Dict[str, Any]]:
+        top = int(body.get("top") or 50)
+        rankings: List[List[str]] = []
+        search_text = body.get("search") or ""
+        if search_text and search_text != "*":
+            rankings.append([key for key, _ in self.keywords.search(search_text, max(top, 50))])
+        for vector_query in body.get("vectorQueries") or []:
+            keys, matrix = self._vectors()
+            if not keys:
+                continue
+            query = np.asarray(vector_query.get("vector") or [], dtype=np.float32)
+            if query.shape[0] != matrix.shape[1]:
+                raise ValueError(f"벡터 차원 불일치: {query.shape[0]} != {matrix.shape[1]}")
+            scores = matrix @ (query / (np.linalg.norm(query) or 1.0))
+            k = min(int(vector_query.get("k") or vector_query.get("k_nearest_neighbors") or top), len(keys))
+            best = np.argsort(-scores, kind="stable")[:k]
+            rankings.append([keys[i] for i in best])
+
+        allowed = _parse_search_in(body.get("filter"), self.key_field)
+        if not rankings and allowed is not None:
+            rankings.append([key for key in allowed if key in self.docs])  # 필터만 준 조회 (id 목록 조회)
+
+        fused = reciprocal_rank_fusion(rankings)
+        if allowed is not None:
+            fused = [(key, score) for key, score in fused if key in allowed]
+
+        select = [field.strip() for field in (body.get("select") or "").split(",") if field.strip()]
+        results = []
+        for key, score in fused[:top]:
+            doc = self.docs.get(key)
+            if doc is None:
+                continue
+            fields = select or [name for name in doc if name != self.vector_field]
+            results.append({"@search.score": score, **{name: doc.get(name) for name in fields}})
+        return results
+
+
+# ===== HTTP 서버 =====
+
+
+class FakeAzureServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+    request_queue_size = 1024  # 기본값(5)이면 동시 접속이 몰릴 때 SYN 재전송으로 1초씩 지연됨
+
+    def __init__(self, address: Tuple[str, int], settings: Optional[FakeAzureSettings] = None):
+        super().__init__(address, _Handler)
+        self.settings = settings or FakeAzureSettings()
+        self.indexes: Dict[str, _FakeSearchIndex] = {}
+        self.rng = random.Random(self.settings.seed)
+        self.rng_lock = threading.Lock()
+        self.stats_lock = threading.Lock()
+        self.reset_stats()
+
+    @property
+    def endpoint(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def index(self, name: str) -> _FakeSearchIndex:
+        with self.stats_lock:
+            return self.indexes.setdefault(name, _FakeSearchIndex())
+
+    def reset_stats(self) -> None:
+        with self.stats_lock:
+            self.stats: Dict[str, Dict[str, Any]] = {
+                name: {"requests": 0, "status": {}, "latencies": []} for name in ENDPOINTS
+            }
+
+    def record(self, endpoint: str, status: int, seconds: float) -> None:
+        with self.stats_lock:
+            stats = self.stats[endpoint]
+            stats["requests"] += 1
+            stats["status"][str(status)] = stats["status"].get(str(status), 0) + 1
+            stats["latencies"].append(seconds)
+
+    def summary(self) -> Dict[str, Any]:
+        with self.stats_lock:
+            out: Dict[str, Any] = {}
+            for name, stats in self.stats.items():
+                latencies = np.asarray(stats["latencies"]) * 1000
+                out[name] = {
+                    "requests": stats["requests"],
+                    "status": dict(stats["status"]),
+                    **(
+                        {
+                            f"p{q}_ms": round(float(np.percentile(latencies, q)), 1)
+                            for q in (50, 95, 99)
+                        }
+                        if len(latencies)
+                        else {}
+                    ),
+                }
+            out["documents"] = {name: len(index.docs) for name, index in self.indexes.items()}
+            return out
+
+    def draw(self, endpoint: str) -> Tuple[float, Optional[int], float]:
+        """(주입 지연 초, 주입 오류 상태 코드 또는 None, Retry-After 초)"""
+        settings = self.settings
+        wait = settings.buckets[endpoint].take() if endpoint in settings.buckets else 0.0
+        with self.rng_lock:
+            latency = settings.latency[endpoint](self.rng) if endpoint in settings.latency else 0.0
+            roll = self.rng.random()
+        if wait > 0:
+            return 0.0, 429, wait
+        if roll < settings.throttle_rate.get(endpoint, 0.0):
+            return latency, 429, 1.0
+        if roll < settings.throttle_rate.get(endpoint, 0.0) + settings.error_rate.get(endpoint, 0.0):
+            return latency, 503, 0.0
+        return latency, None, 0.0
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server: FakeAzureServer
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True  # 헤더/본문 분할 전송 시 지연 ACK로 요청마다 ~40ms가 더해지는 것 방지
+
+    def log_message(self, format: str, *args: Any) -> None:  # noqa: A002 - 부모 시그니처
+        logger.debug("fake_azure %s", format % args)
+
+    def _send_json(self, status: int, payload: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _read_json(self) -> Dict[str, Any]:
+        length = int(self.headers.get("Content-Length") or 0)
+        return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+    def do_GET(self) -> None:  # noqa: N802
+        if urlsplit(self.path).path == "/_stats":
+            self._send_json(200, self.server.summary())
+        else:
+            self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+
+    def do_POST(self) -> None:  # noqa: N802
+        path = urlsplit(self.path).path
+        if path == "/_reset":
+            self._read_json()
+            self.server.reset_stats()
+            self._send_json(200, {"reset": True})
+            return
+
+        search_match = _SEARCH_PATH.match(path)
+        openai_match = _OPENAI_PATH.match(path)
+        if search_match:
+            index_name = search_match.group(1) or search_match.group(2)
+            endpoint = "search" if search_match.group(3) == "search.post.search" else "index"
+        elif openai_match:
+            endpoint = "embeddings" if openai_match.group(2) == "embeddings" else "chat"
+        else:
+            self._read_json()
+            self._send_json(404, {"error": {"code": "NotFound", "message": f"지원하지 않는 경로: {path}"}})
+            return
+
+        started = time.perf_counter()
+        body = self._read_json()
+        latency, fault, retry_after = self.server.draw(endpoint)
+        if latency:
+            time.sleep(latency)
+        try:
+            if fault == 429:
+                self._send_json(
+                    429,
+                    {"error": {"code": "429", "message": "Rate limit is exceeded. (fake)"}},
+                    {"Retry-After": str(max(1, round(retry_after))), "retry-after-ms": str(int(retry_after * 1000))},
+                )
+            elif fault is not None:
+                self._send_json(fault, {"error": {"code": "ServiceUnavailable", "message": "Injected failure (fake)"}})
+            elif endpoint == "search":
+                self._send_json(200, {"value": self.server.index(index_name).search(body)})
+            elif endpoint == "index":
+                self._handle_index(self.server.index(index_name), body)
+            elif endpoint == "embeddings":
+                self._handle_embeddings(openai_match.group(1), body)  # type: ignore[union-attr]
+            else:
+                self._handle_chat(openai_match.group(1), body)  # type: ignore[union-attr]
+            status = fault or 200
+        except (ValueError, TypeError, KeyError) as exc:
+            self._send_json(400, {"error": {"code": "InvalidRequest", "message": str(exc)}})
+            status = 400
+        self.server.record(endpoint, status, time.perf_counter() - started)
+
+    def _handle_index(self, index: _FakeSearchIndex, body: Dict[str, Any]) -> None:
+        results = []
+        for action in body.get("value") or []:
+            key, ok, status, message = index.apply(dict(action))
+            results.append({"key": key, "status": ok, "errorMessage": message, "statusCode": status})
+        self._send_json(200 if all(r["status"] for r in results) else 207, {"value": results})
+
+    def _handle_embeddings(self, deployment: str, body: Dict[str, Any]) -> None:
+        inputs = body.get("input")
+        texts = [inputs] if isinstance(inputs, str) else list(inputs or [])
+        dimensions = int(body.get("dimensions") or self.server.settings.dimensions)
+        as_base64 = body.get("encoding_format") == "base64"
+        data = []
+        for i, text in enumerate(texts):
+            vector = fake_embedding(str(text), dimensions)
+            embedding: Any = base64.b64encode(vector.astype("<f4").tobytes()).decode("ascii") if as_base64 else vector.tolist()
+            data.append({"object": "embedding", "index": i, "embedding": embedding})
+        tokens = sum(_count_tokens(str(text)) for text in texts)
+        self._send_json(
+            200,
+            {"object": "list", "data": data, "model": deployment, "usage": {"prompt_tokens": tokens, "total_tokens": tokens}},
+        )
+
+    def _handle_chat(self, deployment: str, body: Dict[str, Any]) -> None:
+        messages = body.get("messages") or []
+        answer = fake_answer(messages)
+        prompt_tokens = sum(_count_tokens(json.dumps(m, ensure_ascii=False)) for m in messages)
+        completion_id = f"chatcmpl-fake-{hashlib.sha1(answer.encode('utf-8')).hexdigest()[:12]}"
+        usage = {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": _count_tokens(answer),
+            "total_tokens": prompt_tokens + _count_tokens(answer),
+        }
+        if not body.get("stream"):
+            self._send_json(
+                200,
+                {
+                    "id": completion_id,
+                    "object": "chat.completion",
+                    "created": int(time.time()),
+                    "model": deployment,
+                    "choices": [
+                        {"index": 0, "message": {"role": "assistant", "content": answer}, "finish_reason": "stop"}
+                    ],
+                    "usage": usage,
+                },
+            )
+            return
+
+        # stream=True: 단어 단위 SSE 청크
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+        pieces = [{"role": "assistant", "content": ""}] + [{"content": word} for word in re.findall(r"\S+\s*", answer)]
+        for i, delta in enumerate(pieces + [{}]):
+            chunk = {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": deployment,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": "stop" if i == len(pieces) else None}],
+            }
+            self.wfile.write(f"data: {json.dumps(chunk, ensure_ascii=False)}\n\n".encode("utf-8"))
+        self.wfile.write(b"data: [DONE]\n\n")
+
+
+def start_server(
+    host: str = "127.0.0.1",
+    port: int = 0,
+    settings: Optional[FakeAzureSettings] = None,
+) -> FakeAzureServer:
+    """백그라운드 스레드에서 서버를 띄우고 반환 (port=0이면 빈 포트 사용, 종료는 server.shutdown())"""
+    server = FakeAzureServer((host, port), settings)
+    threading.Thread(target=server.serve_forever, name="fake-azure", daemon=True).start()
+    logger.info("Azure 대역 서버 시작: %s", server.endpoint)
+    return server
+
+
+def _parse_pairs(values: List[str], cast: Callable[[str], Any]) -> Dict[str, Any]:
+    """["search=lognormal:80:0.4", "0.01"] → 엔드포인트별 값 (이름 없는 값은 전체 엔드포인트에 적용)"""
+    out: Dict[str, Any] = {}
+    for value in values:
+        name, sep, spec = value.partition("=")
+        if not sep:
+            out.update({endpoint: cast(value) for endpoint in ENDPOINTS})
+        elif name not in ENDPOINTS:
+            raise ValueError(f"알 수 없는 엔드포인트: {name} ({', '.join(ENDPOINTS)})")
+        else:
+            out[name] = cast(spec)
+    return out
+
+
+# 단독 실행 시 동작
+if __name__ == "__main__":
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Azure AI Search / Azure OpenAI 대역 서버 (부하 테스트용)")
+    parser.add_argument("--host", type=str, default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", action="append", default=[], help="[엔드포인트=]분포 (예: chat=lognormal:900:0.3)")
+    parser.add_argument("--error-rate", action="append", default=[], help="[엔드포인트=]503 주입 비율 (0~1)")
+    parser.add_argument("--throttle-rate", action="append", default=[], help="[엔드포인트=]429 주입 비율 (0~1)")
+    parser.add_argument("--rps", action="append", default=[], help="[엔드포인트=]초당 처리 한도 (넘으면 429)")
+    parser.add_argument("--dimensions", type=int, default=1536, help="기본 임베딩 차원")
+    parser.add_argument("--seed", type=int, default=0, help="지연/장애 난수 시드")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    fake = FakeAzureServer(
+        (args.host, args.port),
+        FakeAzureSettings(
+            latency=_parse_pairs(args.latency, str),
+            error_rate=_parse_pairs(args.error_rate, float),
+            throttle_rate=_parse_pairs(args.throttle_rate, float),
+            rps=_parse_pairs(args.rps, float),
+            dimensions=args.dimensions,
+            seed=args.seed,
+        ),
+    )
+    print(f"AIS_ENDPOINT={fake.endpoint} AOAI_ENDPOINT={fake.endpoint} (Ctrl+C로 종료)")
+    try:
+        fake.serve_forever()
+    except KeyboardInterrupt:
+        fake.server_close()
@@ -260,6 +260,13 @@ def _summarize_search_meta(meta: Dict[str, Any]) -> List[str]:
     returned = meta.get("returned_docs")
     if isinstance(returned, int):
         summary.append(f"반환 {returned}건")
+    if meta.get("embedding_source") in ("memory", "disk"):
+        summary.append(f"임베딩 캐시 적중({meta['embedding_source']})")
+    if (meta.get("search_cache") or {}).get("hit"):
+        summary.append("검색 캐시 적중")
+    answer_cache = meta.get("answer_cache") or {}
+    if answer_cache.get("hit"):
+        summary.append(f"답변 캐시 적중(유사도 {answer_cache.get('similarity')})")
     error = meta.get("error")
     if error:
         summary.append(f"오류={error}")
@@ -0,0 +1,45 @@
+import os
+import sys
+
+# app.config는 import 시 필수 환경변수를 검증하므로 테스트용 더미 값을 먼저 채움 (실제 요청은 가짜 서버로만 감)
+for name in ("AOAI_ENDPOINT", "AOAI_DEPLOYMENT", "AOAI_API_KEY", "AIS_ENDPOINT", "AIS_API_KEY"):
+    os.environ.setdefault(name, "http://127.0.0.1:9" if name.endswith("ENDPOINT") else "test")
+os.environ.setdefault("AIS_INDEX", "test-index")
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import re  # noqa: E402
+
+import pytest  # noqa: E402
+
+_TOKEN_RE = re.compile(r"\S+\s*|\s+")
+
+
+class FakeEncoding:
+    """tiktoken 대신 쓰는 오프라인 인코딩 (공백 포함 단어 하나 = 토큰 하나, decode하면 원문과 같음)"""
+
+    def encode(self, text, disallowed_special=()):
+        return _TOKEN_RE.findall(text)
+
+    def decode(self, tokens):
+        return "".join(tokens)
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token)
+        return "".join(tokens), offsets
+
+
+@pytest.fixture()
+def fake_encoding(monkeypatch):
+    """청커/임베딩/컨텍스트 빌더의 tiktoken 인코딩을 FakeEncoding으로 바꿈 (인코딩 파일을 내려받지 않음)"""
+    import app.core.embeddings
+    import app.ingest.chunker
+    import app.rag.context_builder
+
+    encoding = FakeEncoding()
+    for module in (app.ingest.chunker, app.core.embeddings, app.rag.context_builder):
+        monkeypatch.setattr(module, "_encoding", encoding)
+    return encoding
@@ -0,0 +1,64 @@
+"""청커가 내보내는 (시작, 끝) 구간의 불변식 검증 (FakeEncoding: 공백 포함 단어 하나 = 토큰 하나)"""
+
+import pytest
+
+from app.ingest.chunker import chunk_text, iter_chunk_spans
+
+TEXT = "\n\n".join(
+    " ".join(f"문단{p} 문장{s}에는 단어가 여러 개 들어 있습니다." for s in range(6)) for p in range(8)
+)
+
+
+def _spans(text, chunk_size, overlap):
+    return list(iter_chunk_spans(text, chunk_size=chunk_size, overlap=overlap))
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(20, 0), (20, 5), (50, 10), (500, 50)])
+def test_spans_are_stripped_ordered_and_within_budget(fake_encoding, chunk_size, overlap):
+    spans = _spans(TEXT, chunk_size, overlap)
+    assert spans
+    for start, end in spans:
+        assert 0 <= start < end <= len(TEXT)
+        assert not TEXT[start].isspace() and not TEXT[end - 1].isspace()
+        assert len(fake_encoding.encode(TEXT[start:end])) <= chunk_size
+    starts = [start for start, _ in spans]
+    ends = [end for _, end in spans]
+    assert starts == sorted(starts) and ends == sorted(ends)
+
+
+@pytest.mark.parametrize("chunk_size,overlap", [(20, 0), (20, 5), (500, 50)])
+def test_spans_cover_every_non_space_character(fake_encoding, chunk_size, overlap):
+    covered = [False] * len(TEXT)
+    for start, end in _spans(TEXT, chunk_size, overlap):
+        covered[start:end] = [True] * (end - start)
+    assert all(covered[i] for i, char in enumerate(TEXT) if not char.isspace())
+
+
+def test_overlap_repeats_only_trailing_sentences(fake_encoding):
+    without = _spans(TEXT, 30, 0)
+    with_overlap = _spans(TEXT, 30, 12)
+    # overlap 없이는 청크가 겹치지 않고, overlap이 있으면 다음 청크가 앞 청크 안에서 시작할 수 있음
+    assert all(prev[1] <= cur[0] for prev, cur in zip(without, without[1:]))
+    assert any(cur[0] < prev[1] for prev, cur in zip(with_overlap, with_overlap[1:]))
+    for prev, cur in zip(with_overlap, with_overlap[1:]):
+        if cur[0] < prev[1]:
+            assert len(fake_encoding.encode(TEXT[cur[0] : prev[1]])) <= 12
+
+
+def test_long_sentence_is_split_on_token_boundaries(fake_encoding):
+    text = " ".join(f"w{i}" for i in range(95))
+    spans = _spans(text, 20, 5)
+    assert [len(text[start:end].split()) for start, end in spans] == [20] * 6
+    assert text[spans[1][0] :].startswith("w15 ")
+    assert text[spans[-1][0] : spans[-1][1]] == " ".join(f"w{i}" for i in range(75, 95))
+
+
+def test_chunk_text_returns_span_texts(fake_encoding):
+    pages = [TEXT, "  ", "마지막 페이지."]
+    expected = [TEXT[start:end] for start, end in _spans(TEXT, 40, 8)] + ["마지막 페이지."]
+    assert chunk_text(pages, chunk_size=40, overlap=8) == expected
+
+
+def test_chunk_text_rejects_overlap_not_smaller_than_chunk_size(fake_encoding):
+    with pytest.raises(ValueError):
+        chunk_text(["본문"], chunk_size=10, overlap=10)
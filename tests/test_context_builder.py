@@ -0,0 +1,74 @@
+"""컨텍스트 빌더의 청크 overlap 제거와 토큰 예산 절단 검증 (FakeEncoding: 공백 포함 단어 하나 = 토큰 하나)"""
+
+import pytest
+
+from app.config import AppConfig
+from app.rag.context_builder import build_context, count_tokens
+
+S1 = "앱 등록 메뉴에서 새 등록을 선택합니다. "
+S2 = "리디렉션 URI는 인증 메뉴에서 웹 플랫폼으로 추가합니다. "
+S3 = "클라이언트 비밀은 인증서 및 비밀 메뉴에서 발급합니다. "
+S4 = "발급한 비밀 값은 한 번만 표시되므로 바로 보관합니다."
+
+
+@pytest.fixture(autouse=True)
+def overlap_min_chars(monkeypatch, fake_encoding):
+    monkeypatch.setattr(AppConfig, "CONTEXT_OVERLAP_MIN_CHARS", 20)
+
+
+def test_adjacent_chunk_overlap_is_kept_once():
+    docs = [
+        {"parent_id": "guide", "chunk": S1 + S2 + S3},
+        {"parent_id": "guide", "chunk": S3 + S4},  # 앞 청크 끝(S3)이 overlap으로 반복됨
+    ]
+    text, stats = build_context(docs, token_budget=0)
+    assert text == (S1 + S2 + S3).strip() + "\n\n" + S4
+    assert text.count("클라이언트 비밀은") == 1
+    assert stats["overlap_chars_removed"] == len(S3)
+    assert stats["tokens_after"] < stats["tokens_before"]
+
+
+def test_overlap_is_only_removed_within_the_same_document():
+    docs = [{"parent_id": "a", "chunk": S1 + S3}, {"parent_id": "b", "chunk": S3 + S4}]
+    text, stats = build_context(docs, token_budget=0)
+    assert text.count("클라이언트 비밀은") == 2
+    assert stats["overlap_chars_removed"] == 0
+
+
+def test_contained_and_leading_overlap_chunks():
+    docs = [
+        {"parent_id": "guide", "chunk": S2 + S3},
+        {"parent_id": "guide", "chunk": S2.strip()},  # 앞 청크에 통째로 포함
+        {"parent_id": "guide", "chunk": S1 + S2},  # 끝이 앞 청크의 시작과 겹침
+    ]
+    text, stats = build_context(docs, token_budget=0)
+    assert text == (S2 + S3).strip() + "\n\n" + S1.strip()
+    assert stats["chunks_used"] == 2
+
+
+def test_budget_drops_least_relevant_sentences_and_keeps_order():
+    docs = [{"parent_id": "guide", "chunk": S1 + S2 + S3 + S4}]
+    budget = count_tokens(S3) + count_tokens(S4)
+    text, stats = build_context(docs, question="클라이언트 비밀 발급", token_budget=budget)
+    assert text == (S3 + S4).strip()
+    assert stats["tokens_after"] <= budget
+    assert stats["sentences_dropped"] == 2
+    assert stats["sentences_truncated"] == 0
+
+
+def test_budget_smaller_than_any_sentence_truncates_best_sentence():
+    docs = [{"parent_id": "guide", "chunk": S1 + S3}]
+    text, stats = build_context(docs, question="클라이언트 비밀", token_budget=3)
+    assert text == "클라이언트 비밀은 인증서"
+    assert stats["tokens_after"] == 3
+    assert stats["sentences_truncated"] == 1
+
+
+def test_budget_counts_chunk_separators():
+    docs = [{"parent_id": "a", "chunk": S1}, {"parent_id": "b", "chunk": S3}, {"parent_id": "c", "chunk": S4}]
+    full, _ = build_context(docs, token_budget=0)
+    # 구분자 몫(청크 3개 → 2개)을 빼고도 S3이 들어가는 예산부터
+    for budget in range(count_tokens(S3) + 2, count_tokens(full) + 1):
+        text, stats = build_context(docs, question="클라이언트", token_budget=budget)
+        assert stats["tokens_after"] <= budget
+        assert S3.strip() in text  # 질문과 겹치는 문장은 빠지지 않음
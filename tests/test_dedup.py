@@ -0,0 +1,67 @@
+"""SimHash/LSH 유사 중복 판별 검증"""
+
+import random
+
+from app.ingest.dedup import NearDuplicateFilter, normalize_for_dedup, simhash
+
+BASE = (
+    "Microsoft Entra 관리 센터에서 앱 등록을 만들고 리디렉션 URI를 웹 플랫폼으로 추가한 뒤 "
+    "클라이언트 비밀을 발급하고 만료일을 기록합니다. 발급한 비밀 값은 한 번만 표시되므로 안전한 저장소에 즉시 보관합니다."
+)
+OTHER = (
+    "전혀 다른 내용: 조건부 액세스 정책으로 다단계 인증을 요구하고 위치 기반 예외를 설정하는 방법을 설명합니다. "
+    "정책은 보고 전용 모드로 먼저 배포합니다."
+)
+
+
+def _distance(a: str, b: str) -> int:
+    return bin(simhash(normalize_for_dedup(a)) ^ simhash(normalize_for_dedup(b))).count("1")
+
+
+def test_exact_duplicate_ignores_case_spacing_and_punctuation():
+    dedup = NearDuplicateFilter()
+    assert dedup.check("a", BASE) is None
+    assert dedup.check("b", "  " + BASE.upper().replace(".", " ! ") + "\n") == "a"
+    assert dedup.stats() == {"representatives": 1, "exact_duplicates": 1, "near_duplicates": 0}
+
+
+def test_near_duplicate_within_distance_maps_to_representative():
+    variant = BASE.replace("즉시", "바로")
+    assert 0 < _distance(BASE, variant) <= 3
+    dedup = NearDuplicateFilter(max_distance=3)
+    assert dedup.check("a", BASE) is None
+    assert dedup.check("b", variant) == "a"
+    assert dedup.check("c", OTHER) is None
+    assert dedup.stats() == {"representatives": 2, "exact_duplicates": 0, "near_duplicates": 1}
+
+
+def test_short_chunks_only_match_exactly():
+    dedup = NearDuplicateFilter(min_chars=30)
+    assert dedup.check("a", "목차 1장") is None
+    assert dedup.check("b", "목차 2장") is None
+    assert dedup.check("c", "목차 1장") == "a"
+
+
+def test_lsh_matches_brute_force_scan():
+    # 밴드 4개 × 16비트이므로 거리 3 이하인 쌍은 밴드 하나가 반드시 같아 LSH가 놓치지 않음
+    rng = random.Random(7)
+    words = BASE.split()
+    texts = []
+    for _ in range(200):
+        edited = list(words)
+        for _ in range(rng.randint(0, 3)):
+            edited[rng.randrange(len(edited))] = rng.choice(words)
+        texts.append(" ".join(edited))
+
+    dedup = NearDuplicateFilter(max_distance=3)
+    kept = []  # (key, 정규화 텍스트, 서명) - 대표 청크만
+    for i, text in enumerate(texts):
+        normalized = normalize_for_dedup(text)
+        signature = simhash(normalized)
+        exact = [key for key, norm, _ in kept if norm == normalized]
+        near = [key for key, _, sig in kept if bin(sig ^ signature).count("1") <= 3]
+        expected = (exact or near or [None])[0]
+        assert dedup.check(i, text) == expected
+        if expected is None:
+            kept.append((i, normalized, signature))
+    assert dedup.stats()["near_duplicates"] > 0
@@ -0,0 +1,68 @@
+"""BM25 한국어 bigram 토큰화/순위와 RRF 결합 검증"""
+
+import pytest
+
+from app.core.keyword_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = {
+    "secret": "클라이언트 비밀 신청서를 작성한 뒤 관리자 승인을 받습니다.",
+    "redirect": "리디렉션 URI는 앱 등록의 인증 메뉴에서 추가합니다.",
+    "mfa": "조건부 액세스 정책으로 다단계 인증을 요구합니다.",
+    "graphApi": "Microsoft Graph API 권한은 API 사용 권한 메뉴에서 관리자 동의가 필요합니다.",
+}
+
+
+@pytest.fixture()
+def index():
+    index = BM25Index()
+    for doc_id, text in DOCS.items():
+        index.add(doc_id, text)
+    return index
+
+
+def test_tokenize_splits_scripts_camel_case_and_hangul_bigrams():
+    assert tokenize("AppRegistration을 신청") == ["app", "registration", "을", "신청"]
+    assert tokenize("신청서를") == ["신청", "청서", "서를"]
+    assert tokenize("Graph API v1.0") == ["graph", "api", "v1", "0"]
+    assert tokenize("") == []
+
+
+def test_inflected_korean_query_matches_through_bigrams(index):
+    # "신청은"과 "신청서를"은 어절이 달라도 "신청" bigram을 공유
+    results = index.search("비밀 신청은 어떻게 하나요", top_k=3)
+    assert results[0][0] == "secret"
+    assert all(score > 0 for _, score in results)
+    assert [score for _, score in results] == sorted((score for _, score in results), reverse=True)
+
+
+def test_rare_terms_outrank_common_ones_and_misses_are_empty(index):
+    # "관리자"는 두 문서에 나오지만 "graph"는 한 문서에만 있어 IDF가 큼
+    assert index.search("graph 관리자", top_k=1)[0][0] == "graphApi"
+    assert [doc_id for doc_id, _ in index.search("리디렉션", top_k=5)] == ["redirect"]
+    assert index.search("없는단어zzz", top_k=5) == []
+
+
+def test_remove_and_sync_update_results(index):
+    assert index.remove("secret")
+    assert "secret" not in index
+    assert all(doc_id != "secret" for doc_id, _ in index.search("비밀 신청", top_k=5))
+
+    added, removed = index.sync([("redirect", DOCS["redirect"]), ("secret", "비밀 신청 절차는 바뀌었습니다.")])
+    assert (added, removed) == (1, 2)
+    assert len(index) == 2
+    assert index.search("비밀 신청", top_k=1)[0][0] == "secret"
+    assert index.sync([("redirect", DOCS["redirect"]), ("secret", "비밀 신청 절차는 바뀌었습니다.")]) == (0, 0)
+
+
+def test_reciprocal_rank_fusion_scores_and_ties():
+    fused = reciprocal_rank_fusion([["a", "b", "c"], ["c", "a"]], k=60)
+    scores = dict(fused)
+    assert [doc_id for doc_id, _ in fused] == ["a", "c", "b"]
+    assert scores["a"] == pytest.approx(1 / 61 + 1 / 62)
+    assert scores["c"] == pytest.approx(1 / 63 + 1 / 61)
+    assert scores["b"] == pytest.approx(1 / 62)
+
+    # 동점이면 먼저 나온 목록의 순서 유지
+    assert [doc_id for doc_id, _ in reciprocal_rank_fusion([["x", "y"], ["y", "x"]])] == ["x", "y"]
+    weighted = reciprocal_rank_fusion([["x", "y"], ["y", "x"]], weights=[1.0, 2.0])
+    assert [doc_id for doc_id, _ in weighted] == ["y", "x"]
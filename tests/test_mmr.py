@@ -0,0 +1,54 @@
+"""MMR 재정렬과 검색 점수 기반 관련도 검증"""
+
+import numpy as np
+import pytest
+
+from app.rag.mmr import mmr_select
+from app.rag.retriever import _search_relevance
+
+QUERY = [1.0, 0.0, 0.0]
+# 0과 1은 같은 청크(복사본), 2는 조금 덜 관련 있지만 다른 방향
+CANDIDATES = np.array(
+    [
+        [0.9, 0.1, 0.0],
+        [0.9, 0.1, 0.0],
+        [0.7, 0.0, 0.7],
+        [0.0, 1.0, 0.0],
+    ],
+    dtype=np.float32,
+)
+
+
+def test_lambda_one_is_plain_relevance_order():
+    assert mmr_select(QUERY, CANDIDATES, top_k=4, lambda_mult=1.0)[:3] == [0, 1, 2]
+
+
+def test_duplicate_copy_is_pushed_down():
+    assert mmr_select(QUERY, CANDIDATES, top_k=2, lambda_mult=0.5) == [0, 2]
+
+
+def test_relevance_overrides_query_cosine():
+    # 검색 점수상 3번이 1위면 질의 벡터와 멀어도 먼저 뽑힘
+    relevance = [0.5, 0.5, 0.4, 1.0]
+    assert mmr_select(QUERY, CANDIDATES, top_k=2, lambda_mult=0.7, relevance=relevance)[0] == 3
+
+
+def test_edge_cases():
+    assert mmr_select(QUERY, np.zeros((0, 3), dtype=np.float32), top_k=3) == []
+    assert mmr_select(QUERY, CANDIDATES, top_k=0) == []
+    picked = mmr_select(QUERY, CANDIDATES, top_k=10)
+    assert sorted(picked) == [0, 1, 2, 3]
+    # 0벡터 후보는 관련도 0으로 취급되어 마지막에 뽑힘
+    with_zero = np.vstack([np.zeros((1, 3), dtype=np.float32), CANDIDATES[:1]])
+    assert mmr_select(QUERY, with_zero, top_k=2, lambda_mult=1.0) == [1, 0]
+
+
+def test_search_relevance_scales_by_top_score():
+    docs = [{"score": 0.032}, {"score": 0.031}, {"score": 0.016}]
+    assert _search_relevance(docs).tolist() == pytest.approx([1.0, 0.031 / 0.032, 0.5])
+    # 점수가 없으면 검색 순위로 1/(k + 순위)
+    ranked = _search_relevance([{"score": None}, {}])
+    assert ranked[0] == pytest.approx(1.0) and 0 < ranked[1] < 1
+    # 음수 점수(코사인)가 섞이면 min-max
+    assert _search_relevance([{"score": 0.5}, {"score": -0.5}]).tolist() == pytest.approx([1.0, 0.0])
+    assert len(_search_relevance([])) == 0
@@ -0,0 +1,89 @@
+"""Aho-Corasick 질의 재작성이 기존 선형 재작성과 같은 결과를 내는지 검증"""
+
+import json
+import random
+
+import pytest
+
+from app.rag.query_rewrite import DEFAULT_DICT_PATH, AhoCorasick, QueryRewriter, _linear_rewrite, load_rewriter
+
+
+def _linear_replace(query, replacements):
+    for src, dest in replacements:
+        if src in query:
+            query = query.replace(src, dest)
+    return query
+
+
+def _compiled_rewrite(rewriter, query):
+    text, _ = rewriter.replace_compounds(query)
+    return text, rewriter.expand(text)
+
+
+@pytest.fixture(scope="module")
+def shipped():
+    with open(DEFAULT_DICT_PATH, encoding="utf-8") as f:
+        data = json.load(f)
+    replacements = [tuple(pair) for pair in data["compound_replacements"]]
+    synonyms = {key.lower(): values for key, values in data["synonyms"].items()}
+    phrases = {key.lower(): values for key, values in data["phrase_synonyms"].items()}
+    return load_rewriter([DEFAULT_DICT_PATH]), replacements, synonyms, phrases
+
+
+def _queries(replacements, synonyms, phrases):
+    yield from (f"{src} 알려줘" for src, _ in replacements)
+    yield from (f"{phrase} 방법" for phrase in phrases)
+    yield from (f"{word} 절차" for word in synonyms)
+    yield "EntraApp신청가이드 알려줘"
+    yield "entra app 신청 방법이 궁금합니다"
+    yield "사전에 없는 질문입니다"
+
+
+def test_shipped_dictionary_matches_linear_rewrite(shipped):
+    rewriter, replacements, synonyms, phrases = shipped
+    for query in _queries(replacements, synonyms, phrases):
+        text, expansions = _compiled_rewrite(rewriter, query)
+        assert text == _linear_replace(query, replacements), query
+        linear = _linear_rewrite(query, replacements, synonyms, phrases)
+        # 새 방식은 질의 자체와 빈 문자열을 확장에서 뺌
+        assert expansions == [syn for syn in linear if syn and syn != text.lower()], query
+
+
+def test_generated_dictionary_matches_linear_rewrite():
+    rng = random.Random(11)
+    replacements = [(f"합성어{i}신청", f"합성어{i} 신청") for i in range(300)]
+    phrases = {f"구문 {i} 예시": [f"동의어{i}"] for i in range(300)}
+    synonyms = {f"단어{i}": [f"유의어{i}"] for i in range(300)}
+    rewriter = QueryRewriter(replacements, synonyms, phrases)
+    for _ in range(200):
+        parts = [
+            rng.choice(replacements)[0],
+            rng.choice(list(phrases)),
+            rng.choice(list(synonyms)),
+            "알려줘",
+        ]
+        rng.shuffle(parts)
+        query = " ".join(parts)
+        text, expansions = _compiled_rewrite(rewriter, query)
+        assert text == _linear_replace(query, replacements)
+        assert expansions == _linear_rewrite(query, replacements, synonyms, phrases)
+
+
+def test_longest_leftmost_replacement_wins():
+    rewriter = QueryRewriter([("신청가이드", "신청 가이드"), ("entraapp신청가이드", "entraapp 신청 가이드")])
+    text, applied = rewriter.replace_compounds("entraapp신청가이드 보기")
+    assert text == "entraapp 신청 가이드 보기"
+    assert applied == ["entraapp신청가이드->entraapp 신청 가이드"]
+
+
+def test_automaton_finds_every_overlapping_occurrence():
+    patterns = ["he", "she", "his", "hers", "s"]
+    automaton = AhoCorasick(patterns)
+    text = "ushers shishe hers"
+    expected = sorted(
+        (start, pattern_id)
+        for pattern_id, pattern in enumerate(patterns)
+        for start in range(len(text))
+        if text.startswith(pattern, start)
+    )
+    assert sorted(automaton.iter_matches(text)) == expected
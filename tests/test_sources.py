@@ -0,0 +1,84 @@
+"""LocalSource를 가짜 Azure 엔드포인트(app.tools.fake_azure)로 스트리밍 인덱싱해 ETag 건너뛰기와 문서 id를 검증"""
+
+import os
+import shutil
+
+import pytest
+
+import app.core.embeddings
+import app.ingest.indexer
+import app.ingest.page_cache
+from app.config import AppConfig
+from app.ingest.bulk import expand_documents
+from app.ingest.indexer import document_id
+from app.ingest.sources import LocalSource, index_source, source_document_id
+from app.tools.fake_azure import start_server
+
+SAMPLE_PDF = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "docs", "entra_app_guide.pdf")
+
+
+@pytest.fixture()
+def server(monkeypatch, tmp_path, fake_encoding):
+    server = start_server()
+    monkeypatch.setattr(AppConfig, "AIS_ENDPOINT", server.endpoint)
+    monkeypatch.setattr(AppConfig, "AOAI_ENDPOINT", server.endpoint)
+    monkeypatch.setattr(AppConfig, "AIS_INDEX", "sources")
+    monkeypatch.setattr(AppConfig, "CACHE_DIR", str(tmp_path / "cache"))
+    monkeypatch.setattr(AppConfig, "EMBED_CACHE_ENABLED", False)
+    monkeypatch.setattr(AppConfig, "PAGE_CACHE_ENABLED", False)
+    # 이전 테스트에서 만든 클라이언트/캐시가 다른 엔드포인트·경로를 가리키지 않도록 초기화
+    monkeypatch.setattr(app.ingest.indexer, "_search_client", None)
+    monkeypatch.setattr(app.core.embeddings, "_embedding_client", None)
+    monkeypatch.setattr(app.core.embeddings, "_default_batcher", None)
+    monkeypatch.setattr(app.ingest.page_cache, "_default_cache", None)
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture()
+def library(tmp_path):
+    root = tmp_path / "library"
+    for relative in ("teamA/guide.pdf", "teamB/guide.pdf"):
+        target = root / relative
+        target.parent.mkdir(parents=True)
+        shutil.copyfile(SAMPLE_PDF, target)
+    return root
+
+
+def test_second_run_skips_unchanged_files(server, library, tmp_path):
+    state_path = str(tmp_path / "etags.json")
+    source = LocalSource(str(library))
+
+    first = index_source(source, delta=True, state_path=state_path)
+    assert first["listed"] == 2
+    assert first["indexed"] == 2
+    assert first["failed"] == 0
+    parent_ids = {doc["parent_id"] for doc in server.index("sources").docs.values()}
+    assert parent_ids == {document_id("teamA/guide.pdf"), document_id("teamB/guide.pdf")}
+    requests_after_first = server.summary()["index"]["requests"]
+
+    second = index_source(source, delta=True, state_path=state_path)
+    assert second["unchanged"] == 2
+    assert second["indexed"] == 0
+    assert server.summary()["index"]["requests"] == requests_after_first
+
+    # 내용이 바뀐 파일만 다시 처리
+    os.utime(library / "teamB" / "guide.pdf", ns=(1, 1))
+    third = index_source(source, delta=True, state_path=state_path)
+    assert third["unchanged"] == 1
+    assert third["indexed"] == 1
+
+
+def test_document_ids_do_not_depend_on_root_location(library, tmp_path):
+    moved = tmp_path / "moved"
+    shutil.copytree(library, moved)
+
+    ids = sorted(source_document_id(LocalSource(str(library)), item) for item in LocalSource(str(library)).list())
+    moved_ids = sorted(source_document_id(LocalSource(str(moved)), item) for item in LocalSource(str(moved)).list())
+    bulk_ids = sorted(doc_id for _, doc_id in expand_documents([str(library)]))
+
+    assert ids == moved_ids == bulk_ids
+    assert len(set(ids)) == 2
+    labelled = LocalSource(str(library), label="manuals")
+    assert all(source_document_id(labelled, item).startswith("manuals_") for item in labelled.list())
@@ -0,0 +1,86 @@
+"""BulkUploader를 가짜 Azure AI Search 엔드포인트(app.tools.fake_azure)에 대고 검증"""
+
+import pytest
+
+from app.ingest.uploader import BulkUploader, create_search_client
+from app.tools.fake_azure import start_server
+
+
+@pytest.fixture()
+def server():
+    server = start_server()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def _docs(count, text="본문"):
+    return [{"chunk_id": f"doc_{i}", "chunk": f"{text} {i}", "parent_id": "doc"} for i in range(count)]
+
+
+def _client(server, index_name="uploads"):
+    return create_search_client(endpoint=server.endpoint, index_name=index_name, api_key="test")
+
+
+class _FlakyClient:
+    """지정한 키를 처음 한 번만 503으로 실패시키고 나머지는 실제 클라이언트로 전달"""
+
+    def __init__(self, client, flaky_keys):
+        self.client = client
+        self.flaky = set(flaky_keys)
+        self.sent = []
+
+    def index_documents(self, batch):
+        actions = batch.actions
+        self.sent.append([action.additional_properties["chunk_id"] for action in actions])
+        results = self.client.index_documents(batch=batch)
+        for result in results:
+            if result.key in self.flaky:
+                self.flaky.discard(result.key)
+                result.succeeded, result.status_code, result.error_message = False, 503, "injected"
+        return results
+
+
+def test_splits_batches_by_doc_count(server):
+    uploader = BulkUploader(client=_client(server), max_batch_docs=3, concurrency=2, base_backoff=0)
+    summary = uploader.upload(_docs(10))
+
+    assert summary.to_dict()["total"] == 10
+    assert summary.succeeded == 10
+    assert summary.batches == 4
+    assert not summary.failed
+    assert server.summary()["index"]["requests"] == 4
+    assert len(server.index("uploads").docs) == 10
+
+
+def test_splits_batches_by_payload_bytes(server):
+    docs = _docs(6, text="x" * 1000)
+    uploader = BulkUploader(client=_client(server), max_batch_docs=1000, max_batch_bytes=2500, base_backoff=0)
+    summary = uploader.upload(docs)
+
+    assert summary.batches == 3  # 문서 하나가 1KB 남짓이라 배치당 2건
+    assert summary.succeeded == 6
+    assert server.summary()["index"]["requests"] == 3
+
+
+def test_retries_only_failed_keys(server):
+    client = _FlakyClient(_client(server), {"doc_1", "doc_4"})
+    uploader = BulkUploader(client=client, max_batch_docs=100, concurrency=1, base_backoff=0)
+    summary = uploader.upload(_docs(5))
+
+    assert client.sent == [[f"doc_{i}" for i in range(5)], ["doc_1", "doc_4"]]
+    assert summary.succeeded == 5
+    assert summary.retried == 2
+    assert not summary.failed
+
+
+def test_reports_keys_that_keep_failing(server):
+    client = _FlakyClient(_client(server), set())
+    uploader = BulkUploader(client=client, action="merge", max_batch_docs=100, max_retries=2, base_backoff=0)
+    summary = uploader.upload([{"chunk_id": "missing", "chunk": "없는 문서"}])
+
+    # merge 대상이 없으면 404: 재시도 대상이 아니므로 한 번만 보내고 실패로 남김
+    assert client.sent == [["missing"]]
+    assert summary.succeeded == 0
+    assert list(summary.failed) == ["missing"]
+    assert summary.to_dict()["failed"] == 1